@@ -0,0 +1,118 @@
+"""
+apply_journal.py - Append-only, resumable journal for schema_apply.py
+
+A restore against a slow Cloud Run instance can die halfway through a phase
+(timeouts, cold starts, expired tokens). The journal records every applied
+operation as one JSON line, keyed by a hash of target URL + plan + spec (+ mode
+and stored snapshot), so a rerun of the SAME plan knows what the interrupted
+run already did. A changed plan or spec gets a new hash, which starts a clean
+run; old lines stay in the file as history.
+
+Entries are hints, never a substitute for live state: schema_apply.py always
+diffs against the live instance, and an operation the journal marks done but
+that is missing live (e.g. after a DB reset) is applied again. Once a run
+finishes, complete() retires its entries, so the next run (e.g.
+restore_appendix_16.sh) starts from a clean slate.
+
+Line format:
+    {"plan": "<hash>", "op": "collection:pages", "status": "done", "ts": 1700000000.0}
+
+Status is "done" or "failed"; the LAST line for an operation wins. A
+{"op": "*", "status": "reset"} line (schema_apply.py --restart) or
+{"op": "*", "status": "complete"} line (finished run) forgets everything
+before it for that plan. Lines are flushed and fsynced one by one so
+a crash loses at most the operation in flight.
+
+Usage:
+    from apply_journal import ApplyJournal, plan_hash
+
+    journal = ApplyJournal(JOURNAL_PATH, plan_hash(api_url, plan, spec))
+    journal.record("collection:pages", "done")
+    ...
+    journal.complete()          # finished: the next run starts from live state
+"""
+
+import os
+import json
+import time
+import hashlib
+import threading
+
+# Resolved from this file so the journal works from any cwd (gitignored)
+JOURNAL_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "schema_apply.journal.jsonl")
+
+
+def plan_hash(*parts):
+    """Stable hash over JSON-serialisable parts (dict key order does not matter)."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(json.dumps(part, sort_keys=True, separators=(",", ":")).encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+class ApplyJournal:
+    """Completed-operation set for one plan hash, backed by a JSONL file."""
+
+    def __init__(self, path, key, enabled=True):
+        self.path = path
+        self.key = key
+        self.enabled = enabled
+        self._status = {}
+        self._lock = threading.Lock()
+        if enabled:
+            self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue  # torn last line after a crash
+                    if entry.get("plan") != self.key or not entry.get("op"):
+                        continue
+                    if entry["op"] == "*" and entry.get("status") in ("reset", "complete"):
+                        self._status = {}
+                    else:
+                        self._status[entry["op"]] = entry.get("status")
+        except OSError:
+            pass
+
+    def is_done(self, op):
+        with self._lock:
+            return self._status.get(op) == "done"
+
+    def done_count(self):
+        with self._lock:
+            return sum(1 for status in self._status.values() if status == "done")
+
+    def failed_ops(self):
+        with self._lock:
+            return sorted(op for op, status in self._status.items() if status == "failed")
+
+    def reset(self):
+        """Forget completed operations of this plan (history stays in the file)."""
+        self.record("*", "reset")
+        with self._lock:
+            self._status = {}
+
+    def complete(self, **extra):
+        """Retire this plan's entries after a finished run; the next run starts from live state."""
+        self.record("*", "complete", **extra)
+        with self._lock:
+            self._status = {}
+
+    def record(self, op, status="done", **extra):
+        """Append one entry (thread-safe, fsynced)."""
+        if not self.enabled:
+            return
+        entry = dict(extra, plan=self.key, op=op, status=status, ts=round(time.time(), 3))
+        line = json.dumps(entry, sort_keys=True) + "\n"
+        with self._lock:
+            self._status[op] = status
+            with open(self.path, "a") as f:
+                f.write(line)
+                f.flush()
+                os.fsync(f.fileno())
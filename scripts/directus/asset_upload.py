@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+asset_upload.py - Streaming upload of bundled assets to Directus /files
+
+Seed and smoke assets used to go through POST /files/import with a remote
+placehold.co URL, so a cold Directus had to fetch from the internet during
+boot. The images now live in scripts/directus/assets/ and are sent as
+multipart/form-data to POST /files:
+
+- Streamed: the body is produced in CHUNK_SIZE pieces straight from disk
+  (known Content-Length, no full copy in memory)
+- Deduplicated: the SHA256 of each file is stored in the directus_files row
+  (description = "sha256:<hex>"); one filter[description][_in] lookup finds
+  every asset that is already uploaded, and those are never sent again
+
+Usage:
+    python3 scripts/directus/asset_upload.py scripts/directus/assets/agency-os-logo.png --title "Agency OS Logo"
+
+    from asset_upload import ensure_asset, upload_file
+    file_id = ensure_asset(api_url, token, "scripts/directus/assets/agency-os-logo.png", "Agency OS Logo")
+
+ENVIRONMENT:
+    DIRECTUS_URL              - Directus base URL
+    DIRECTUS_ADMIN_EMAIL      - Admin email (or GSM secret)
+    DIRECTUS_ADMIN_PASSWORD   - Admin password (or GSM secret)
+"""
+
+import os
+import sys
+import json
+import uuid
+import hashlib
+import argparse
+import mimetypes
+import urllib.parse
+
+from directus_client import get_client
+
+# Resolved from this file: restore_appendix_16.sh / start.sh run the tools from any cwd
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "assets")
+CHUNK_SIZE = 64 * 1024
+CHECKSUM_PREFIX = "sha256:"
+
+
+def file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def checksum_tag(path):
+    return CHECKSUM_PREFIX + file_sha256(path)
+
+
+class MultipartBody:
+    """
+    Re-iterable multipart/form-data body: metadata fields first (Directus reads
+    them before the file part), then the file streamed from disk.
+    """
+
+    def __init__(self, path, fields=None, filename=None, content_type=None):
+        self.path = path
+        self.boundary = f"----directus-upload-{uuid.uuid4().hex}"
+        filename = filename or os.path.basename(path)
+        content_type = content_type or mimetypes.guess_type(filename)[0] or "application/octet-stream"
+
+        head = []
+        for name, value in (fields or {}).items():
+            if not isinstance(value, str):
+                value = json.dumps(value)
+            head.append(f'--{self.boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n')
+        head.append(
+            f'--{self.boundary}\r\nContent-Disposition: form-data; name="file"; filename="{filename}"\r\n'
+            f"Content-Type: {content_type}\r\n\r\n"
+        )
+        self.head = "".join(head).encode("utf-8")
+        self.tail = f"\r\n--{self.boundary}--\r\n".encode("utf-8")
+
+    @property
+    def content_type(self):
+        return f"multipart/form-data; boundary={self.boundary}"
+
+    def __len__(self):
+        return len(self.head) + os.path.getsize(self.path) + len(self.tail)
+
+    def __iter__(self):
+        # A fresh pass per iteration: http.client may resend on a stale keep-alive socket
+        yield self.head
+        with open(self.path, "rb") as f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                yield chunk
+        yield self.tail
+
+
+def upload_file(api_url, token, path, data=None, client=None):
+    """
+    POST /files as a streamed multipart upload.
+    Returns the parsed body or {"error": code, "message": text} like DirectusClient.request.
+    """
+    client = client or get_client()
+    body = MultipartBody(path, fields=data)
+    headers = {"Content-Type": body.content_type, "Content-Length": str(len(body))}
+    try:
+        with client.stream("POST", f"{api_url}/files", body=body, headers=headers, token=token) as response:
+            raw = response.read()
+            status, reason = response.status, response.reason
+    except Exception as e:
+        return {"error": 500, "message": str(e)}
+
+    text = raw.decode("utf-8", errors="replace")
+    if status >= 300:
+        return {"error": status, "message": text or reason}
+    try:
+        return json.loads(text) if text else {}
+    except ValueError:
+        return {"text": text}
+
+
+def find_by_checksum(api_url, token, tags, client=None):
+    """{checksum tag: directus_files row} for already uploaded assets (one request)."""
+    client = client or get_client()
+    tags = list(dict.fromkeys(tags))
+    if not tags:
+        return {}
+    in_value = ",".join(urllib.parse.quote(tag, safe=":") for tag in tags)
+    res = client.request(
+        "GET", f"{api_url}/files?filter[description][_in]={in_value}&fields=id,title,description&limit=-1",
+        token=token,
+    )
+    if "error" in res:
+        print(f"   [WARN] Checksum lookup failed: HTTP {res['error']} - {res.get('message')}")
+        return {}
+    found = {}
+    for row in res.get("data") or []:
+        found.setdefault(row.get("description"), row)
+    return found
+
+
+def ensure_asset(api_url, token, path, title, data=None, client=None):
+    """Id of the directus_files row holding `path`; uploads it only when no row has its checksum."""
+    client = client or get_client()
+    tag = checksum_tag(path)
+    existing = find_by_checksum(api_url, token, [tag], client=client).get(tag)
+    if existing:
+        print(f"[SKIP] Asset '{title}' unchanged (ID: {existing['id']})")
+        return existing["id"]
+
+    print(f"[CREATING] Uploading asset '{title}' ({os.path.basename(path)}, {os.path.getsize(path)} bytes)...")
+    payload = dict(data or {}, title=title, description=tag)
+    res = upload_file(api_url, token, path, data=payload, client=client)
+    if "error" in res:
+        print(f"   [WARN] Failed to upload asset: {res}")
+        return None
+    file_id = (res.get("data") or {}).get("id")
+    print(f"   [SUCCESS] Uploaded asset '{title}' (ID: {file_id})")
+    return file_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Upload a bundled asset to Directus (skipped when unchanged)")
+    parser.add_argument("path", help="File to upload")
+    parser.add_argument("--title", help="File title (default: file name)")
+    args = parser.parse_args()
+
+    from directus_auth import DirectusAuth
+
+    api_url = os.environ.get("DIRECTUS_URL")
+    if not api_url:
+        print("[ERROR] Missing DIRECTUS_URL environment variable")
+        return 1
+    api_url = api_url.rstrip("/")
+    token = DirectusAuth(api_url).token()
+    if not token:
+        print("[ERROR] Auth failed")
+        return 1
+    file_id = ensure_asset(api_url, token, args.path, args.title or os.path.basename(args.path))
+    return 0 if file_id else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
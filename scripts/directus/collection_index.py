@@ -0,0 +1,126 @@
+"""
+collection_index.py - Shared collection/field index for scripts/directus tools
+
+Builds an in-memory index of the Directus data model from exactly TWO requests
+(GET /collections + GET /fields, plus GET /relations when asked for), or from a
+stored schema snapshot (directus/snapshot.json) when working offline. Lookups
+are O(1) set/dict hits, so scripts never need a per-collection existence probe
+again.
+
+Usage:
+    from collection_index import CollectionIndex
+
+    index = CollectionIndex.from_api(api_url, token)
+    index = CollectionIndex.from_snapshot("directus/snapshot.json")
+    index = CollectionIndex.from_snapshot("directus/snapshot-full")  # sharded export (snapshot_store.py)
+
+    "pages" in index                        # collection exists?
+    index.has_field("pages", "permalink")  # field exists?
+    index.field_names("pages")             # {"id", "permalink", ...}
+    index.relation("pages", "seo")         # relation row or None (relations loaded)
+"""
+
+from directus_client import get_client
+from snapshot_store import load_any
+
+SNAPSHOT_PATH = "directus/snapshot.json"
+
+
+def _get_data(client, url, token):
+    res = client.request("GET", url, token=token)
+    if "error" in res:
+        raise RuntimeError(f"GET {url} failed: HTTP {res['error']} - {res.get('message')}")
+    return res.get("data", [])
+
+
+class CollectionIndex:
+    """Collection and field lookup table built from one listing of each."""
+
+    def __init__(self, collections, fields, source="unknown", relations=None):
+        # collections: iterable of collection rows ({"collection", "meta", "schema"})
+        # fields: iterable of field rows ({"collection", "field", "type", ...})
+        # relations: iterable of relation rows ({"collection", "field", "related_collection", ...})
+        self.source = source
+        self._collections = {}
+        self._fields = {}
+        self._relations = {}
+
+        for row in collections:
+            name = row.get("collection")
+            if name:
+                self._collections[name] = row
+
+        for row in fields:
+            collection = row.get("collection")
+            name = row.get("field")
+            if collection and name:
+                self._fields.setdefault(collection, {})[name] = row
+
+        for row in relations or []:
+            collection = row.get("collection")
+            name = row.get("field")
+            if collection and name:
+                self._relations[(collection, name)] = row
+
+    @classmethod
+    def from_api(cls, api_url, token, client=None, include_relations=False):
+        """Build the index from the live server (2 requests, 3 with relations)."""
+        client = client or get_client()
+        api_url = api_url.rstrip("/")
+        collections = _get_data(client, f"{api_url}/collections", token)
+        fields = _get_data(client, f"{api_url}/fields", token)
+        relations = _get_data(client, f"{api_url}/relations", token) if include_relations else None
+        return cls(collections, fields, source=api_url, relations=relations)
+
+    @classmethod
+    def from_snapshot(cls, path=SNAPSHOT_PATH):
+        """Build the index from a stored /schema/snapshot export or sharded directory (no network)."""
+        snapshot = load_any(path)
+        return cls(
+            snapshot.get("collections", []),
+            snapshot.get("fields", []),
+            source=path,
+            relations=snapshot.get("relations", []),
+        )
+
+    def __contains__(self, collection):
+        return collection in self._collections
+
+    def __len__(self):
+        return len(self._collections)
+
+    def has_collection(self, collection):
+        return collection in self._collections
+
+    def collection_names(self):
+        return set(self._collections)
+
+    def collection(self, collection):
+        """Raw collection row, or None."""
+        return self._collections.get(collection)
+
+    def has_field(self, collection, field):
+        return field in self._fields.get(collection, {})
+
+    def field_names(self, collection):
+        """Set of field names for a collection (empty if unknown)."""
+        return set(self._fields.get(collection, {}))
+
+    def fields(self, collection):
+        """{field_name: field_row} for a collection (empty if unknown)."""
+        return dict(self._fields.get(collection, {}))
+
+    def field(self, collection, field):
+        """Raw field row, or None."""
+        return self._fields.get(collection, {}).get(field)
+
+    def field_count(self):
+        return sum(len(f) for f in self._fields.values())
+
+    def relation(self, collection, field):
+        """Raw relation row for the many-side field, or None."""
+        return self._relations.get((collection, field))
+
+    def relations(self):
+        """{(collection, field): relation_row} for every loaded relation."""
+        return dict(self._relations)
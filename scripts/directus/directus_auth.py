@@ -0,0 +1,218 @@
+"""
+directus_auth.py - Expiry-aware admin token cache shared by scripts/directus tools
+
+Chained ops runs (restore_appendix_16.sh: schema_apply.py -> seed_minimal.py,
+...) used to log in again in every script, often after shelling out to
+`gcloud secrets versions access` twice. This module keeps the login result in
+a private cache so consecutive tools reuse it:
+
+1. Cached access token still valid (with a safety margin) -> use it; a token
+   read from the cache file is checked once per process with GET /users/me,
+   so a token revoked server-side (SECRET change, DB restore, password
+   rotation) is dropped instead of failing every script until it expires
+2. Access token expired but refresh token present -> POST /auth/refresh
+3. Otherwise resolve credentials (env, then GSM via secret_resolver.py)
+   and POST /auth/login
+
+The cache is one JSON file per Directus URL + account in a private directory
+(0700, files 0600, written atomically). A directory that is not owned by the
+current user or is readable by others is never used.
+
+Usage:
+    from directus_auth import DirectusAuth
+
+    auth = DirectusAuth(api_url)
+    token = auth.token()     # cheap; call again before each long phase
+                             # and it refreshes when close to expiry
+
+ENVIRONMENT:
+    DIRECTUS_TOKEN_CACHE       - "off" disables the file cache
+    DIRECTUS_TOKEN_CACHE_DIR   - Cache directory (default: <tmp>/directus-auth-<uid>)
+"""
+
+import os
+import json
+import time
+import stat
+import hashlib
+import tempfile
+
+from directus_client import get_client
+from secret_resolver import get_resolver
+
+# Refresh this many seconds before the server-side expiry
+EXPIRY_MARGIN = 60
+# Used when the server does not report "expires" (Directus default: 15 min)
+DEFAULT_TTL = 900
+
+EMAIL_SECRETS = ("DIRECTUS_ADMIN_EMAIL", "DIRECTUS_ADMIN_EMAIL_test")
+PASSWORD_SECRETS = ("DIRECTUS_ADMIN_PASSWORD", "DIRECTUS_ADMIN_PASSWORD_test")
+
+
+def private_dir(path):
+    """
+    Create `path` (0700) if needed and return it. Raises ValueError when it is
+    a symlink, not a directory, owned by someone else or open to group/others.
+    """
+    os.makedirs(path, mode=0o700, exist_ok=True)
+    info = os.lstat(path)
+
+    # Refuse symlinks, foreign owners and group/other access
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+        raise ValueError(f"{path}: not a directory owned by the current user, refusing to use it")
+    if info.st_mode & (stat.S_IRWXG | stat.S_IRWXO):
+        raise ValueError(f"{path}: accessible by group/others (chmod 700), refusing to use it")
+    return path
+
+
+def get_cache_dir():
+    """Return the private cache directory, or None if it cannot be trusted."""
+    if os.environ.get("DIRECTUS_TOKEN_CACHE", "").lower() == "off":
+        return None
+
+    path = os.environ.get("DIRECTUS_TOKEN_CACHE_DIR") or os.path.join(
+        tempfile.gettempdir(), f"directus-auth-{os.getuid()}"
+    )
+    try:
+        return private_dir(path)
+    except (OSError, ValueError):
+        return None
+
+
+class DirectusAuth:
+    """Login/refresh with a cross-process token cache."""
+
+    def __init__(self, api_url, client=None, email_secrets=EMAIL_SECRETS, password_secrets=PASSWORD_SECRETS):
+        self.api_url = api_url.rstrip("/")
+        self.client = client or get_client()
+        self.email_secrets = tuple(email_secrets)
+        self.password_secrets = tuple(password_secrets)
+        self._state = None
+
+        account = os.environ.get("DIRECTUS_ADMIN_EMAIL") or ",".join(self.email_secrets)
+        key = hashlib.sha256(f"{self.api_url}|{account}".encode("utf-8")).hexdigest()[:32]
+        cache_dir = get_cache_dir()
+        self.cache_path = os.path.join(cache_dir, f"{key}.json") if cache_dir else None
+
+    # ------------------------------------------------------------------
+    # Cache file
+    # ------------------------------------------------------------------
+
+    def _load(self):
+        if not self.cache_path:
+            return None
+        try:
+            with open(self.cache_path, "r") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("api_url") != self.api_url:
+            return None
+        return state
+
+    def _save(self, state):
+        self._state = state
+        if not self.cache_path:
+            return
+        tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.cache_path)
+        except OSError as e:
+            print(f"[WARN] Could not write token cache: {e}")
+
+    def invalidate(self):
+        """Forget the cached tokens (e.g. after a 401)."""
+        self._state = None
+        if self.cache_path:
+            try:
+                os.remove(self.cache_path)
+            except OSError:
+                pass
+
+    # ------------------------------------------------------------------
+    # Token lifecycle
+    # ------------------------------------------------------------------
+
+    def _store_response(self, res, source):
+        data = res.get("data") or {}
+        access_token = data.get("access_token")
+        if not access_token:
+            return None
+        ttl = (data.get("expires") or DEFAULT_TTL * 1000) / 1000.0
+        self._save({
+            "api_url": self.api_url,
+            "access_token": access_token,
+            "refresh_token": data.get("refresh_token"),
+            "expires_at": time.time() + ttl,
+            "source": source,
+        })
+        return access_token
+
+    def _refresh(self, refresh_token):
+        res = self.client.request(
+            "POST",
+            f"{self.api_url}/auth/refresh",
+            data={"refresh_token": refresh_token, "mode": "json"},
+        )
+        if "error" in res:
+            return None
+        return self._store_response(res, "refresh")
+
+    def _resolve_credentials(self):
+        # Env first; every missing value's GSM fallbacks are fetched in one concurrent wave
+        email = os.environ.get("DIRECTUS_ADMIN_EMAIL")
+        password = os.environ.get("DIRECTUS_ADMIN_PASSWORD")
+        chains = {}
+        if not email:
+            chains["email"] = self.email_secrets
+        if not password:
+            chains["password"] = self.password_secrets
+        if chains:
+            values = get_resolver().resolve_first(chains)
+            email = email or values.get("email")
+            password = password or values.get("password")
+        return email, password
+
+    def _login(self):
+        email, password = self._resolve_credentials()
+        if not email or not password:
+            print("Missing DIRECTUS_ADMIN_EMAIL or DIRECTUS_ADMIN_PASSWORD (env or GSM).")
+            return None
+        res = self.client.request(
+            "POST", f"{self.api_url}/auth/login", data={"email": email, "password": password}
+        )
+        if "error" in res:
+            print(f"Error logging in: HTTP {res['error']} - {res.get('message')}")
+            return None
+        return self._store_response(res, "login")
+
+    def _accepted(self, access_token):
+        """False only when the server rejects the token; other failures keep it."""
+        res = self.client.request(
+            "GET", f"{self.api_url}/users/me?fields=id", token=access_token, retry=False
+        )
+        return res.get("error") != 401
+
+    def token(self):
+        """Return a valid access token, refreshing or logging in only when needed."""
+        from_file = self._state is None
+        state = self._state or self._load()
+        now = time.time()
+
+        if state:
+            if state.get("expires_at", 0) - EXPIRY_MARGIN > now:
+                if not from_file or self._accepted(state["access_token"]):
+                    self._state = state
+                    return state["access_token"]
+                print("[WARN] Cached Directus token was rejected (401); re-authenticating")
+                state = dict(state, expires_at=0)
+            if state.get("refresh_token"):
+                token = self._refresh(state["refresh_token"])
+                if token:
+                    return token
+            self.invalidate()
+
+        return self._login()
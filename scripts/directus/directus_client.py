@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+directus_client.py - Pooled keep-alive HTTP client shared by scripts/directus tools
+
+Every tool used to build a new ssl.create_default_context() and open a fresh
+urllib connection per call, paying TCP (+TLS) setup every time. This module
+keeps ONE client per process with:
+
+- Persistent HTTP/1.1 keep-alive connections, pooled per origin (thread-safe)
+- One cached SSL context (verification off by default, like the old scripts)
+- Configurable timeout and retry/backoff for transient 5xx / connection errors
+- One error model for every caller:
+    success  -> parsed JSON body ({} for 204/empty, {"text": ...} for non-JSON)
+    failure  -> {"error": <status or 500>, "message": <response body or reason>}
+- Counters (requests, connections opened/reused, retries) to verify reuse
+- GET/HEAD follow up to MAX_REDIRECTS redirects like urllib did (Authorization
+  is dropped when the redirect leaves the origin); other methods get an error
+  for a 3xx instead of silently treating it as success
+- HTTP_PROXY / HTTPS_PROXY / NO_PROXY are honoured like urllib: plain HTTP is
+  sent in absolute form to the proxy, HTTPS goes through a CONNECT tunnel
+
+Usage:
+    from directus_client import get_client
+
+    client = get_client()
+    res = client.request("GET", f"{api_url}/items/pages?limit=1", token=token)
+    if "error" in res: ...
+    print(client.stats())
+
+Benchmark against a local stand-in server (pooled vs. one connection per call):
+    python3 scripts/directus/directus_client.py --bench http://localhost:8055/server/health -n 200
+
+ENVIRONMENT:
+    DIRECTUS_HTTP_TIMEOUT   - Socket timeout in seconds (default 30)
+    DIRECTUS_VERIFY_SSL     - "true" to verify TLS certificates (default off)
+    HTTP_PROXY, HTTPS_PROXY - Proxy URLs (http://[user:pass@]host:port)
+    NO_PROXY                - Hosts that bypass the proxy
+"""
+
+import os
+import sys
+import json
+import ssl
+import time
+import socket
+import argparse
+import base64
+import threading
+import http.client
+from contextlib import contextmanager
+from urllib.parse import unquote, urljoin, urlsplit
+from urllib.request import getproxies, proxy_bypass_environment
+
+DEFAULT_TIMEOUT = float(os.environ.get("DIRECTUS_HTTP_TIMEOUT", "30"))
+DEFAULT_VERIFY_SSL = os.environ.get("DIRECTUS_VERIFY_SSL", "false").lower() == "true"
+DEFAULT_POOL_SIZE = 8
+RETRYABLE_STATUSES = (500, 502, 503, 504)
+REDIRECT_STATUSES = (301, 302, 303, 307, 308)
+MAX_REDIRECTS = 5
+
+# Errors that mean a pooled keep-alive socket was closed by the server while idle
+STALE_CONNECTION_ERRORS = (
+    http.client.RemoteDisconnected,
+    http.client.BadStatusLine,
+    BrokenPipeError,
+    ConnectionResetError,
+    ConnectionAbortedError,
+)
+
+_SSL_CONTEXTS = {}
+_SSL_LOCK = threading.Lock()
+
+
+def get_ssl_context(verify=DEFAULT_VERIFY_SSL):
+    """Return a process-wide cached SSL context."""
+    with _SSL_LOCK:
+        ctx = _SSL_CONTEXTS.get(verify)
+        if ctx is None:
+            ctx = ssl.create_default_context()
+            if not verify:
+                ctx.check_hostname = False
+                ctx.verify_mode = ssl.CERT_NONE
+            _SSL_CONTEXTS[verify] = ctx
+        return ctx
+
+
+class DirectusClient:
+    """Keep-alive HTTP client with a small per-origin connection pool."""
+
+    def __init__(
+        self,
+        timeout=DEFAULT_TIMEOUT,
+        verify_ssl=DEFAULT_VERIFY_SSL,
+        pool_size=DEFAULT_POOL_SIZE,
+        retries=1,
+        backoff=2,
+        retry_statuses=RETRYABLE_STATUSES,
+        proxies=None,
+    ):
+        self.timeout = timeout
+        self.verify_ssl = verify_ssl
+        self.pool_size = pool_size
+        self.retries = max(1, retries)
+        self.backoff = backoff
+        self.retry_statuses = tuple(retry_statuses)
+        # {"http": url, "https": url, "no": hosts}; read from the environment like urllib
+        self.proxies = getproxies() if proxies is None else proxies
+
+        self._idle = {}  # (scheme, netloc) -> [HTTPConnection, ...]
+        self._lock = threading.Lock()
+        self._stats = {
+            "requests": 0,
+            "connections_opened": 0,
+            "connections_reused": 0,
+            "retries": 0,
+            "errors": 0,
+        }
+
+    # ------------------------------------------------------------------
+    # Pool management
+    # ------------------------------------------------------------------
+
+    def _count(self, key, n=1):
+        with self._lock:
+            self._stats[key] += n
+
+    def _proxy(self, scheme, netloc):
+        """Parsed proxy URL for an origin, or None for a direct connection."""
+        proxy = self.proxies.get(scheme)
+        if not proxy or proxy_bypass_environment(netloc, self.proxies):
+            return None
+        return urlsplit(proxy if "://" in proxy else f"http://{proxy}")
+
+    def _acquire(self, scheme, netloc):
+        """Return (connection, reused) for an origin."""
+        with self._lock:
+            idle = self._idle.get((scheme, netloc))
+            if idle:
+                self._stats["connections_reused"] += 1
+                return idle.pop(), True
+            self._stats["connections_opened"] += 1
+
+        proxy = self._proxy(scheme, netloc)
+        if proxy:
+            proxy_netloc = proxy.netloc.rpartition("@")[2]
+            proxy_headers = {}
+            if proxy.username:
+                credentials = f"{unquote(proxy.username)}:{unquote(proxy.password or '')}"
+                proxy_headers["Proxy-Authorization"] = "Basic " + base64.b64encode(credentials.encode()).decode()
+            if scheme == "https":
+                conn = http.client.HTTPSConnection(
+                    proxy_netloc, timeout=self.timeout, context=get_ssl_context(self.verify_ssl)
+                )
+                conn.set_tunnel(netloc, headers=proxy_headers)
+            else:
+                conn = http.client.HTTPConnection(proxy_netloc, timeout=self.timeout)
+                # Absolute-form request target, proxy credentials on every request
+                conn.proxy_headers = proxy_headers
+            return conn, False
+
+        if scheme == "https":
+            conn = http.client.HTTPSConnection(
+                netloc, timeout=self.timeout, context=get_ssl_context(self.verify_ssl)
+            )
+        else:
+            conn = http.client.HTTPConnection(netloc, timeout=self.timeout)
+        return conn, False
+
+    def _release(self, scheme, netloc, conn, response):
+        """Return a connection to the pool if the server allows keep-alive."""
+        if response is None or response.will_close or self.pool_size <= 0:
+            conn.close()
+            return
+        with self._lock:
+            idle = self._idle.setdefault((scheme, netloc), [])
+            if len(idle) < self.pool_size:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self):
+        """Close every idle pooled connection."""
+        with self._lock:
+            pools = list(self._idle.values())
+            self._idle = {}
+        for idle in pools:
+            for conn in idle:
+                conn.close()
+
+    def stats(self):
+        with self._lock:
+            return dict(self._stats)
+
+    # ------------------------------------------------------------------
+    # Requests
+    # ------------------------------------------------------------------
+
+    def _send_once(self, method, url, body=None, headers=None):
+        """
+        Send one request over a pooled connection and return (parts, conn, response).
+        A stale keep-alive socket is replaced by a fresh connection once.
+        """
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+
+        while True:
+            conn, reused = self._acquire(parts.scheme, parts.netloc)
+            target, request_headers = path, headers or {}
+            if hasattr(conn, "proxy_headers"):
+                target = f"{parts.scheme}://{parts.netloc}{path}"
+                request_headers = dict(request_headers, **conn.proxy_headers)
+            try:
+                if conn.sock is None:
+                    conn.connect()
+                    # Small request/response pairs: avoid Nagle + delayed-ACK stalls
+                    conn.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+                conn.request(method, target, body=body, headers=request_headers)
+                return parts, conn, conn.getresponse()
+            except STALE_CONNECTION_ERRORS:
+                conn.close()
+                if not reused:
+                    raise
+                # Idle socket was closed server-side; retry on a fresh one
+            except Exception:
+                conn.close()
+                raise
+
+    def _send(self, method, url, body=None, headers=None):
+        """
+        _send_once() plus redirects: GET/HEAD follow up to MAX_REDIRECTS hops,
+        other methods get the 3xx response back.
+        """
+        headers = dict(headers or {})
+        for _ in range(MAX_REDIRECTS + 1):
+            parts, conn, response = self._send_once(method, url, body=body, headers=headers)
+            location = response.getheader("Location")
+            if method not in ("GET", "HEAD") or response.status not in REDIRECT_STATUSES or not location:
+                return parts, conn, response
+            response.read()
+            self._release(parts.scheme, parts.netloc, conn, response)
+            url = urljoin(url, location)
+            target = urlsplit(url)
+            if (target.scheme, target.netloc) != (parts.scheme, parts.netloc):
+                # Never forward credentials to another origin
+                headers.pop("Authorization", None)
+        raise http.client.HTTPException(f"Too many redirects (> {MAX_REDIRECTS}), last: {url}")
+
+    @contextmanager
+    def stream(self, method, url, body=None, headers=None, token=None):
+        """
+        Yield the raw http.client response for streaming reads.
+        The connection returns to the pool once the body is fully consumed.
+        """
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        self._count("requests")
+        parts, conn, response = self._send(method, url, body=body, headers=headers)
+        try:
+            yield response
+        finally:
+            if response.isclosed() or response.length == 0:
+                self._release(parts.scheme, parts.netloc, conn, response)
+            else:
+                # Unread body left on the socket: it cannot be reused
+                conn.close()
+
+    def request(self, method, url, data=None, token=None, headers=None, retry=True):
+        """
+        JSON request with retries on transient errors.
+        Returns the parsed body or {"error": code, "message": text}.
+        """
+        headers = dict(headers or {})
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        body = None
+        if data is not None:
+            body = json.dumps(data).encode("utf-8")
+            headers["Content-Type"] = "application/json"
+
+        max_attempts = self.retries if retry else 1
+
+        for attempt in range(1, max_attempts + 1):
+            self._count("requests")
+            try:
+                parts, conn, response = self._send(method, url, body=body, headers=headers)
+                raw = response.read()
+                self._release(parts.scheme, parts.netloc, conn, response)
+            except Exception as e:
+                if attempt < max_attempts:
+                    wait = self.backoff * (2 ** (attempt - 1))
+                    print(f"  [RETRY] Connection error, attempt {attempt}/{max_attempts}. Waiting {wait}s...")
+                    self._count("retries")
+                    time.sleep(wait)
+                    continue
+                self._count("errors")
+                return {"error": 500, "message": str(e)}
+
+            status = response.status
+            text = raw.decode("utf-8", errors="replace")
+
+            if 300 <= status < 400:
+                # Only reached for methods that do not follow redirects (or a 3xx without Location)
+                self._count("errors")
+                return {"error": status, "message": f"Redirect to {response.getheader('Location')} not followed"}
+
+            if status >= 400:
+                if status in self.retry_statuses and attempt < max_attempts:
+                    wait = self.backoff * (2 ** (attempt - 1))
+                    print(f"  [RETRY] Request failed ({status}), attempt {attempt}/{max_attempts}. Waiting {wait}s...")
+                    self._count("retries")
+                    time.sleep(wait)
+                    continue
+                self._count("errors")
+                return {"error": status, "message": text}
+
+            if status == 204 or not raw:
+                return {}
+            if "application/json" in (response.getheader("Content-Type") or ""):
+                try:
+                    return json.loads(text)
+                except ValueError:
+                    return {"text": text}
+            return {"text": text}
+
+        return {"error": 500, "message": "Max retries exceeded"}
+
+    def status(self, method, url, token=None, headers=None):
+        """Return only the HTTP status code (0 on connection failure)."""
+        try:
+            with self.stream(method, url, token=token, headers=headers) as response:
+                response.read()
+                return response.status
+        except Exception:
+            self._count("errors")
+            return 0
+
+
+_CLIENT = None
+_CLIENT_LOCK = threading.Lock()
+
+
+def get_client():
+    """Process-wide shared client (one pool for every script in a run)."""
+    global _CLIENT
+    with _CLIENT_LOCK:
+        if _CLIENT is None:
+            _CLIENT = DirectusClient()
+        return _CLIENT
+
+
+def _bench(url, count):
+    results = {}
+    for label, pool_size in (("fresh connection per call", 0), ("pooled keep-alive", DEFAULT_POOL_SIZE)):
+        client = DirectusClient(pool_size=pool_size)
+        start = time.perf_counter()
+        for _ in range(count):
+            client.status("GET", url)
+        elapsed = time.perf_counter() - start
+        stats = client.stats()
+        client.close()
+        results[label] = elapsed
+        print(f"{label:<28} {elapsed * 1000 / count:8.2f} ms/req  "
+              f"opened={stats['connections_opened']} reused={stats['connections_reused']} "
+              f"errors={stats['errors']}")
+    fresh, pooled = results.values()
+    if pooled:
+        print(f"Speedup: {fresh / pooled:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Directus HTTP client connection-reuse benchmark")
+    parser.add_argument("--bench", metavar="URL", required=True, help="URL to GET repeatedly")
+    parser.add_argument("-n", type=int, default=100, help="Requests per mode (default: %(default)s)")
+    args = parser.parse_args()
+    _bench(args.bench, args.n)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,114 +1,373 @@
+"""
+fetch_snapshot.py - Download (or incrementally refresh) the Directus schema snapshot
+
+Default: GET /schema/snapshot and store it in directus/snapshot.json.
+
+--incremental: refresh the stored snapshot from what changed since the last run
+instead of downloading all of it (snapshot-full.json is 1.4 MB):
+
+1. GET /activity on directus_collections / directus_fields / directus_relations
+   with id > the cursor saved in the sidecar state file (one request)
+2. Nothing new -> done; the stored snapshot is left untouched
+3. Otherwise only the touched collections are refetched
+   (GET /collections/{c}, /fields/{c}, /relations/{c}) and merged in place;
+   per-collection content hashes tell which ones really changed
+4. Anything that cannot be attributed to a collection (activity disabled or
+   forbidden, no previous state, a delete without revision data) -> full download
+
+Full downloads are streamed: response chunks go straight to disk while the
+SHA256 and the size are computed in the same pass, so the snapshot is never
+re-serialized or re-read for hashing (the file holds the server's bytes
+verbatim). It is parsed exactly once, for the structural verification
+(snapshot_verify.py rules: required collections/fields, pages_blocks M2A).
+
+The sidecar state (directus/snapshot.state.json) holds the activity cursor and
+per-collection hashes; it describes one server, so it is not committed.
+
+Usage:
+    python3 scripts/directus/fetch_snapshot.py
+    python3 scripts/directus/fetch_snapshot.py --incremental
+    python3 scripts/directus/fetch_snapshot.py --incremental --output directus/snapshot-full.json
+    python3 scripts/directus/fetch_snapshot.py --rules my_rules.json --strict
+"""
+
 import os
 import json
-import urllib.request
-import urllib.error
-import subprocess
-import ssl
 import sys
 import hashlib
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from directus_auth import DirectusAuth
+from directus_client import get_client
+from snapshot_verify import RULES_PATH, load_rules, report, verify
 
 API_URL = os.environ.get("DIRECTUS_URL")
 if not API_URL:
     print("[ERROR] Missing DIRECTUS_URL environment variable"); sys.exit(1)
 OUTPUT_FILE = "directus/snapshot.json"
 
+CHUNK_SIZE = 64 * 1024
+
+SCHEMA_COLLECTIONS = ("directus_collections", "directus_fields", "directus_relations")
+MAX_WORKERS = 8
+
+# Keys /schema/snapshot keeps (Directus sanitizes rows the same way)
+FIELD_SCHEMA_KEYS = (
+    "name", "table", "data_type", "default_value", "max_length", "numeric_precision",
+    "numeric_scale", "is_nullable", "is_unique", "is_indexed", "is_primary_key", "is_generated",
+    "generation_expression", "has_auto_increment", "foreign_key_table", "foreign_key_column",
+)
+RELATION_SCHEMA_KEYS = (
+    "table", "column", "foreign_key_table", "foreign_key_column", "constraint_name",
+    "on_update", "on_delete",
+)
+
 def get_access_token_via_login():
-    def fetch_secret(name):
-        return subprocess.check_output(
-             ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-             text=True
-         ).strip()
-    
-    # Try fetching token secret first? No, explicit instruction was "Prefer token... If needed login". 
-    # But we know token secret is stale. Let's just go straight to login for reliability.
+    # Cached across scripts; GSM is only queried when no valid/refreshable token exists
     print("Authenticating...")
+    auth = DirectusAuth(API_URL, email_secrets=("DIRECTUS_ADMIN_EMAIL_test",),
+                        password_secrets=("DIRECTUS_ADMIN_PASSWORD_test",))
+    return auth.token()
+
+def stream_snapshot(token, output_file):
+    """
+    Stream GET /schema/snapshot to `output_file` (atomic replace) and return
+    (size, sha256), or None on failure. One pass, O(chunk) memory.
+    """
+    tmp_path = f"{output_file}.tmp"
+    digest = hashlib.sha256()
+    size = 0
     try:
-        email = os.environ.get("DIRECTUS_ADMIN_EMAIL") or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-        password = os.environ.get("DIRECTUS_ADMIN_PASSWORD") or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
+        with get_client().stream("GET", f"{API_URL}/schema/snapshot", token=token) as response:
+            if response.status >= 300:
+                body = response.read().decode("utf-8", errors="replace")
+                print(f"Error fetching snapshot: HTTP {response.status} - {body}")
+                return None
+            with open(tmp_path, "wb") as f:
+                while True:
+                    chunk = response.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    f.write(chunk)
+                    digest.update(chunk)
+                    size += len(chunk)
     except Exception as e:
-        print(f"Error fetching secrets: {e}")
+        print(f"Error fetching snapshot: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
         return None
-    
-    url = f"{API_URL}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
+    os.replace(tmp_path, output_file)
+    return size, digest.hexdigest()
+
+def state_path(output_file):
+    return f"{os.path.splitext(output_file)[0]}.state.json"
+
+def load_json_file(path):
     try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            resp_data = json.load(response)
-            return resp_data["data"]["access_token"]
-    except Exception as e:
-        print(f"Error logging in: {e}")
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
         return None
 
-def fetch_snapshot(token):
-    url = f"{API_URL}/schema/snapshot"
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"Bearer {token}")
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            return json.load(response)
-    except Exception as e:
-        print(f"Error fetching snapshot: {e}")
+def file_digest(path):
+    """(size, sha256) of a file, read in chunks."""
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            digest.update(chunk)
+            size += len(chunk)
+    return size, digest.hexdigest()
+
+def save_json_file(path, data):
+    """Atomic write; returns (size, sha256) of the bytes written (no re-read)."""
+    raw = json.dumps(data, indent=2).encode("utf-8")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+    return len(raw), hashlib.sha256(raw).hexdigest()
+
+# ----------------------------------------------------------------------
+# Activity cursor
+# ----------------------------------------------------------------------
+
+def activity_url(query):
+    schema_filter = ",".join(SCHEMA_COLLECTIONS)
+    return f"{API_URL}/activity?filter[collection][_in]={schema_filter}&{query}"
+
+def fetch_activity_cursor(token):
+    """Highest schema activity id (0 if none), or None if activity is unavailable."""
+    res = get_client().request("GET", activity_url("sort=-id&limit=1&fields=id"), token=token)
+    if "error" in res:
+        return None
+    rows = res.get("data") or []
+    return rows[0]["id"] if rows else 0
+
+def fetch_activity_since(token, cursor):
+    query = f"filter[id][_gt]={cursor}&sort=id&limit=-1&fields=id,action,collection,item,revisions.data"
+    res = get_client().request("GET", activity_url(query), token=token)
+    if "error" in res:
+        print(f"[WARN] Activity unavailable: HTTP {res['error']} - {res.get('message')}")
+        return None
+    return res.get("data") or []
+
+def affected_collections(activity):
+    """Collections touched by schema activity, or None if some row cannot be attributed."""
+    affected = set()
+    for row in activity:
+        if row.get("collection") == "directus_collections":
+            affected.add(row.get("item"))
+            continue
+        found = False
+        for revision in row.get("revisions") or []:
+            data = revision.get("data") if isinstance(revision, dict) else None
+            if not isinstance(data, dict):
+                continue
+            for key in ("collection", "many_collection"):
+                if data.get(key):
+                    affected.add(data[key])
+                    found = True
+        if not found:
+            return None
+    return affected
+
+# ----------------------------------------------------------------------
+# Per-collection refetch + merge
+# ----------------------------------------------------------------------
+
+def sanitize_collection(row):
+    meta = row.get("meta")
+    if isinstance(meta, dict):
+        meta = {k: v for k, v in meta.items() if k != "id"}
+    return {"collection": row["collection"], "meta": meta, "schema": {"name": row["collection"]} if row.get("schema") else None}
+
+def sanitize_field(row):
+    out = {"collection": row["collection"], "field": row["field"], "type": row.get("type")}
+    meta = row.get("meta")
+    out["meta"] = {k: v for k, v in meta.items() if k != "id"} if isinstance(meta, dict) else meta
+    if row.get("schema"):
+        out["schema"] = {k: row["schema"].get(k) for k in FIELD_SCHEMA_KEYS}
+    return out
+
+def sanitize_relation(row):
+    meta = row.get("meta")
+    return {
+        "collection": row["collection"],
+        "field": row["field"],
+        "related_collection": row.get("related_collection"),
+        "meta": {k: v for k, v in meta.items() if k != "id"} if isinstance(meta, dict) else meta,
+        "schema": {k: row["schema"].get(k) for k in RELATION_SCHEMA_KEYS} if row.get("schema") else None,
+    }
+
+def fetch_collection_parts(token, collection):
+    """(collection_row or None if gone, fields, relations) for one collection."""
+    client = get_client()
+    res = client.request("GET", f"{API_URL}/collections/{collection}", token=token)
+    if "error" in res:
+        if res["error"] in (403, 404):
+            return None, [], []
+        raise RuntimeError(f"GET /collections/{collection}: HTTP {res['error']}")
+    row = res.get("data")
+    parts = [row]
+    for endpoint in ("fields", "relations"):
+        part = client.request("GET", f"{API_URL}/{endpoint}/{collection}", token=token)
+        if "error" in part:
+            raise RuntimeError(f"GET /{endpoint}/{collection}: HTTP {part['error']}")
+        parts.append(part.get("data") or [])
+    return tuple(parts)
+
+def collection_hashes(snapshot):
+    """{collection: sha256 of its collection row + fields + relations}."""
+    grouped = {}
+    for section in ("collections", "fields", "relations"):
+        for row in snapshot.get(section, []):
+            grouped.setdefault(row.get("collection"), {}).setdefault(section, []).append(row)
+    hashes = {}
+    for name, parts in grouped.items():
+        canonical = json.dumps(parts, sort_keys=True, separators=(",", ":"))
+        hashes[name] = hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    return hashes
+
+def merge_rows(rows, replacements):
+    """Replace the rows of every collection in `replacements`, keeping positions stable."""
+    out = []
+    emitted = set()
+    for row in rows:
+        name = row.get("collection")
+        if name not in replacements:
+            out.append(row)
+        elif name not in emitted:
+            out.extend(replacements[name])
+            emitted.add(name)
+    for name, new_rows in replacements.items():
+        if name not in emitted:
+            out.extend(new_rows)
+    return out
+
+def refresh_incremental(token, stored, state):
+    """
+    Update `stored` (snapshot body, no envelope) in place.
+    Returns (changed_collections, new_cursor), or None to request a full download.
+    """
+    cursor = state.get("activity_cursor")
+    if cursor is None:
+        print("[INFO] No activity cursor in state -> full download")
+        return None
+
+    activity = fetch_activity_since(token, cursor)
+    if activity is None:
         return None
+    if not activity:
+        print(f"[OK] No schema changes since activity #{cursor}")
+        return [], cursor
+
+    new_cursor = max(row["id"] for row in activity)
+    affected = affected_collections(activity)
+    if affected is None:
+        print("[INFO] Schema activity without collection info -> full download")
+        return None
+    print(f"Schema activity: {len(activity)} events touching {len(affected)} collection(s): {', '.join(sorted(affected))}")
+
+    names = sorted(affected)
+    with ThreadPoolExecutor(max_workers=max(1, min(MAX_WORKERS, len(names)))) as pool:
+        results = dict(zip(names, pool.map(lambda name: fetch_collection_parts(token, name), names)))
+
+    replacements = {"collections": {}, "fields": {}, "relations": {}}
+    for name, (row, fields, relations) in results.items():
+        replacements["collections"][name] = [sanitize_collection(row)] if row else []
+        replacements["fields"][name] = [sanitize_field(f) for f in fields] if row else []
+        replacements["relations"][name] = [sanitize_relation(r) for r in relations] if row else []
+
+    old_hashes = state.get("collections") or collection_hashes(stored)
+    for section in ("collections", "fields", "relations"):
+        stored[section] = merge_rows(stored.get(section, []), replacements[section])
+    stored["collections"].sort(key=lambda row: row.get("collection") or "")
+
+    new_hashes = collection_hashes(stored)
+    changed = [name for name in names if old_hashes.get(name) != new_hashes.get(name)]
+    return changed, new_cursor
+
+# ----------------------------------------------------------------------
+# Verification
+# ----------------------------------------------------------------------
+
+def verify_snapshot(snapshot, size, sha, rules_path=RULES_PATH, strict=False):
+    print("Verifying structure...")
+    rules = load_rules(rules_path)
+    errors, warnings = verify(snapshot, rules, strict=strict)
+    if not report(errors, warnings, rules):
+        sys.exit(1)
+
+    # Stats (computed while writing)
+    print(f"File Size: {size} bytes")
+    print(f"SHA256: {sha}")
 
 def main():
+    parser = argparse.ArgumentParser(description="Fetch the Directus schema snapshot")
+    parser.add_argument("--output", default=OUTPUT_FILE, help="Snapshot file (default: %(default)s)")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Refresh the stored snapshot from schema activity since the last run")
+    parser.add_argument("--rules", default=RULES_PATH, help="Verification rules (default: %(default)s)")
+    parser.add_argument("--strict", action="store_true", help="Treat rule warnings as errors")
+    args = parser.parse_args()
+
     print("--- [Directus Schema Snapshot] ---")
-    
+
     # 1. Auth
     token = get_access_token_via_login()
     if not token:
         print("CRITICAL: Auth failed.")
         sys.exit(1)
-        
-    # 2. Fetch
-    print("Fetching snapshot...")
-    snapshot = fetch_snapshot(token)
-    if not snapshot:
-        print("CRITICAL: Failed to download snapshot.")
-        sys.exit(1)
-        
-    # 3. Save
-    with open(OUTPUT_FILE, "w") as f:
-        json.dump(snapshot, f, indent=2)
-    print(f"Snapshot saved to {OUTPUT_FILE}")
-    
+
+    state_file = state_path(args.output)
+    result = None  # (size, sha256, parsed snapshot body)
+
+    # 2a. Incremental refresh of the stored snapshot
+    if args.incremental:
+        stored = load_json_file(args.output)
+        state = load_json_file(state_file) or {}
+        if stored:
+            body = stored.get("data", stored)
+            refreshed = refresh_incremental(token, body, state)
+            if refreshed is not None:
+                changed, cursor = refreshed
+                if changed or cursor != state.get("activity_cursor"):
+                    size, sha = save_json_file(args.output, stored)
+                    save_json_file(state_file, {"activity_cursor": cursor, "collections": collection_hashes(body)})
+                else:
+                    size, sha = file_digest(args.output)
+                result = (size, sha, body)
+                print(f"Incremental refresh: {len(changed)} collection(s) changed"
+                      + (f" ({', '.join(changed)})" if changed else ""))
+        else:
+            print(f"[INFO] No stored snapshot at {args.output} -> full download")
+
+    # 2b. Full download, streamed to disk (cursor is read first so no change can slip between the two)
+    if result is None:
+        track_state = args.incremental or os.path.exists(state_file)
+        cursor = fetch_activity_cursor(token) if track_state else None
+        print("Fetching snapshot...")
+        streamed = stream_snapshot(token, args.output)
+        if not streamed:
+            print("CRITICAL: Failed to download snapshot.")
+            sys.exit(1)
+        print(f"Snapshot saved to {args.output}")
+
+        # 3. Parse once: verification + state for the next --incremental run
+        snapshot = load_json_file(args.output) or {}
+        body = snapshot.get("data", snapshot)
+        result = streamed + (body,)
+        if track_state:
+            state = {"collections": collection_hashes(body)}
+            if cursor is not None:  # activity not readable: next --incremental does a full download
+                state["activity_cursor"] = cursor
+            save_json_file(state_file, state)
+
     # 4. Verify
-    print("Verifying content...")
-    
-    # It's a snapshot, structure is usually { "version": ..., "collections": [...], "fields": [...], ... }
-    # Let's check for key collections in the list of collections or fields
-    
-    content_str = json.dumps(snapshot)
-    required_keys = ["pages", "navigation", "pages_blocks", "block_hero"]
-    
-    missing = []
-    for key in required_keys:
-        if key not in content_str:
-            missing.append(key)
-            
-    if missing:
-        print(f"[FAIL] Sanity check failed. Missing keys in snapshot: {missing}")
-        sys.exit(1)
-    else:
-        print(f"[PASS] Sanity check passed. Found: {required_keys}")
-        
-    # Stats
-    size = os.path.getsize(OUTPUT_FILE)
-    with open(OUTPUT_FILE, "rb") as f:
-        sha = hashlib.sha256(f.read()).hexdigest()
-        
-    print(f"File Size: {size} bytes")
-    print(f"SHA256: {sha}")
+    size, sha, body = result
+    verify_snapshot(body, size, sha, rules_path=args.rules, strict=args.strict)
 
 if __name__ == "__main__":
     main()
@@ -11,6 +11,25 @@ HARDENING (v2):
 - Handles transient 503/504 errors during Directus boot
 - Strict exit codes for start.sh "Death on Error" protocol
 
+SMOKE ASSET:
+- Ghost assets are re-uploaded from scripts/directus/assets/smoke-test.png
+  (streamed multipart POST /files, asset_upload.py) instead of /files/import
+  of a remote URL, so boot does not depend on an external host
+
+RECONCILE (default):
+- One GET each for policies and permissions plus the shared collection index
+  (collection_index.py), then the desired-vs-actual diff is computed in memory
+- Missing grants go out as ONE array POST /permissions, stale grants as ONE
+  batch PATCH /permissions ({keys, data}) - round trips stay constant no matter
+  how many collections are listed in PUBLIC_READ_COLLECTIONS
+- Per-phase timings are printed on every boot
+- Use --sequential for the old one-write-per-collection path
+
+VERIFY:
+- Every PUBLIC_READ_COLLECTIONS entry plus the smoke asset is probed
+  anonymously and concurrently (public_probe.py) under one VERIFY_DEADLINE;
+  status, bytes and latency are printed per endpoint
+
 CRITICAL: This MUST run AFTER Directus is healthy (start.sh handles this)
 
 Supports both:
@@ -19,13 +38,16 @@ Supports both:
 """
 
 import os
-import json
-import urllib.request
-import urllib.error
-import subprocess
-import ssl
+import argparse
 import sys
 import time
+from contextlib import contextmanager
+
+from asset_upload import ASSETS_DIR, checksum_tag, upload_file
+from collection_index import CollectionIndex
+from directus_auth import DirectusAuth
+from directus_client import DirectusClient
+from public_probe import asset_target, collection_targets, print_report, probe
 
 # Retry configuration
 MAX_RETRIES = 5
@@ -79,8 +101,11 @@ PUBLIC_READ_COLLECTIONS = [
 SMOKE_ASSET_ID = os.environ.get("SMOKE_ASSET_ID", "")
 if not SMOKE_ASSET_ID:
     print("[WARN] SMOKE_ASSET_ID not set — smoke asset permission will be skipped")
-# Use 600x400 for visibility in smoke tests (not 1x1 which may cause issues)
-SMOKE_ASSET_URL = "https://placehold.co/600x400.png"
+# Bundled 600x400 PNG (not 1x1 which may cause issues), uploaded from disk: no internet fetch at boot
+SMOKE_ASSET_PATH = os.path.join(ASSETS_DIR, "smoke-test.png")
+
+# Global deadline for the concurrent public-access verification (seconds)
+VERIFY_DEADLINE = float(os.environ.get("VERIFY_DEADLINE", "10"))
 
 def get_api_url():
     url = os.environ.get("DIRECTUS_URL") or os.environ.get("NUXT_PUBLIC_DIRECTUS_URL")
@@ -91,131 +116,48 @@ def get_api_url():
         sys.exit(1)
     return url.rstrip("/")
 
-def get_ssl_context():
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    return ctx
+# One pooled keep-alive client for every call in this run (see directus_client.py)
+CLIENT = DirectusClient(retries=MAX_RETRIES, backoff=INITIAL_BACKOFF, retry_statuses=RETRYABLE_ERRORS)
 
-def fetch_secret(name):
-    try:
-        return subprocess.check_output(
-            ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-            text=True,
-        ).strip()
-    except Exception:
-        return None
+class PhaseTimer:
+    """Collects wall-clock timings per named phase for the boot summary."""
+
+    def __init__(self):
+        self.phases = []
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases.append((name, time.perf_counter() - start))
+
+    def report(self):
+        print("\n--- [Phase Timings] ---")
+        total = 0.0
+        for name, elapsed in self.phases:
+            total += elapsed
+            print(f"  {name:<28} {elapsed * 1000:9.1f} ms")
+        print(f"  {'TOTAL':<28} {total * 1000:9.1f} ms")
 
 def authenticate():
     """
     Authenticate as admin and return access token.
-    Uses retry logic with exponential backoff for transient errors.
+    Reuses a cached/refreshable token when possible (see directus_auth.py);
+    login requests use retry logic with exponential backoff for transient errors.
     """
-    api_url = get_api_url()
-
-    email = os.environ.get("DIRECTUS_ADMIN_EMAIL")
-    password = os.environ.get("DIRECTUS_ADMIN_PASSWORD")
-
-    if not email:
-        email = fetch_secret("DIRECTUS_ADMIN_EMAIL") or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-    if not password:
-        password = fetch_secret("DIRECTUS_ADMIN_PASSWORD") or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
-
-    if not email or not password:
-        print("[ERROR] Missing admin credentials")
-        return None
-
-    url = f"{api_url}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-
-    # Retry logic with exponential backoff
-    for attempt in range(1, MAX_RETRIES + 1):
-        req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-        try:
-            with urllib.request.urlopen(req, context=get_ssl_context(), timeout=30) as response:
-                resp_data = json.load(response)
-                if attempt > 1:
-                    print(f"  [OK] Authentication succeeded on attempt {attempt}")
-                return resp_data["data"]["access_token"]
-        except urllib.error.HTTPError as e:
-            if e.code in RETRYABLE_ERRORS and attempt < MAX_RETRIES:
-                backoff = INITIAL_BACKOFF * (2 ** (attempt - 1))
-                print(f"  [RETRY] Auth failed ({e.code}), attempt {attempt}/{MAX_RETRIES}. Waiting {backoff}s...")
-                time.sleep(backoff)
-                continue
-            print(f"[ERROR] Authentication failed: HTTP {e.code}")
-            return None
-        except urllib.error.URLError as e:
-            if attempt < MAX_RETRIES:
-                backoff = INITIAL_BACKOFF * (2 ** (attempt - 1))
-                print(f"  [RETRY] Connection error, attempt {attempt}/{MAX_RETRIES}. Waiting {backoff}s...")
-                time.sleep(backoff)
-                continue
-            print(f"[ERROR] Authentication failed: {e}")
-            return None
-        except Exception as e:
-            print(f"[ERROR] Authentication failed: {e}")
-            return None
-
-    print("[ERROR] Authentication failed after all retries")
-    return None
+    token = DirectusAuth(get_api_url(), client=CLIENT).token()
+    if not token:
+        print("[ERROR] Authentication failed")
+    return token
 
 def make_request(url, method="GET", data=None, token=None, retry=True):
     """
-    Make HTTP request with optional auth.
+    Make HTTP request with optional auth over the pooled client.
     Uses retry logic for transient server errors (5xx).
     """
-    headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    if data:
-        headers["Content-Type"] = "application/json"
-
-    max_attempts = MAX_RETRIES if retry else 1
-
-    for attempt in range(1, max_attempts + 1):
-        req = urllib.request.Request(url, method=method, headers=headers)
-        if data:
-            req.data = json.dumps(data).encode("utf-8")
-
-        try:
-            with urllib.request.urlopen(req, context=get_ssl_context(), timeout=30) as response:
-                if response.status == 204:
-                    return {"success": True}
-                content_type = response.getheader("Content-Type", "")
-                if "application/json" in content_type:
-                    return json.load(response)
-                return {"success": True}
-        except urllib.error.HTTPError as e:
-            # Retry on transient server errors
-            if e.code in RETRYABLE_ERRORS and attempt < max_attempts:
-                backoff = INITIAL_BACKOFF * (2 ** (attempt - 1))
-                print(f"  [RETRY] Request failed ({e.code}), attempt {attempt}/{max_attempts}. Waiting {backoff}s...")
-                time.sleep(backoff)
-                continue
-            try:
-                err_body = e.read().decode()
-                return {"error": e.code, "message": err_body}
-            except:
-                return {"error": e.code, "message": str(e)}
-        except urllib.error.URLError as e:
-            # Retry on connection errors
-            if attempt < max_attempts:
-                backoff = INITIAL_BACKOFF * (2 ** (attempt - 1))
-                print(f"  [RETRY] Connection error, attempt {attempt}/{max_attempts}. Waiting {backoff}s...")
-                time.sleep(backoff)
-                continue
-            return {"error": 500, "message": str(e)}
-        except Exception as e:
-            return {"error": 500, "message": str(e)}
-
-    return {"error": 500, "message": "Max retries exceeded"}
-
-def check_collection_exists(token, collection):
-    """Check if a collection exists in Directus."""
-    api_url = get_api_url()
-    res = make_request(f"{api_url}/collections/{collection}", token=token)
-    return "error" not in res
+    return CLIENT.request(method, url, data=data, token=token, retry=retry)
 
 def get_public_policy_id(token):
     """
@@ -298,40 +240,14 @@ def update_permission(token, perm_id, collection):
     res = make_request(f"{api_url}/permissions/{perm_id}", method="PATCH", data=payload, token=token)
     return "error" not in res
 
-def verify_public_access(collection):
-    """Verify anonymous access to a collection."""
-    api_url = get_api_url()
-    url = f"{api_url}/items/{collection}?limit=1"
-
-    req = urllib.request.Request(url)
-    # NO auth header - testing anonymous access
-
-    try:
-        with urllib.request.urlopen(req, context=get_ssl_context()) as response:
-            return response.getcode() == 200
-    except urllib.error.HTTPError:
-        return False
-    except Exception:
-        return False
-
 def verify_asset_access(asset_id):
     """
     Verify anonymous access to an asset (HEAD request).
     Returns True if asset is publicly accessible.
     """
     api_url = get_api_url()
-    url = f"{api_url}/assets/{asset_id}"
-
-    req = urllib.request.Request(url, method="HEAD")
-    req.add_header("User-Agent", "ops-smoke-fix/1.0")
-
-    try:
-        with urllib.request.urlopen(req, context=get_ssl_context()) as response:
-            return response.getcode() == 200
-    except urllib.error.HTTPError as e:
-        return e.code == 200
-    except Exception:
-        return False
+    headers = {"User-Agent": "ops-smoke-fix/1.0"}
+    return CLIENT.status("HEAD", f"{api_url}/assets/{asset_id}", headers=headers) == 200
 
 def ensure_smoke_asset(token):
     """
@@ -382,22 +298,20 @@ def ensure_smoke_asset(token):
         if "error" in del_res and del_res.get("error") != 204:
             print(f"  [WARN] Could not delete stale record: {del_res}")
 
-    # Step 3: Re-import asset
-    print("  [ACTION] Re-importing smoke asset...")
+    # Step 3: Re-upload the bundled asset (streamed multipart, fixed ID)
+    print("  [ACTION] Uploading smoke asset...")
 
-    import_payload = {
-        "url": SMOKE_ASSET_URL,
-        "data": {
-            "id": SMOKE_ASSET_ID,
-            "title": "Smoke Test Asset",
-            "access": "public",
-        },
+    upload_data = {
+        "id": SMOKE_ASSET_ID,
+        "title": "Smoke Test Asset",
+        "access": "public",
+        "description": checksum_tag(SMOKE_ASSET_PATH),
     }
 
-    res = make_request(f"{api_url}/files/import", method="POST", data=import_payload, token=token)
+    res = upload_file(api_url, token, SMOKE_ASSET_PATH, data=upload_data, client=CLIENT)
 
     if "error" in res:
-        print(f"  [ERROR] Failed to import asset: {res}")
+        print(f"  [ERROR] Failed to upload asset: {res}")
         return False
 
     # Ensure access is public (defensive)
@@ -410,55 +324,156 @@ def ensure_smoke_asset(token):
     if "error" in patch_res:
         print(f"  [WARN] Could not enforce public access: {patch_res}")
 
-    print("  [SUCCESS] Smoke asset re-imported")
+    print("  [SUCCESS] Smoke asset re-uploaded")
     return True
 
-def fix_permissions():
-    """Main function to fix public permissions."""
+def load_collection_index(token):
+    """
+    Build the shared collection index (GET /collections + GET /fields).
+    Returns None if the listing fails (caller falls back to trusting the list).
+    """
+    try:
+        return CollectionIndex.from_api(get_api_url(), token, client=CLIENT)
+    except Exception as e:
+        print(f"  [WARN] Could not build collection index: {e}")
+        return None
+
+def has_full_read_access(perm):
+    """True if an existing READ permission already grants every field unfiltered."""
+    fields = perm.get("fields") or []
+    return "*" in fields and not perm.get("permissions") and not perm.get("validation")
+
+def build_permission_payload(collection, policy_id=None):
+    """Desired public READ permission row for one collection."""
+    if policy_id:
+        return {
+            "policy": policy_id,
+            "collection": collection,
+            "action": "read",
+            "fields": ["*"],
+            "permissions": {},
+            "validation": {},
+        }
+    return {
+        "role": None,  # Public
+        "collection": collection,
+        "action": "read",
+        "fields": ["*"],
+        "permissions": {},
+    }
+
+def plan_reconciliation(existing_read, index):
+    """
+    Diff desired public READ state against the server, entirely in memory.
+
+    existing_read: {collection: permission_row} for current public READ grants
+    index: CollectionIndex of the live server, or None if unknown
+
+    Only directus_files is force-fixed when restricted (403 fix); other
+    collections keep whatever filters an admin configured on purpose.
+    """
+    plan = {"create": [], "patch": [], "skip": [], "missing": []}
+
+    for collection in PUBLIC_READ_COLLECTIONS:
+        if index is not None and collection not in index:
+            plan["missing"].append(collection)
+            continue
+
+        perm = existing_read.get(collection)
+        if perm is None:
+            plan["create"].append(collection)
+        elif collection == "directus_files" and not has_full_read_access(perm):
+            plan["patch"].append((collection, perm.get("id")))
+        else:
+            plan["skip"].append(collection)
+
+    return plan
+
+def bulk_create_permissions(token, collections, policy_id=None):
+    """
+    Create all missing grants with ONE array POST /permissions.
+    Falls back to per-collection POSTs if the server rejects the batch.
+    Returns the list of collections that were granted.
+    """
+    if not collections:
+        return []
+
     api_url = get_api_url()
+    payload = [build_permission_payload(c, policy_id) for c in collections]
+    res = make_request(f"{api_url}/permissions", method="POST", data=payload, token=token)
 
-    print("=" * 80)
-    print("FIX PUBLIC PERMISSIONS - Cloud Run Persistence Hardening")
-    print("=" * 80)
-    print(f"\nTarget: {api_url}")
-    print(f"Collections: {len(PUBLIC_READ_COLLECTIONS)}")
-    print()
+    if "error" not in res:
+        return list(collections)
 
-    # Step 1: Authenticate
-    print("--- [Step 1: Authentication] ---")
-    token = authenticate()
-    if not token:
-        print("[FATAL] Could not authenticate")
-        sys.exit(1)
-    print("  [OK] Authenticated as Admin")
+    print(f"  [WARN] Batch create rejected ({res.get('error')}). Falling back to per-collection POST...")
+    granted = []
+    for collection in collections:
+        if policy_id:
+            success = grant_permission_v10(token, policy_id, collection)
+        else:
+            success = grant_permission_legacy(token, collection)
+        if success:
+            granted.append(collection)
+        else:
+            print(f"  [FAIL] {collection} - could not create permission")
+    return granted
 
-    # Step 2: Detect Directus version (v10+ uses policies)
-    print("\n--- [Step 2: Detect Permission System] ---")
-    policy_id = get_public_policy_id(token)
+def bulk_update_permissions(token, perm_ids):
+    """
+    Clear restrictions on existing grants with ONE batch PATCH /permissions.
+    Only mutable fields are sent (fields, permissions, validation).
+    """
+    if not perm_ids:
+        return True
 
-    if policy_id:
-        print(f"  [DETECTED] Directus v10+ (Policy ID: {policy_id})")
-        use_v10 = True
-    else:
-        print("  [DETECTED] Legacy Directus (role-based)")
-        use_v10 = False
+    api_url = get_api_url()
+    payload = {
+        "keys": perm_ids,
+        "data": {
+            "fields": ["*"],
+            "permissions": {},  # Clear any restrictive filters
+            "validation": {},   # Clear any validation rules
+        },
+    }
+    res = make_request(f"{api_url}/permissions", method="PATCH", data=payload, token=token)
+    if "error" in res:
+        print(f"  [ERROR] Batch update failed: {res.get('message')}")
+        return False
+    return True
 
-    # Step 3: Get existing permissions
-    print("\n--- [Step 3: Fetch Existing Permissions] ---")
-    existing = get_existing_permissions(token, policy_id if use_v10 else None)
+def reconcile_permissions(token, existing_read, policy_id, index, timer):
+    """Reconcile mode: constant number of round trips regardless of list size."""
+    with timer.phase("diff"):
+        plan = plan_reconciliation(existing_read, index)
 
-    # Build lookup: collection -> permission_id
-    existing_perms = {}
-    for perm in existing:
-        col = perm.get("collection")
-        action = perm.get("action")
-        if action == "read":
-            existing_perms[col] = perm.get("id")
+    for collection in plan["missing"]:
+        print(f"  [SKIP] {collection} - collection does not exist")
+    for collection in plan["skip"]:
+        print(f"  [SKIP] {collection} - already exists")
 
-    print(f"  Found {len(existing_perms)} existing public READ permissions")
+    with timer.phase("batch create"):
+        granted = bulk_create_permissions(token, plan["create"], policy_id)
+    for collection in granted:
+        print(f"  [CREATE] {collection} - granted READ access")
 
-    # Step 4: Grant/Update permissions
-    print("\n--- [Step 4: Grant Public READ Permissions] ---")
+    updated = 0
+    with timer.phase("batch update"):
+        patch_ids = [perm_id for _, perm_id in plan["patch"]]
+        if bulk_update_permissions(token, patch_ids):
+            updated = len(patch_ids)
+            for collection, _ in plan["patch"]:
+                print(f"  [FORCE-FIX] {collection} - updated with full public access")
+
+    return {
+        "created": len(granted),
+        "updated": updated,
+        "skipped": len(plan["skip"]),
+        "missing": len(plan["missing"]),
+    }
+
+def sequential_permissions(token, existing_read, policy_id, index):
+    """Sequential mode: one write per collection."""
+    api_url = get_api_url()
 
     created = 0
     updated = 0
@@ -466,15 +481,15 @@ def fix_permissions():
     missing = 0
 
     for collection in PUBLIC_READ_COLLECTIONS:
-        # Check if collection exists
-        if not check_collection_exists(token, collection):
+        # Check if collection exists (index lookup, no request)
+        if index is not None and collection not in index:
             print(f"  [SKIP] {collection} - collection does not exist")
             missing += 1
             continue
 
         # Check if permission already exists
-        if collection in existing_perms:
-            perm_id = existing_perms[collection]
+        if collection in existing_read:
+            perm_id = existing_read[collection].get("id")
 
             # For directus_files, forcefully update to ensure full access (no restrictions)
             # This fixes the persistent 403 issue by clearing any filter/validation rules
@@ -510,7 +525,7 @@ def fix_permissions():
             continue
 
         # Create new permission
-        if use_v10:
+        if policy_id:
             success = grant_permission_v10(token, policy_id, collection)
         else:
             success = grant_permission_legacy(token, collection)
@@ -521,35 +536,106 @@ def fix_permissions():
         else:
             print(f"  [FAIL] {collection} - could not create permission")
 
+    return {"created": created, "updated": updated, "skipped": skipped, "missing": missing}
+
+def fix_permissions(sequential=False):
+    """Main function to fix public permissions."""
+    api_url = get_api_url()
+    timer = PhaseTimer()
+
+    print("=" * 80)
+    print("FIX PUBLIC PERMISSIONS - Cloud Run Persistence Hardening")
+    print("=" * 80)
+    print(f"\nTarget: {api_url}")
+    print(f"Collections: {len(PUBLIC_READ_COLLECTIONS)}")
+    print(f"Mode: {'SEQUENTIAL' if sequential else 'RECONCILE'}")
+    print()
+
+    # Step 1: Authenticate
+    print("--- [Step 1: Authentication] ---")
+    with timer.phase("authenticate"):
+        token = authenticate()
+    if not token:
+        print("[FATAL] Could not authenticate")
+        sys.exit(1)
+    print("  [OK] Authenticated as Admin")
+
+    # Step 2: Detect Directus version (v10+ uses policies)
+    print("\n--- [Step 2: Detect Permission System] ---")
+    with timer.phase("detect policy"):
+        policy_id = get_public_policy_id(token)
+
+    if policy_id:
+        print(f"  [DETECTED] Directus v10+ (Policy ID: {policy_id})")
+    else:
+        print("  [DETECTED] Legacy Directus (role-based)")
+
+    # Step 3: Get existing permissions
+    print("\n--- [Step 3: Fetch Existing Permissions] ---")
+    with timer.phase("fetch permissions"):
+        existing = get_existing_permissions(token, policy_id)
+
+    # Build lookup: collection -> permission row
+    existing_read = {}
+    for perm in existing:
+        if perm.get("action") == "read":
+            existing_read[perm.get("collection")] = perm
+
+    print(f"  Found {len(existing_read)} existing public READ permissions")
+
+    with timer.phase("collection index"):
+        index = load_collection_index(token)
+    if index is None:
+        print("  [WARN] Assuming all listed collections exist")
+    else:
+        print(f"  Live collections: {len(index)}")
+
+    # Step 4: Grant/Update permissions
+    print("\n--- [Step 4: Grant Public READ Permissions] ---")
+
+    if sequential:
+        with timer.phase("grant (sequential)"):
+            counts = sequential_permissions(token, existing_read, policy_id, index)
+    else:
+        counts = reconcile_permissions(token, existing_read, policy_id, index, timer)
+
     # Step 5: Handle Ghost Assets
-    ensure_smoke_asset(token)
+    with timer.phase("smoke asset"):
+        ensure_smoke_asset(token)
 
     # Step 6: Verify critical collections
     print("\n--- [Step 5: Verify Public Access] ---")
 
-    verify_collections = ["pages", "globals", "navigation"]
-    all_ok = True
-
-    for col in verify_collections:
-        if verify_public_access(col):
-            print(f"  [PASS] {col} - HTTP 200")
-        else:
-            print(f"  [FAIL] {col} - NOT accessible")
-            all_ok = False
-
-    # Verify asset access with retry (permissions may take time to propagate)
-    asset_verified = False
-    max_asset_attempts = 3
-    for attempt in range(1, max_asset_attempts + 1):
-        if verify_asset_access(SMOKE_ASSET_ID):
-            print(f"  [PASS] Asset {SMOKE_ASSET_ID[:8]}... - HTTP 200")
-            asset_verified = True
-            break
-        else:
-            if attempt < max_asset_attempts:
-                print(f"  [RETRY {attempt}/{max_asset_attempts}] Asset not accessible yet, waiting 3s for permission propagation...")
-                time.sleep(3)
-            else:
+    with timer.phase("verify"):
+        # Every public collection + the smoke asset at once: as slow as the slowest probe
+        verify_collections = ["pages", "globals", "navigation"]
+        api_url = get_api_url()
+        targets = collection_targets(PUBLIC_READ_COLLECTIONS)
+        asset_name = None
+        if SMOKE_ASSET_ID:
+            asset_name, asset_path = asset_target(SMOKE_ASSET_ID)
+            targets.append((asset_name, asset_path))
+        report = probe(api_url, targets, deadline=VERIFY_DEADLINE)
+        print_report(report)
+
+        all_ok = True
+        for col in verify_collections:
+            if not report["endpoints"][col]["ok"]:
+                print(f"  [FAIL] {col} - NOT accessible (critical)")
+                all_ok = False
+
+        # Verify asset access with retry (permissions may take time to propagate)
+        asset_verified = asset_name is None or report["endpoints"][asset_name]["ok"]
+        max_asset_attempts = 3
+        for attempt in range(2, max_asset_attempts + 1):
+            if asset_verified:
+                break
+            print(f"  [RETRY {attempt - 1}/{max_asset_attempts}] Asset not accessible yet, waiting 3s for permission propagation...")
+            time.sleep(3)
+            asset_verified = probe(api_url, [(asset_name, asset_path)], deadline=VERIFY_DEADLINE)["endpoints"][asset_name]["ok"]
+            if asset_verified:
+                print(f"  [PASS] Asset {SMOKE_ASSET_ID[:8]}... - HTTP 200")
+            elif attempt == max_asset_attempts:
                 print(f"  [FAIL] Asset {SMOKE_ASSET_ID[:8]}... - NOT accessible after {max_asset_attempts} attempts")
 
     if not asset_verified:
@@ -562,10 +648,15 @@ def fix_permissions():
     print("\n" + "=" * 80)
     print("SUMMARY")
     print("=" * 80)
-    print(f"  Created: {created}")
-    print(f"  Updated: {updated}")
-    print(f"  Skipped: {skipped} (already exist)")
-    print(f"  Missing: {missing} (collection not found)")
+    print(f"  Created: {counts['created']}")
+    print(f"  Updated: {counts['updated']}")
+    print(f"  Skipped: {counts['skipped']} (already exist)")
+    print(f"  Missing: {counts['missing']} (collection not found)")
+
+    timer.report()
+    stats = CLIENT.stats()
+    print(f"  HTTP: {stats['requests']} requests, {stats['connections_opened']} connections opened, "
+          f"{stats['connections_reused']} reused")
     print()
 
     # CRITICAL: Always return success if permission operations completed
@@ -575,4 +666,11 @@ def fix_permissions():
     return 0
 
 if __name__ == "__main__":
-    sys.exit(fix_permissions())
+    parser = argparse.ArgumentParser(description="Grant Public READ access to essential collections")
+    parser.add_argument(
+        "--sequential",
+        action="store_true",
+        help="Use the legacy one-write-per-collection path instead of bulk reconcile",
+    )
+    args = parser.parse_args()
+    sys.exit(fix_permissions(sequential=args.sequential))
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+latency_histogram.py - HDR-style latency histogram shared by the load and probe tools
+
+Log-linear buckets over integer microseconds: constant relative precision
+across the whole range and memory bounded by the value range, not by the
+number of samples. Used by load_test.py (per-run histograms) and
+probe_monitor.py (rolling windows).
+
+Usage:
+    from latency_histogram import LatencyHistogram
+
+    hist = LatencyHistogram()
+    hist.record(1530)            # microseconds
+    hist.value_at(99)            # p99 in microseconds
+"""
+
+import math
+
+DISTRIBUTION_TICKS = (0, 25, 50, 75, 90, 95, 99, 99.5, 99.9, 100)
+
+
+class LatencyHistogram:
+    """
+    HDR-style log-linear histogram of integer microseconds.
+
+    Values below 2**SIGNIFICANT_BITS are exact; above, each power of two is
+    split into 2**(SIGNIFICANT_BITS-1) buckets, so any recorded value is off by
+    at most 1/2**(SIGNIFICANT_BITS-1) (~0.4%). Memory is bounded by the value
+    range, not the number of samples.
+    """
+
+    SIGNIFICANT_BITS = 9
+
+    def __init__(self):
+        self.counts = {}
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self.sum = 0
+
+    def _key(self, value):
+        shift = max(0, value.bit_length() - self.SIGNIFICANT_BITS)
+        return (shift, value >> shift)
+
+    @staticmethod
+    def _highest_equivalent(key):
+        shift, mantissa = key
+        return ((mantissa + 1) << shift) - 1
+
+    def record(self, value_us):
+        value = max(0, int(value_us))
+        key = self._key(value)
+        self.counts[key] = self.counts.get(key, 0) + 1
+        self.total += 1
+        self.sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        for key, count in other.counts.items():
+            self.counts[key] = self.counts.get(key, 0) + count
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def value_at(self, percentile):
+        """Highest equivalent value at `percentile` (0-100), in microseconds."""
+        if not self.total:
+            return None
+        if percentile >= 100:
+            return self.max
+        wanted = max(1, math.ceil(self.total * percentile / 100))
+        seen = 0
+        for key in sorted(self.counts):
+            seen += self.counts[key]
+            if seen >= wanted:
+                return min(self._highest_equivalent(key), self.max)
+        return self.max
+
+    def mean(self):
+        return self.sum / self.total if self.total else None
+
+    def distribution(self, ticks=DISTRIBUTION_TICKS):
+        """[(percentile, value)] at each tick; 0 is the minimum."""
+        return [(tick, self.value_at(tick) if tick else self.min) for tick in ticks]
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+load_test.py - Load generator for the public Directus read paths
+
+Measures how the public API behaves under load before a release:
+
+- Request mix: weighted scenarios (--mix pages=4,page_deep=3,...), covering
+  /items/pages, /items/navigation, /items/pages_blocks with deep M2A fields
+  and /assets/{id}; extra scenarios via --scenario name=/path
+- Open-loop arrivals (--rate R/s, constant or --arrival poisson): requests are
+  sent on schedule whether or not earlier ones finished, and latency is
+  measured from the SCHEDULED send time, so server stalls show up as queueing
+  instead of being hidden (no coordinated omission). --rate 0 = closed loop
+  (each worker sends back-to-back)
+- --concurrency workers share one keep-alive pool
+- --warmup seconds of traffic before measuring (results discarded)
+- Report: throughput, error rate, status counts and an HDR-style log-linear
+  latency histogram (~0.4% precision) per scenario and in total; --json for
+  machine-readable output
+- --local starts a stand-in server on 127.0.0.1 (configurable latency) so the
+  tool can be exercised and benchmarked offline
+
+Usage:
+    python3 scripts/directus/load_test.py --local --rate 500 --duration 10 --warmup 2
+    python3 scripts/directus/load_test.py --rate 50 --duration 60 --concurrency 32
+    python3 scripts/directus/load_test.py --rate 0 --concurrency 8 --mix pages=1,asset=1 --json
+
+Exit code: 0 when the error rate is within --max-error-rate, 1 otherwise, 2 error.
+Arrivals left without a response after the drain window ("unsent") count as
+errors in the total error rate.
+
+ENVIRONMENT:
+    DIRECTUS_URL     - Directus base URL (not needed with --local)
+    SMOKE_ASSET_ID   - Asset used by the "asset" scenario (or --asset)
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from asset_upload import ASSETS_DIR
+from directus_client import DirectusClient
+from latency_histogram import LatencyHistogram
+from seed_fixtures import DEFAULT_BLOCK_TYPES
+
+DEFAULT_MIX = "pages=4,page_deep=3,navigation=2,pages_blocks=2,asset=1"
+PERCENTILES = (50, 90, 99, 99.9)
+DRAIN_SECONDS = 10.0
+LOAD_HEADERS = {"User-Agent": "directus-load-test/1.0"}
+
+
+def m2a_fields(prefix):
+    return ",".join(f"{prefix}item:{block}.*" for block in DEFAULT_BLOCK_TYPES)
+
+
+SCENARIOS = {
+    "pages": "/items/pages?fields=id,title,permalink&filter[status][_eq]=published&limit=25",
+    "page_deep": ("/items/pages?filter[permalink][_eq]=/&fields=*,blocks.id,blocks.collection,blocks.sort,"
+                  + m2a_fields("blocks.")),
+    "navigation": "/items/navigation?filter[id][_eq]=main&fields=id,title,items.*",
+    "pages_blocks": "/items/pages_blocks?fields=id,collection,sort,pages_id," + m2a_fields("") + "&limit=25",
+    "asset": "/assets/{asset}",
+}
+
+
+def _ms(value_us):
+    return None if value_us is None else round(value_us / 1000, 3)
+
+
+# =============================================================================
+# LOCAL STAND-IN SERVER
+# =============================================================================
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Directus-shaped responses for the scenario paths, with injected latency."""
+
+    protocol_version = "HTTP/1.1"  # keep-alive, like Directus behind a proxy
+    disable_nagle_algorithm = True  # headers and body go out in separate writes
+    latency = 0.002
+    jitter = 0.001
+    asset = b""
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        time.sleep(max(0.0, random.gauss(self.latency, self.jitter)))
+        path = self.path.split("?", 1)[0]
+        if path.startswith("/assets/"):
+            return self._send(200, self.asset, "image/png")
+        if path.startswith("/items/"):
+            collection = path.split("/")[2]
+            rows = [{"id": f"{collection}-{n}", "title": f"{collection} {n}", "sort": n} for n in range(25)]
+            return self._send(200, json.dumps({"data": rows}).encode("utf-8"), "application/json")
+        return self._send(404, b'{"errors": [{"message": "Route not found"}]}', "application/json")
+
+    def _send(self, status, body, content_type):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def start_stand_in(latency_ms, jitter_ms):
+    """Start the stand-in server on a free local port; returns (server, base_url)."""
+    with open(os.path.join(ASSETS_DIR, "smoke-test.png"), "rb") as f:
+        asset = f.read()
+    handler = type("ConfiguredStandIn", (StandInHandler,), {
+        "latency": latency_ms / 1000, "jitter": jitter_ms / 1000, "asset": asset,
+    })
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+# =============================================================================
+# LOAD GENERATION
+# =============================================================================
+
+class ScenarioStats:
+    def __init__(self):
+        self.latency = LatencyHistogram()   # scheduled send -> response (includes queueing)
+        self.service = LatencyHistogram()   # actual send -> response
+        self.statuses = {}
+        self.errors = 0
+        self.bytes = 0
+
+    def record(self, status, size, latency_us, service_us):
+        self.latency.record(latency_us)
+        self.service.record(service_us)
+        self.statuses[str(status)] = self.statuses.get(str(status), 0) + 1
+        self.bytes += size
+        if not status or status >= 400:
+            self.errors += 1
+
+    def merge(self, other):
+        self.latency.merge(other.latency)
+        self.service.merge(other.service)
+        for status, count in other.statuses.items():
+            self.statuses[status] = self.statuses.get(status, 0) + count
+        self.errors += other.errors
+        self.bytes += other.bytes
+
+
+def parse_mix(text, scenarios):
+    mix = {}
+    for part in text.split(","):
+        if not part.strip():
+            continue
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in scenarios:
+            raise ValueError(f"Unknown scenario '{name}' (known: {', '.join(sorted(scenarios))})")
+        mix[name] = float(weight or 1)
+    if not mix or not any(mix.values()):
+        raise ValueError("Request mix is empty")
+    return mix
+
+
+def arrival_times(rate, duration, arrival, rng):
+    """Offsets (seconds from start) of open-loop arrivals."""
+    t = 0.0
+    while t < duration:
+        yield t
+        t += rng.expovariate(rate) if arrival == "poisson" else 1.0 / rate
+
+
+def run_load(api_url, paths, mix, rate, duration, warmup, concurrency, arrival="constant", seed=None):
+    """
+    Drive the mix against api_url. Returns {"stats": {scenario: ScenarioStats},
+    "measured_s", "scheduled", "sent", "unsent", "max_backlog"}; "unsent" counts
+    measured arrivals with no response DRAIN_SECONDS after the last one was
+    scheduled (still queued or still in flight).
+    """
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    client = DirectusClient(timeout=30, retries=1, pool_size=concurrency)
+    stats = {name: ScenarioStats() for name in names}
+    lock = threading.Lock()
+    counters = {"scheduled": 0, "sent": 0, "unsent": 0, "max_backlog": 0}
+    total = warmup + duration
+    start = time.perf_counter() + 0.05
+    measure_from = start + warmup
+    stop = threading.Event()
+
+    def execute(name, scheduled):
+        sent = time.perf_counter()
+        status, size = 0, 0
+        try:
+            with client.stream("GET", f"{api_url}{paths[name]}", headers=LOAD_HEADERS) as response:
+                size = len(response.read())
+                status = response.status
+        except Exception:
+            pass
+        done = time.perf_counter()
+        if scheduled >= measure_from:
+            with lock:
+                if stop.is_set():
+                    return
+                stats[name].record(status, size, (done - scheduled) * 1e6, (done - sent) * 1e6)
+                counters["sent"] += 1
+
+    if rate > 0:
+        jobs = queue.Queue()
+
+        def worker():
+            while True:
+                job = jobs.get()
+                if job is None or stop.is_set():
+                    return
+                execute(*job)
+
+        threads = [threading.Thread(target=worker, daemon=True) for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for offset in arrival_times(rate, total, arrival, rng):
+            scheduled = start + offset
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            jobs.put((rng.choices(names, weights)[0], scheduled))
+            if scheduled >= measure_from:
+                counters["scheduled"] += 1
+            counters["max_backlog"] = max(counters["max_backlog"], jobs.qsize())
+        for _ in threads:
+            jobs.put(None)
+        deadline = time.perf_counter() + DRAIN_SECONDS
+        for thread in threads:
+            thread.join(max(0.0, deadline - time.perf_counter()))
+        # Arrivals without a response after the drain window were never answered
+        with lock:
+            stop.set()
+            counters["unsent"] = counters["scheduled"] - counters["sent"]
+    else:
+        end = start + total
+
+        def closed_worker(worker_seed):
+            local_rng = random.Random(worker_seed)
+            while True:
+                now = time.perf_counter()
+                if now >= end:
+                    return
+                execute(local_rng.choices(names, weights)[0], max(now, start))
+
+        threads = [threading.Thread(target=closed_worker, args=(rng.random(),), daemon=True)
+                   for _ in range(concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+    client.close()
+    # Throughput is over the measured window; late completions of its arrivals still count
+    return dict(counters, stats=stats, measured_s=duration)
+
+
+# =============================================================================
+# REPORTING
+# =============================================================================
+
+def scenario_report(entry, measured_s):
+    count = entry.latency.total
+    report = {
+        "requests": count,
+        "throughput_rps": round(count / measured_s, 1),
+        "error_rate": round(entry.errors / count, 4) if count else 0.0,
+        "statuses": entry.statuses,
+        "bytes": entry.bytes,
+        "latency_ms": {f"p{p:g}": _ms(entry.latency.value_at(p)) for p in PERCENTILES},
+        "service_ms": {f"p{p:g}": _ms(entry.service.value_at(p)) for p in PERCENTILES},
+    }
+    report["latency_ms"].update(min=_ms(entry.latency.min), mean=_ms(entry.latency.mean()), max=_ms(entry.latency.max))
+    report["service_ms"]["max"] = _ms(entry.service.max)
+    return report
+
+
+def build_report(result, config):
+    total = ScenarioStats()
+    for entry in result["stats"].values():
+        total.merge(entry)
+    measured = result["measured_s"]
+    total_report = scenario_report(total, measured)
+    if result["unsent"]:
+        # Unanswered arrivals are failures, not just missing samples
+        total_report["error_rate"] = round(
+            (total.errors + result["unsent"]) / (total.latency.total + result["unsent"]), 4
+        )
+    report = {
+        "config": config,
+        "measured_s": round(measured, 3),
+        "unsent": result["unsent"],
+        "max_backlog": result["max_backlog"],
+        "total": total_report,
+        "scenarios": {name: scenario_report(entry, measured) for name, entry in result["stats"].items()},
+        "histogram": [
+            {"percentile": tick, "latency_ms": _ms(value)} for tick, value in total.latency.distribution()
+        ],
+    }
+    return report
+
+
+def print_report(report):
+    config = report["config"]
+    mode = f"open loop {config['rate']:g}/s ({config['arrival']})" if config["rate"] else "closed loop"
+    print(f"--- [Load Test] {config['api_url']} | {mode} | {config['concurrency']} workers | "
+          f"{config['duration']:g}s (+{config['warmup']:g}s warmup) ---")
+    header = f"{'scenario':<14}{'reqs':>8}{'rps':>9}{'err%':>7}" + "".join(f"{'p' + format(p, 'g'):>9}" for p in PERCENTILES)
+    print(header + f"{'max':>9}   (latency ms, from scheduled send)")
+    rows = list(report["scenarios"].items()) + [("TOTAL", report["total"])]
+    for name, entry in rows:
+        latency = entry["latency_ms"]
+        print(f"{name:<14}{entry['requests']:>8}{entry['throughput_rps']:>9.1f}{entry['error_rate'] * 100:>7.2f}"
+              + "".join(f"{latency[f'p{p:g}'] or 0:>9.2f}" for p in PERCENTILES) + f"{latency['max'] or 0:>9.2f}")
+
+    print("\nLatency distribution (total):")
+    for tick in report["histogram"]:
+        print(f"  {tick['percentile']:>7g}%  {tick['latency_ms'] or 0:>10.3f} ms")
+    statuses = ", ".join(f"{status}: {count}" for status, count in sorted(report["total"]["statuses"].items()))
+    print(f"\nStatuses: {statuses or '-'} | max backlog {report['max_backlog']} | unsent {report['unsent']}")
+    if report["max_backlog"] > config["concurrency"]:
+        print("[WARN] Arrivals queued behind busy workers: the target rate exceeds what the "
+              "server (or --concurrency) sustains; latency includes the queueing")
+    if report["unsent"]:
+        print(f"[WARN] {report['unsent']} arrival(s) got no response within {DRAIN_SECONDS:g}s of the last one "
+              "(counted as errors)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load generator for the public Directus read paths")
+    parser.add_argument("--rate", type=float, default=50, help="Arrivals per second; 0 = closed loop (default: %(default)s)")
+    parser.add_argument("--arrival", choices=("constant", "poisson"), default="constant",
+                        help="Open-loop arrival process (default: %(default)s)")
+    parser.add_argument("--duration", type=float, default=30, help="Measured seconds (default: %(default)s)")
+    parser.add_argument("--warmup", type=float, default=5, help="Unmeasured warmup seconds (default: %(default)s)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Worker threads (default: %(default)s)")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="scenario=weight,... (default: %(default)s)")
+    parser.add_argument("--scenario", action="append", default=[], metavar="NAME=PATH",
+                        help="Add or override a scenario path (repeatable)")
+    parser.add_argument("--asset", help="Asset id for the asset scenario (default: SMOKE_ASSET_ID)")
+    parser.add_argument("--seed", type=int, help="Random seed for the request mix / arrivals")
+    parser.add_argument("--max-error-rate", type=float, default=0.01,
+                        help="Exit 1 above this error rate (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--local", action="store_true", help="Run against a built-in local stand-in server")
+    parser.add_argument("--local-latency-ms", type=float, default=2.0, help="Stand-in mean latency (default: %(default)s)")
+    parser.add_argument("--local-jitter-ms", type=float, default=1.0, help="Stand-in latency stddev (default: %(default)s)")
+    args = parser.parse_args()
+
+    if args.rate < 0 or args.duration <= 0 or args.warmup < 0 or args.concurrency < 1:
+        parser.error("--rate/--warmup must be >= 0, --duration > 0 and --concurrency >= 1")
+
+    paths = dict(SCENARIOS)
+    for spec in args.scenario:
+        name, _, path = spec.partition("=")
+        if not name or not path.startswith("/"):
+            parser.error(f"--scenario expects NAME=/path, got {spec!r}")
+        paths[name.strip()] = path
+    mix = parse_mix(args.mix, paths)
+
+    server = None
+    if args.local:
+        server, api_url = start_stand_in(args.local_latency_ms, args.local_jitter_ms)
+        asset_id = args.asset or "stand-in"
+    else:
+        api_url = os.environ.get("DIRECTUS_URL")
+        if not api_url:
+            print("[ERROR] Missing DIRECTUS_URL environment variable (or use --local)")
+            return 2
+        asset_id = args.asset or os.environ.get("SMOKE_ASSET_ID")
+    if "asset" in mix:
+        if not asset_id:
+            print("[WARN] No asset id (SMOKE_ASSET_ID / --asset): dropping the asset scenario")
+            del mix["asset"]
+        else:
+            paths["asset"] = paths["asset"].format(asset=asset_id)
+    if not mix:
+        print("[ERROR] Request mix is empty")
+        return 2
+
+    config = {
+        "api_url": api_url.rstrip("/"), "rate": args.rate, "arrival": args.arrival,
+        "duration": args.duration, "warmup": args.warmup, "concurrency": args.concurrency,
+        "mix": mix, "local": args.local,
+    }
+    try:
+        result = run_load(config["api_url"], paths, mix, args.rate, args.duration, args.warmup,
+                          args.concurrency, arrival=args.arrival, seed=args.seed)
+    finally:
+        if server:
+            server.shutdown()
+
+    report = build_report(result, config)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+    return 0 if report["total"]["error_rate"] <= args.max_error_rate else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
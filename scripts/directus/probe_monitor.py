@@ -0,0 +1,343 @@
+#!/usr/bin/env python3
+"""
+probe_monitor.py - Continuous public endpoint monitor with Prometheus metrics
+
+scripts/smoke-test.sh and verify_public.py are one-shot checks, so a latency
+regression between deploys goes unnoticed until the next manual run. This
+daemon reuses public_probe.probe() on a schedule and serves the results in
+Prometheus text format, so it can run as a sidecar next to Directus:
+
+- Every --interval seconds all public targets (PUBLIC_READ_COLLECTIONS plus
+  the smoke asset) are probed once, concurrently, within --deadline
+- Fixed cost: ONE persistent DirectusClient (keep-alive connections) and ONE
+  ThreadPoolExecutor of --workers threads for the whole lifetime; the
+  /metrics endpoint is served by a single extra thread
+- Bounded memory: latencies go into LatencyHistogram slots of a rolling
+  --window (one slot per interval, oldest dropped), plus fixed-bucket
+  cumulative Prometheus histograms; nothing grows with uptime
+
+Exposed metrics (label endpoint = collection name or asset:<id>):
+    directus_probe_up                          1 when the last probe returned 200
+    directus_probe_last_status                 HTTP status of the last probe (0 = error/timeout)
+    directus_probe_last_bytes                  Response size of the last probe
+    directus_probe_requests_total{status}      Probes by status (200, 403, error, timeout, ...)
+    directus_probe_latency_seconds             Cumulative histogram (fixed buckets)
+    directus_probe_latency_window_seconds      Summary: p50/p95/p99 over the rolling window
+    directus_probe_cycle_duration_seconds      Wall time of the last probe cycle
+    directus_probe_cycles_total                Probe cycles since start
+
+Usage:
+    python3 scripts/directus/probe_monitor.py
+    python3 scripts/directus/probe_monitor.py --interval 30 --window 900 --port 9464
+    python3 scripts/directus/probe_monitor.py --once          # one cycle, print metrics, exit
+    curl -s localhost:9464/metrics
+
+Exit code (--once): 0 all endpoints returned 200, 1 otherwise, 2 error.
+
+ENVIRONMENT:
+    DIRECTUS_URL       - Directus base URL
+    SMOKE_ASSET_ID     - Smoke asset probed via /assets/<id> (skipped when unset)
+    MONITOR_PORT       - Metrics port (default: 9464)
+    MONITOR_INTERVAL   - Seconds between probe cycles (default: 15)
+"""
+
+import os
+import sys
+import time
+import signal
+import argparse
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from directus_client import DirectusClient
+from latency_histogram import LatencyHistogram
+from public_probe import probe, default_targets, collection_targets, asset_target
+
+DEFAULT_PORT = 9464
+DEFAULT_INTERVAL = 15.0
+DEFAULT_WINDOW = 300.0
+DEFAULT_DEADLINE = 10.0
+DEFAULT_WORKERS = 4
+# Seconds; same spirit as the Prometheus client defaults, capped at the probe deadline range
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+WINDOW_QUANTILES = (0.5, 0.95, 0.99)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def format_value(value):
+    if value == float("inf"):
+        return "+Inf"
+    return f"{value:g}" if isinstance(value, float) else str(value)
+
+
+class RollingHistogram:
+    """
+    Per-endpoint LatencyHistograms over the last `window` seconds, kept as a
+    ring of `slot_seconds` slots; expired slots are dropped as time moves on.
+    """
+
+    def __init__(self, window, slot_seconds):
+        self.slot_seconds = max(1.0, slot_seconds)
+        self.slots = deque(maxlen=max(1, int(round(window / self.slot_seconds))))
+
+    def _current(self, now):
+        slot_id = int(now // self.slot_seconds)
+        if not self.slots or self.slots[-1][0] != slot_id:
+            self.slots.append((slot_id, {}))
+        return self.slots[-1][1]
+
+    def record(self, endpoint, value_us, now=None):
+        slot = self._current(time.time() if now is None else now)
+        slot.setdefault(endpoint, LatencyHistogram()).record(value_us)
+
+    def merged(self, now=None):
+        """{endpoint: LatencyHistogram} over the slots still inside the window."""
+        oldest = int((time.time() if now is None else now) // self.slot_seconds) - self.slots.maxlen + 1
+        merged = {}
+        for slot_id, slot in self.slots:
+            if slot_id < oldest:
+                continue
+            for endpoint, hist in slot.items():
+                merged.setdefault(endpoint, LatencyHistogram()).merge(hist)
+        return merged
+
+
+class ProbeMonitor:
+    """Probe state across cycles; run_cycle() and render() may be called from different threads."""
+
+    def __init__(self, api_url, targets, window=DEFAULT_WINDOW, interval=DEFAULT_INTERVAL,
+                 deadline=DEFAULT_DEADLINE, workers=DEFAULT_WORKERS):
+        self.api_url = api_url.rstrip("/")
+        self.targets = targets
+        self.deadline = deadline
+        self.window = window
+        self.client = DirectusClient(timeout=deadline, retries=1, pool_size=workers)
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="probe")
+        self.lock = threading.Lock()
+        self.rolling = RollingHistogram(window, interval)
+        self.buckets = {name: [0] * len(LATENCY_BUCKETS) for name, _ in targets}
+        self.latency_sum = {name: 0.0 for name, _ in targets}
+        self.latency_count = {name: 0 for name, _ in targets}
+        self.requests = {}
+        self.last = {}
+        self.cycles = 0
+        self.cycle_seconds = None
+        self.last_report = None
+
+    def run_cycle(self):
+        report = probe(self.api_url, self.targets, samples=1, deadline=self.deadline,
+                       client=self.client, pool=self.pool)
+        now = time.time()
+        with self.lock:
+            for name, entry in report["endpoints"].items():
+                status = entry["status"]
+                label = "error" if status == 0 else str(status)
+                self.requests[(name, label)] = self.requests.get((name, label), 0) + 1
+                self.last[name] = entry
+                # One sample per cycle: max_ms is that sample's latency
+                if entry["max_ms"] is None:
+                    continue
+                seconds = entry["max_ms"] / 1000
+                self.rolling.record(name, entry["max_ms"] * 1000, now=now)
+                self.latency_sum[name] += seconds
+                self.latency_count[name] += 1
+                for i, bound in enumerate(LATENCY_BUCKETS):
+                    if seconds <= bound:
+                        self.buckets[name][i] += 1
+            self.cycles += 1
+            self.cycle_seconds = report["elapsed_ms"] / 1000
+            self.last_report = report
+        return report
+
+    def render(self):
+        """Prometheus text exposition format (0.0.4)."""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def sample(name, labels, value):
+            rendered = ",".join(f'{key}="{escape_label(val)}"' for key, val in labels.items())
+            lines.append(f"{name}{{{rendered}}} {format_value(value)}" if rendered else f"{name} {format_value(value)}")
+
+        with self.lock:
+            window = self.rolling.merged()
+            names = [name for name, _ in self.targets]
+
+            family("directus_probe_up", "gauge", "1 when the last probe of the endpoint returned HTTP 200.")
+            for name in names:
+                if name in self.last:
+                    sample("directus_probe_up", {"endpoint": name}, 1 if self.last[name]["status"] == 200 else 0)
+
+            family("directus_probe_last_status", "gauge", "HTTP status of the last probe (0 = error or timeout).")
+            for name in names:
+                if name in self.last:
+                    status = self.last[name]["status"]
+                    sample("directus_probe_last_status", {"endpoint": name}, status if isinstance(status, int) else 0)
+
+            family("directus_probe_last_bytes", "gauge", "Response size in bytes of the last probe.")
+            for name in names:
+                if name in self.last:
+                    sample("directus_probe_last_bytes", {"endpoint": name}, self.last[name]["bytes"])
+
+            family("directus_probe_requests_total", "counter", "Probes by endpoint and result status.")
+            for (name, status), count in sorted(self.requests.items()):
+                sample("directus_probe_requests_total", {"endpoint": name, "status": status}, count)
+
+            family("directus_probe_latency_seconds", "histogram", "Probe latency since start.")
+            for name in names:
+                # buckets[] already counts every sample <= bound (cumulative)
+                for bound, count in zip(LATENCY_BUCKETS, self.buckets[name]):
+                    sample("directus_probe_latency_seconds_bucket", {"endpoint": name, "le": format_value(bound)},
+                           count)
+                sample("directus_probe_latency_seconds_bucket", {"endpoint": name, "le": "+Inf"},
+                       self.latency_count[name])
+                sample("directus_probe_latency_seconds_sum", {"endpoint": name}, round(self.latency_sum[name], 6))
+                sample("directus_probe_latency_seconds_count", {"endpoint": name}, self.latency_count[name])
+
+            family("directus_probe_latency_window_seconds", "summary",
+                   f"Probe latency quantiles over the last {self.window:g}s.")
+            for name in names:
+                hist = window.get(name)
+                if not hist:
+                    continue
+                for quantile in WINDOW_QUANTILES:
+                    sample("directus_probe_latency_window_seconds", {"endpoint": name, "quantile": f"{quantile:g}"},
+                           hist.value_at(quantile * 100) / 1e6)
+                sample("directus_probe_latency_window_seconds_sum", {"endpoint": name}, hist.sum / 1e6)
+                sample("directus_probe_latency_window_seconds_count", {"endpoint": name}, hist.total)
+
+            family("directus_probe_cycle_duration_seconds", "gauge", "Wall time of the last probe cycle.")
+            if self.cycle_seconds is not None:
+                sample("directus_probe_cycle_duration_seconds", {}, self.cycle_seconds)
+            family("directus_probe_cycles_total", "counter", "Probe cycles since start.")
+            sample("directus_probe_cycles_total", {}, self.cycles)
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        self.pool.shutdown(wait=False, cancel_futures=True)
+        self.client.close()
+
+
+def make_handler(monitor):
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/metrics":
+                self._send(200, monitor.render(), CONTENT_TYPE)
+            elif path == "/healthz":
+                # Healthy once a cycle completed; endpoint failures are reported via metrics, not here
+                ready = monitor.cycles > 0
+                self._send(200 if ready else 503, "ok\n" if ready else "starting\n", "text/plain")
+            else:
+                self._send(404, "not found\n", "text/plain")
+
+        def _send(self, status, text, content_type):
+            body = text.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return MetricsHandler
+
+
+def build_targets(args):
+    if args.collections:
+        targets = collection_targets([c.strip() for c in args.collections.split(",") if c.strip()])
+        asset_id = args.asset or os.environ.get("SMOKE_ASSET_ID")
+        if asset_id and not args.no_asset:
+            targets.append(asset_target(asset_id))
+        return targets
+    targets = default_targets()
+    if args.no_asset or args.asset:
+        targets = [t for t in targets if not t[0].startswith("asset:")]
+    if args.asset and not args.no_asset:
+        targets.append(asset_target(args.asset))
+    return targets
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Continuous public endpoint monitor with Prometheus metrics")
+    parser.add_argument("--port", type=int, default=int(os.environ.get("MONITOR_PORT", DEFAULT_PORT)),
+                        help="Metrics port (default: %(default)s)")
+    parser.add_argument("--bind", default="127.0.0.1", help="Metrics bind address (default: %(default)s)")
+    parser.add_argument("--interval", type=float, default=float(os.environ.get("MONITOR_INTERVAL", DEFAULT_INTERVAL)),
+                        help="Seconds between probe cycles (default: %(default)s)")
+    parser.add_argument("--window", type=float, default=DEFAULT_WINDOW,
+                        help="Rolling window for quantiles in seconds (default: %(default)s)")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help="Deadline per probe cycle in seconds (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Probe threads (default: %(default)s)")
+    parser.add_argument("--collections", help="Comma-separated collections (default: PUBLIC_READ_COLLECTIONS)")
+    parser.add_argument("--asset", help="Asset id to probe (default: SMOKE_ASSET_ID)")
+    parser.add_argument("--no-asset", action="store_true", help="Do not probe the smoke asset")
+    parser.add_argument("--once", action="store_true", help="Run one cycle, print the metrics and exit")
+    args = parser.parse_args()
+
+    api_url = os.environ.get("DIRECTUS_URL")
+    if not api_url:
+        print("[ERROR] Missing DIRECTUS_URL environment variable")
+        return 2
+    if args.interval <= 0 or args.workers < 1:
+        parser.error("--interval must be positive and --workers at least 1")
+    # A cycle must finish before the next one is due
+    deadline = min(args.deadline, args.interval)
+
+    monitor = ProbeMonitor(api_url, build_targets(args), window=args.window, interval=args.interval,
+                           deadline=deadline, workers=args.workers)
+    if args.once:
+        try:
+            report = monitor.run_cycle()
+        finally:
+            monitor.close()
+        sys.stdout.write(monitor.render())
+        return 0 if report["ok"] else 1
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+
+    server = HTTPServer((args.bind, args.port), make_handler(monitor))
+    threading.Thread(target=server.serve_forever, name="metrics", daemon=True).start()
+    print(f"[OK] Monitoring {len(monitor.targets)} endpoint(s) of {monitor.api_url} every {args.interval:g}s")
+    print(f"[OK] Metrics on http://{args.bind}:{args.port}/metrics")
+
+    failing = set()
+    try:
+        while not stop.is_set():
+            started = time.monotonic()
+            report = monitor.run_cycle()
+            # Log transitions only; the steady state is in the metrics
+            down = {name for name, entry in report["endpoints"].items() if not entry["ok"]}
+            for name in sorted(down - failing):
+                print(f"[WARN] {name} failing: HTTP {report['endpoints'][name]['status']}")
+            for name in sorted(failing - down):
+                print(f"[OK] {name} recovered")
+            failing = down
+            stop.wait(max(0.0, args.interval - (time.monotonic() - started)))
+    finally:
+        server.shutdown()
+        server.server_close()
+        monitor.close()
+    print("[OK] Monitor stopped")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+public_probe.py - Concurrent anonymous smoke probe of the public Directus API
+
+verify_public.py, fix_permissions.py and seed_minimal.py used to probe public
+collections one by one and only report pass/fail, so the cold-start check took
+the SUM of all probes. This module probes every endpoint concurrently:
+
+- Targets: every entry of fix_permissions.PUBLIC_READ_COLLECTIONS
+  (/items/<collection>?limit=1, /files?limit=1 for directus_files) plus the
+  smoke asset (/assets/<SMOKE_ASSET_ID>)
+- No auth header: this is what an anonymous visitor sees
+- ONE global deadline for the whole run; probes still running when it
+  expires are reported with status "timeout"
+- Per endpoint: final status, status counts, bytes, item count (JSON lists),
+  p50/p95/max latency over --samples requests
+
+The run takes as long as the slowest probe, not the sum of all of them.
+
+Usage:
+    python3 scripts/directus/public_probe.py
+    python3 scripts/directus/public_probe.py --samples 5 --deadline 15 --output probe.json
+    python3 scripts/directus/public_probe.py --collections pages,navigation --no-asset
+
+    from public_probe import probe, collection_targets
+    report = probe(api_url, collection_targets(["pages", "navigation"]))
+    report["endpoints"]["pages"]["ok"]
+
+Exit code: 0 all endpoints returned 200, 1 otherwise, 2 error.
+
+ENVIRONMENT:
+    DIRECTUS_URL     - Directus base URL
+    SMOKE_ASSET_ID   - Smoke asset probed via /assets/<id> (skipped when unset)
+"""
+
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from directus_client import DirectusClient
+
+DEFAULT_DEADLINE = 10.0
+DEFAULT_WORKERS = 16
+PROBE_HEADERS = {"User-Agent": "directus-public-probe/1.0"}
+
+
+def collection_path(collection, query="limit=1"):
+    # System collections have their own endpoints; directus_files is /files
+    if collection.startswith("directus_"):
+        return f"/{collection[len('directus_'):]}?{query}"
+    return f"/items/{collection}?{query}"
+
+
+def collection_targets(collections, query="limit=1"):
+    """[(name, path)] for anonymous reads of each collection."""
+    return [(collection, collection_path(collection, query)) for collection in collections]
+
+
+def asset_target(asset_id):
+    return (f"asset:{asset_id}", f"/assets/{asset_id}")
+
+
+def default_targets():
+    # Imported lazily: fix_permissions reads its environment at import time
+    from fix_permissions import PUBLIC_READ_COLLECTIONS, SMOKE_ASSET_ID
+
+    targets = collection_targets(PUBLIC_READ_COLLECTIONS)
+    if SMOKE_ASSET_ID:
+        targets.append(asset_target(SMOKE_ASSET_ID))
+    return targets
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(len(sorted_values) * pct / 100))
+    return sorted_values[rank - 1]
+
+
+def _probe_once(client, url):
+    started = time.perf_counter()
+    status, size, items = 0, 0, None
+    try:
+        with client.stream("GET", url, headers=PROBE_HEADERS) as response:
+            raw = response.read()
+            status, size = response.status, len(raw)
+            if status == 200 and "json" in (response.getheader("Content-Type") or ""):
+                try:
+                    data = json.loads(raw).get("data")
+                    if isinstance(data, list):
+                        items = len(data)
+                except (ValueError, AttributeError):
+                    pass
+    except Exception as e:
+        return {"status": 0, "bytes": 0, "ms": (time.perf_counter() - started) * 1000, "error": str(e)}
+    return {"status": status, "bytes": size, "ms": (time.perf_counter() - started) * 1000, "items": items}
+
+
+def _summarize(path, samples, expected):
+    latencies = sorted(s["ms"] for s in samples if s["status"] not in (0, "timeout"))
+    statuses = {}
+    for sample in samples:
+        statuses[str(sample["status"])] = statuses.get(str(sample["status"]), 0) + 1
+    last = samples[-1] if samples else {"status": "timeout", "bytes": 0}
+    entry = {
+        "path": path,
+        "status": last["status"],
+        "ok": len(samples) == expected and all(s["status"] == 200 for s in samples),
+        "statuses": statuses,
+        "samples": len(samples),
+        "bytes": last.get("bytes", 0),
+        "p50_ms": round(percentile(latencies, 50), 1) if latencies else None,
+        "p95_ms": round(percentile(latencies, 95), 1) if latencies else None,
+        "max_ms": round(latencies[-1], 1) if latencies else None,
+    }
+    if last.get("items") is not None:
+        entry["items"] = last["items"]
+    if last.get("error"):
+        entry["error"] = last["error"]
+    return entry
+
+
+def probe(api_url, targets, samples=1, deadline=DEFAULT_DEADLINE, workers=DEFAULT_WORKERS, client=None, pool=None):
+    """
+    Probe every (name, path) target `samples` times, concurrently, within one
+    global deadline (seconds). Returns a JSON-serialisable report.
+
+    Long-running callers (probe_monitor.py) pass their own client and pool so
+    connections and threads are reused across runs.
+    """
+    api_url = api_url.rstrip("/")
+    own_client, own_pool = client is None, pool is None
+    # Own client: socket timeout bounded by the deadline, no retries (latency must be real)
+    client = client or DirectusClient(timeout=deadline, retries=1, pool_size=workers)
+    pool = pool or ThreadPoolExecutor(max_workers=max(1, min(workers, len(targets) * samples)))
+    results = {name: [] for name, _ in targets}
+    lock = threading.Lock()
+
+    def run(name, path):
+        sample = _probe_once(client, f"{api_url}{path}")
+        with lock:
+            results[name].append(sample)
+
+    started = time.perf_counter()
+    try:
+        # Sample rounds interleaved so every endpoint gets its first probe early
+        futures = [pool.submit(run, name, path) for _ in range(samples) for name, path in targets]
+        done, pending = wait(futures, timeout=deadline)
+        for future in pending:
+            future.cancel()
+    finally:
+        if own_pool:
+            # Do not wait for stragglers past the deadline; their sockets time out on their own
+            pool.shutdown(wait=False, cancel_futures=True)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    endpoints = {}
+    with lock:
+        for name, path in targets:
+            taken = list(results[name])
+            taken += [{"status": "timeout", "bytes": 0, "ms": None}] * (samples - len(taken))
+            endpoints[name] = _summarize(path, taken, samples)
+    if own_client:
+        client.close()
+
+    return {
+        "api_url": api_url,
+        "deadline_s": deadline,
+        "elapsed_ms": round(elapsed, 1),
+        "ok": all(entry["ok"] for entry in endpoints.values()),
+        "timed_out": sorted(name for name, entry in endpoints.items() if entry["status"] == "timeout"),
+        "endpoints": endpoints,
+    }
+
+
+def print_report(report, indent="  "):
+    """Human-readable [PASS]/[FAIL] lines, slowest first."""
+    ranked = sorted(report["endpoints"].items(), key=lambda item: -(item[1]["max_ms"] or float("inf")))
+    for name, entry in ranked:
+        tag = "PASS" if entry["ok"] else "FAIL"
+        timing = f"p50 {entry['p50_ms']} / p95 {entry['p95_ms']} / max {entry['max_ms']} ms" \
+            if entry["max_ms"] is not None else "no response"
+        print(f"{indent}[{tag}] {name:<28} HTTP {entry['status']:<7} {entry['bytes']:>7} B  {timing}")
+    passed = sum(1 for entry in report["endpoints"].values() if entry["ok"])
+    print(f"{indent}{passed}/{len(report['endpoints'])} endpoints OK in {report['elapsed_ms']:.0f} ms "
+          f"(deadline {report['deadline_s']:g}s)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Concurrent anonymous probe of public Directus endpoints")
+    parser.add_argument("--collections", help="Comma-separated collections (default: PUBLIC_READ_COLLECTIONS)")
+    parser.add_argument("--asset", help="Asset id to probe (default: SMOKE_ASSET_ID)")
+    parser.add_argument("--no-asset", action="store_true", help="Do not probe the smoke asset")
+    parser.add_argument("--samples", type=int, default=1, help="Requests per endpoint (default: %(default)s)")
+    parser.add_argument("--deadline", type=float, default=DEFAULT_DEADLINE,
+                        help="Global deadline in seconds (default: %(default)s)")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent requests (default: %(default)s)")
+    parser.add_argument("--output", help="Also write the JSON report to this file")
+    parser.add_argument("--text", action="store_true", help="Print PASS/FAIL lines instead of JSON")
+    args = parser.parse_args()
+
+    api_url = os.environ.get("DIRECTUS_URL")
+    if not api_url:
+        print("[ERROR] Missing DIRECTUS_URL environment variable")
+        return 2
+    if args.samples < 1:
+        parser.error("--samples must be at least 1")
+
+    if args.collections:
+        targets = collection_targets([c.strip() for c in args.collections.split(",") if c.strip()])
+        asset_id = args.asset or os.environ.get("SMOKE_ASSET_ID")
+        if asset_id and not args.no_asset:
+            targets.append(asset_target(asset_id))
+    else:
+        targets = default_targets()
+        if args.no_asset:
+            targets = [t for t in targets if not t[0].startswith("asset:")]
+        elif args.asset:
+            targets = [t for t in targets if not t[0].startswith("asset:")] + [asset_target(args.asset)]
+
+    report = probe(api_url, targets, samples=args.samples, deadline=args.deadline, workers=args.workers)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    if args.text:
+        print_report(report)
+    else:
+        print(json.dumps(report, indent=2))
+    return 0 if report["ok"] else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
@@ -1,11 +1,20 @@
 import os
 import json
-import urllib.request
-import urllib.error
-import subprocess
-import ssl
 import sys
+import time
 import argparse
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from apply_journal import JOURNAL_PATH, ApplyJournal, plan_hash
+from collection_index import CollectionIndex
+from directus_auth import DirectusAuth
+from directus_client import get_client
+from schema_plan import build_dependency_graph
+from snapshot_store import load_snapshot_file, sha256_hex
+from schema_diff import (
+    apply_diff, build_collection_meta, build_field_payload, build_target_snapshot,
+    count_operations, diff_schema, print_diff,
+)
 
 # Config
 PLAN_PATH = "scripts/directus/schema_plan.json"
@@ -20,65 +29,18 @@ REQUIRED_BLOCKS = {
     "block_video", "block_gallery", "block_steps", "block_columns", "block_divider"
 }
 
-def get_access_token_via_login():
-    # helper to fetch secret
-    def fetch_secret(name):
-        try:
-            return subprocess.check_output(
-                 ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-                 text=True
-             ).strip()
-        except Exception:
-            return None
-
+def get_auth():
+    # Cached across scripts; GSM is only queried when no valid/refreshable token exists
     print("Authenticating...")
-    email = (
-        os.environ.get("DIRECTUS_ADMIN_EMAIL")
-        or fetch_secret("DIRECTUS_ADMIN_EMAIL")
-        or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-    )
-    password = (
-        os.environ.get("DIRECTUS_ADMIN_PASSWORD")
-        or fetch_secret("DIRECTUS_ADMIN_PASSWORD")
-        or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
-    )
-    if not email or not password:
-        print("Missing DIRECTUS_ADMIN_EMAIL or DIRECTUS_ADMIN_PASSWORD (env or GSM).")
-        return None
-    
-    url = f"{API_URL}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    
-    # Bypass SSL
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            resp_data = json.load(response)
-            return resp_data["data"]["access_token"]
-    except Exception as e:
-        print(f"Error logging in: {e}")
-        return None
+    return DirectusAuth(API_URL)
 
-def fetch_live_collections(token):
-    url = f"{API_URL}/collections"
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"Bearer {token}")
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
+def fetch_live_index(token):
+    # One /collections + one /fields (+ /relations) call, shared with the other scripts
     try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            data = json.load(response)
-            return {c["collection"] for c in data["data"]}
+        return CollectionIndex.from_api(API_URL, token, include_relations=True)
     except Exception as e:
         print(f"Error fetching collections: {e}")
-        return set()
+        return CollectionIndex([], [])
 
 def load_json(path):
     with open(path, 'r') as f:
@@ -111,16 +73,10 @@ def create_collection(token, collection_name, spec_details):
     payload = {
         "collection": collection_name,
         "schema": {}, # Let Directus handle default schema props unless spec specifies
-        "meta": {
-            "note": spec_details.get("note", f"Created by Antigravity Schema Apply")
-        },
+        "meta": build_collection_meta(spec_details),  # note + singleton flag
         "fields": []
     }
-    
-    # Singleton handling
-    if spec_details.get("type") in ["singleton", "singleton_collection"]:
-        payload["meta"]["singleton"] = True
-    
+
     # Fields Construction
     # The spec has "fields": { "fieldname": { ... } } or an API-ready list
     # Directus expects array of objects
@@ -130,103 +86,148 @@ def create_collection(token, collection_name, spec_details):
         spec_fields = {}
 
     for field_name, field_def in spec_fields.items():
-        # Skip 'id' usually, but for singletons or UUIDs explicit creation might be needed?
-        # Directus usually auto-creates ID. 
-        # But if spec defines specific ID type (like uuid), we should include it if it's not default.
-        # Actually proper way: create collection first, then fields? 
-        # Or all in one go. 'fields' array in POST /collections is supported.
-        
-        field_payload = {
-            "field": field_name,
-            "type": field_def.get("type"),
-            "meta": {
-                "required": field_def.get("required", False),
-                # "unique": field_def.get("unique", False) # meta doesn't have unique, schema does
-            },
-            "schema": {
-                # "is_primary_key": field_def.get("key", False), # Schema prop
-                # "has_auto_increment": ...
-            }
-        }
-        
-        # Adjust Type for Alias/M2O/M2M/M2A (which often appear as fields in spec but strictly are relations)
-        # However, in Directus, the field holding the relation (foreign key) IS a field.
-        # M2A 'item' field is a string (holding collection name), or for junction it's complex.
-        # Note: The extracted spec might list 'alias' fields (like O2M). Alias fields should include 'meta' with 'special': ['alias', 'no-data']
-        
-        if field_def.get("type") == "alias":
-             field_payload["meta"]["special"] = ["alias", "no-data"]
-             field_payload["type"] = "alias" # api expects alias type
-        
-        # M2A Junction 'item' handling (M2A Guard)
-        relations = spec_details.get("relations", {})
-        if field_name == "item" and collection_name == "pages_blocks":
-             # This is our M2A field.
-             # It needs to be type 'string' usually for the collection name storage?
-             # Wait, in standard Directus M2A junction:
-             # - `item` is a string field (storing the ID of the related item? No, usually ID + Collection)
-             # Actually, standard M2A text:
-             # collection_field (string) -> holds collection name
-             # item_field (string) -> holds item ID
-             # But here spec says "item": { "type": "string" } ... 
-             # Let's trust the spec types for now.
-             pass
-
-        # Primary Key Handling
-        if field_def.get("key"):
-             field_payload["schema"]["is_primary_key"] = True
-             # If uuid
-             if field_def.get("type") == "uuid":
-                 # We probably don't need to pass this if we let directus handle it, 
-                 # but forcing uuid type is good.
-                 pass
-        
-        payload["fields"].append(field_payload)
-
-    # Relations (We might need a separate pass for relations to avoid circular deps? 
-    # Or just create fields now, and add relations later?
-    # POST /collections allows 'fields' which technically includes the FKs.
-    # But configuring the Relationship *logic* (M2O interface etc) is done via /relations endpoint or meta.
-    # For this simplified Apply, we will focus on Creating Collections + Fields (Data Model).
-    # The 'relations' key in spec needs to be applied to /relations endpoint.
-    
-    # STRATEGY: 
-    # 1. Create Collection (with basic fields)
-    # 2. We will handle Relations in a separate pass or ignore for this specific 'create_collection' function?
-    # The report says "ensure M2A wiring is correct".
-    # M2A configuration is stored in `directus_relations` and `directus_fields` (interface options).
-    
-    # To keep this script simple and robust:
-    # We will POST the collection with fields.
-    # Then we might need a separate function "configure_relations" if we want to be perfect.
-    # But for "Goal: Public smoke test 200 OK", we mainly need the collections and fields to exist so queries don't correct 404/500.
-    # Permission logic relies on collection existence.
-    
-    # We will send the payload.
-    
-    url = f"{API_URL}/collections"
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            return True
-    except urllib.error.HTTPError as e:
-        err_body = e.read().decode()
-        print(f"      [ERROR] Create {collection_name} failed: {e.code} - {err_body}")
-        return False
-    except Exception as e:
-        print(f"      [ERROR] Create {collection_name} failed: {e}")
+        # Same payload the field-level diff uses, so a fresh collection diffs clean
+        # (alias fields get special alias/no-data, key fields is_primary_key)
+        payload["fields"].append(build_field_payload(field_name, field_def))
+
+    # Relations are NOT part of this payload: schema_diff.py wires them (POST /relations)
+    # after every phase has run, when all referenced collections exist.
+
+    res = get_client().request("POST", f"{API_URL}/collections", data=payload, token=token)
+    if "error" in res:
+        print(f"      [ERROR] Create {collection_name} failed: {res['error']} - {res.get('message')}")
         return False
+    return True
+
+def load_snapshot(path):
+    return load_snapshot_file(path)
+
+def plan_dependencies(plan, spec):
+    """
+    {collection: set(dependencies)} for the planned collections, rebuilt from
+    the spec like schema_plan.py does. Cycle edges the plan deferred do not
+    block creation, so they are left out.
+    """
+    collections = [c for phase in plan["execution_phases"] for c in phase["collections"]]
+    deferred = {(e.get("collection"), e.get("field"), e.get("related_collection"))
+                for e in plan.get("deferred_relations") or []}
+    dependencies = {}
+    for collection, deps in build_dependency_graph(spec, collections).items():
+        dependencies[collection] = {
+            dep for dep, edges in deps.items()
+            if any((e["collection"], e["field"], e["related_collection"]) not in deferred for e in edges)
+        }
+    return dependencies
+
+def fetch_live_snapshot(token):
+    res = get_client().request("GET", f"{API_URL}/schema/snapshot", token=token)
+    if "error" in res:
+        print(f"Error fetching snapshot: HTTP {res['error']} - {res.get('message')}")
+        return None
+    return res.get("data", res)
+
+def classify_schema_diff_entry(entry):
+    # Whole-object changes have no path: N = create, D = delete; anything else is an edit
+    for change in entry.get("diff") or []:
+        if not change.get("path"):
+            return change.get("kind", "E")
+    return "E"
+
+def summarize_schema_diff(schema_diff):
+    summary = {}
+    for section in ("collections", "fields", "relations"):
+        counts = {"N": 0, "E": 0, "D": 0}
+        for entry in schema_diff.get(section) or []:
+            kind = classify_schema_diff_entry(entry)
+            counts[kind] = counts.get(kind, 0) + 1
+        summary[section] = counts
+    return summary
+
+def drop_deletions(schema_diff):
+    # Additive by default: a spec/snapshot that lacks a live collection must not drop it
+    kept, dropped = {}, 0
+    for section, entries in schema_diff.items():
+        if not isinstance(entries, list):
+            kept[section] = entries
+            continue
+        kept[section] = [e for e in entries if classify_schema_diff_entry(e) != "D"]
+        dropped += len(entries) - len(kept[section])
+    return kept, dropped
+
+def native_apply(token, spec, snapshot_path=None, is_dry_run=True, allow_deletes=False, force=False):
+    """
+    Single-shot migration through Directus' own /schema/diff + /schema/apply.
+    Returns True when done (or nothing to do), None when the caller should
+    fall back to the per-collection path.
+    """
+    client = get_client()
+    if snapshot_path:
+        print(f"Target: stored snapshot {snapshot_path}")
+        target = load_snapshot(snapshot_path)
+    else:
+        # Overlay the spec onto the live snapshot so unrelated collections stay untouched
+        live = fetch_live_snapshot(token)
+        if live is None:
+            return None
+        target, _ = build_target_snapshot(spec, live)
+        print(f"Target: live snapshot + spec ({len(target['collections'])} collections, "
+              f"{len(target['fields'])} fields, {len(target['relations'])} relations)")
+
+    query = "?force=true" if force else ""
+    res = client.request("POST", f"{API_URL}/schema/diff{query}", data=target, token=token)
+    if "error" in res:
+        print(f"[FALLBACK] /schema/diff rejected: HTTP {res['error']} - {res.get('message')}")
+        return None
+    if not res.get("data"):
+        print("[OK] Schema already in sync (empty diff)")
+        return True
+
+    schema_hash = res["data"].get("hash")
+    schema_diff = res["data"].get("diff") or {}
+    for section, counts in summarize_schema_diff(schema_diff).items():
+        print(f"  {section:<12} +{counts['N']} new  ~{counts['E']} changed  -{counts['D']} deleted")
+
+    if not allow_deletes:
+        schema_diff, dropped = drop_deletions(schema_diff)
+        if dropped:
+            print(f"  [SKIP] {dropped} deletions (use --allow-deletes to apply them)")
+
+    if is_dry_run:
+        print("[DRY-RUN] Not calling /schema/apply")
+        return True
+
+    if not any(schema_diff.get(section) for section in ("collections", "fields", "relations")):
+        print("[OK] Nothing left to apply")
+        return True
+
+    res = client.request("POST", f"{API_URL}/schema/apply", data={"hash": schema_hash, "diff": schema_diff}, token=token)
+    if "error" in res:
+        print(f"[FALLBACK] /schema/apply failed: HTTP {res['error']} - {res.get('message')}")
+        return None
+    print("[SUCCESS] Schema applied in one transaction")
+    return True
 
 def main():
     parser = argparse.ArgumentParser(description='Apply Directus Schema')
     parser.add_argument('--dry-run', action='store_true', help='Simulate changes only')
     parser.add_argument('--execute', action='store_true', help='Execute changes')
+    parser.add_argument('--parallel', type=int, default=1, metavar='N',
+                        help='Create up to N collections of the same phase concurrently (default: 1)')
+    parser.add_argument('--collections-only', action='store_true',
+                        help='Only create missing collections; skip the field/relation diff')
+    parser.add_argument('--native', action='store_true',
+                        help='Migrate via /schema/diff + /schema/apply (falls back to the per-collection path)')
+    parser.add_argument('--snapshot', metavar='PATH',
+                        help='With --native: apply this stored snapshot instead of live snapshot + spec')
+    parser.add_argument('--allow-deletes', action='store_true',
+                        help='With --native: also apply deletions proposed by /schema/diff')
+    parser.add_argument('--force', action='store_true',
+                        help='With --native: diff even if the snapshot comes from another Directus version/vendor')
+    parser.add_argument('--journal', default=JOURNAL_PATH, metavar='PATH',
+                        help='Append-only journal used to resume an interrupted run (default: %(default)s)')
+    parser.add_argument('--no-journal', action='store_true', help='Do not read or write the journal')
+    parser.add_argument('--restart', action='store_true',
+                        help='Ignore journaled progress of this plan and re-verify everything')
     args = parser.parse_args()
     
     # If no flags, default to dry-run
@@ -240,8 +241,9 @@ def main():
         print("--- [Schema Apply] Mode: DRY-RUN (No changes) ---")
         is_dry_run = True
 
-    # 1. Auth
-    token = get_access_token_via_login()
+    # 1. Auth (token is re-checked per phase and refreshed when close to expiry)
+    auth = get_auth()
+    token = auth.token()
     if not token:
         print("Auth failed.")
         sys.exit(1)
@@ -249,19 +251,61 @@ def main():
     # 2. Load Plan & Spec
     plan = load_json(PLAN_PATH)
     spec = load_json(SPEC_PATH)
-    
+
+    # Journal: same target + plan + spec + mode (+ stored snapshot content) -> same key ->
+    # resume where the last run stopped. Dry runs only read it.
+    mode = "native" if args.native or args.snapshot else "classic"
+    snapshot_digest = None
+    if args.snapshot:
+        with open(args.snapshot, "rb") as f:
+            snapshot_digest = sha256_hex(f.read())
+    journal = ApplyJournal(args.journal, plan_hash(API_URL, plan, spec, mode, snapshot_digest),
+                           enabled=not args.no_journal)
+    if args.restart and not is_dry_run:
+        journal.reset()
+    if journal.done_count():
+        print(f"[RESUME] Plan {journal.key}: interrupted run with {journal.done_count()} operations done; "
+              f"re-checking them against live state")
+    if is_dry_run:
+        journal.enabled = False
+
+    # 2b. Native single-shot mode; None means the server rejected it -> classic path
+    if args.native or args.snapshot:
+        print("\n--- Native /schema/diff + /schema/apply ---")
+        done = native_apply(token, spec, snapshot_path=args.snapshot, is_dry_run=is_dry_run,
+                            allow_deletes=args.allow_deletes, force=args.force)
+        if done:
+            if not is_dry_run:
+                journal.complete(mode="native")
+            return
+        if args.snapshot:
+            print("[ERROR] Stored snapshots can only be applied natively.")
+            sys.exit(1)
+        print("Falling back to per-collection apply...")
+
     # 3. Live State
-    live_collections = fetch_live_collections(token)
-    print(f"Live Collections: {len(live_collections)}")
+    live_index = fetch_live_index(token)
+    print(f"Live Collections: {len(live_index)}")
 
     # 4. Iterate Phases
+    # Collections inside one phase are independent (see schema_plan.py), so with
+    # --parallel N they are created concurrently; the phase ends when all finish.
     total_planned = 0
     total_existing = 0
     total_created = 0
     total_errors = 0
-    
+    failed = []
+    # A collection whose dependency failed (or was itself blocked) is not attempted
+    dependencies = plan_dependencies(plan, spec)
+    blocked = set()
+    workers = max(1, args.parallel)
+    if not is_dry_run and workers > 1:
+        print(f"Parallel creation: up to {workers} collections per phase")
+
     for phase_info in plan["execution_phases"]:
         print(f"\n--- Phase {phase_info['phase']}: {phase_info['description']} ---")
+        token = auth.token() or token
+        to_create = []
         for collection_name in phase_info["collections"]:
             collection_spec = find_collection_spec(spec, collection_name)
             
@@ -273,23 +317,29 @@ def main():
                 print(f"[SKIP] {collection_name} (No fields defined)")
                 continue
 
+            unmet = sorted(dependencies.get(collection_name, set()) & (set(failed) | blocked))
+            if unmet and collection_name not in live_index:
+                print(f"[SKIP] {collection_name} (depends on failed: {', '.join(unmet)})")
+                blocked.add(collection_name)
+                total_errors += 1
+                continue
+
+            # Live state decides; the journal is only a hint (a DB reset drops what it recorded)
+            if collection_name not in live_index and journal.is_done(f"collection:{collection_name}"):
+                print(f"[WARN] {collection_name} done in journal but missing live; creating again")
+
             # Check existence
-            if collection_name in live_collections:
+            if collection_name in live_index:
                 # If executing, maybe verify/update? For now, SAFE skip.
                 print(f"[SKIP] {collection_name} (Exists)")
                 total_existing += 1
+                journal.record(f"collection:{collection_name}", "done", existed=True)
             else:
                 if is_dry_run:
                      print(f"[WOULD CREATE] {collection_name}")
                      total_planned += 1
                 else:
-                     print(f"[CREATING] {collection_name}...")
-                     if create_collection(token, collection_name, collection_spec):
-                         print(f"   [SUCCESS] Created {collection_name}")
-                         total_created += 1
-                         # If it's pages_blocks, we might want to log M2A specifics
-                     else:
-                         total_errors += 1
+                     to_create.append((collection_name, collection_spec))
 
                 # M2A Guard Check (Keep output present in both modes)
                 if collection_name == "pages_blocks":
@@ -300,7 +350,66 @@ def main():
                         print(f"   [M2A CFG] {collection_name}.item allows {len(related)} collections.")
                         # (Guard logic already in previous version, keeping simple here)
 
-    print(f"\nSummary: {total_created} created, {total_existing} skipped, {total_errors} errors.")
+        if not to_create:
+            continue
+
+        # Phase barrier: every creation of this phase completes (or fails) before the next phase
+        with ThreadPoolExecutor(max_workers=min(workers, len(to_create))) as pool:
+            futures = {}
+            for collection_name, collection_spec in to_create:
+                print(f"[CREATING] {collection_name}...")
+                futures[pool.submit(create_collection, token, collection_name, collection_spec)] = collection_name
+            for future in as_completed(futures):
+                collection_name = futures[future]
+                try:
+                    ok = future.result()
+                except Exception as e:
+                    print(f"      [ERROR] Create {collection_name} failed: {e}")
+                    ok = False
+                if ok:
+                    print(f"   [SUCCESS] Created {collection_name}")
+                    total_created += 1
+                    journal.record(f"collection:{collection_name}", "done")
+                else:
+                    total_errors += 1
+                    failed.append(collection_name)
+                    journal.record(f"collection:{collection_name}", "failed")
+
+    # 5. Field-level diff for existing collections + relation wiring (after all phases)
+    total_changed = 0
+    if not args.collections_only:
+        print("\n--- Fields & Relations ---")
+        started = time.perf_counter()
+        diff = diff_schema(spec, live_index)
+        print(f"Diffed {live_index.field_count()} live fields in {(time.perf_counter() - started) * 1000:.1f} ms: "
+              f"{count_operations(diff)} operations")
+        if is_dry_run:
+            print_diff(diff)
+        elif count_operations(diff):
+            print_diff(diff, prefix="")
+            total_changed, diff_failed = apply_diff(
+                API_URL, auth.token() or token, diff, workers=workers, skip_collections=failed + sorted(blocked),
+                journal=journal,
+            )
+            total_errors += len(diff_failed)
+            failed.extend(diff_failed)
+        else:
+            for message in diff["unresolved"]:
+                print(f"[UNRESOLVED] {message}")
+
+    # --collections-only skipped the field diff, so the plan is not fully applied yet
+    if not is_dry_run and not total_errors and not args.collections_only:
+        journal.complete(created=total_created, changed=total_changed)
+
+    if failed:
+        print(f"\nFailed: {', '.join(failed)}")
+    if blocked:
+        print(f"Not attempted (failed dependency): {', '.join(sorted(blocked))}")
+    if failed or blocked:
+        if journal.enabled:
+            print(f"Rerun the same command to resume (journal: {args.journal}, plan {journal.key})")
+    print(f"\nSummary: {total_created} created, {total_changed} fields/relations changed, "
+          f"{total_existing} skipped, {total_errors} errors.")
 
 
 if __name__ == "__main__":
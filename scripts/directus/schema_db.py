@@ -0,0 +1,314 @@
+#!/usr/bin/env python3
+"""
+schema_db.py - SQLite index over Directus schema snapshots for ad-hoc queries
+
+Answers questions like "which collections have an M2O to directus_files" or
+"which fields are required but have no default" with SQL instead of one-off
+Python over a 1.4 MB JSON file.
+
+A snapshot is loaded once into an indexed SQLite database, keyed by its
+content hash (SHA256 of the file, or the manifest root of a sharded export).
+Later runs hash the source, find it in the database and query right away
+without parsing the JSON again. Loading a new version of the same source
+replaces the old rows.
+
+Every query runs against three views of the selected snapshot:
+
+    collections(collection, singleton, hidden, grp, note, meta, schema)
+    fields(collection, field, type, required, nullable, default_value,
+           is_primary_key, is_unique, special, interface, meta, schema)
+    relations(collection, field, related_collection, one_field, junction_field,
+              one_collection_field, one_allowed_collections, meta, schema)
+
+meta/schema hold the raw JSON (usable with json_extract).
+
+Usage:
+    python3 scripts/directus/schema_db.py query "SELECT collection, field FROM relations WHERE related_collection = 'directus_files'"
+    python3 scripts/directus/schema_db.py query --snapshot directus/snapshot-full.json --preset required-no-default
+    python3 scripts/directus/schema_db.py presets
+    python3 scripts/directus/schema_db.py info
+
+ENVIRONMENT:
+    DIRECTUS_SCHEMA_DB   - Database file (default: schema.sqlite in the private
+                           directory <tmp>/directus-schema-<uid>/, created 0700
+                           and refused if it is a symlink, foreign or open to others)
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import tempfile
+
+from collection_index import SNAPSHOT_PATH
+from directus_auth import private_dir
+from snapshot_store import load_any, load_manifest
+
+SCHEMA_VERSION = 1
+
+PRESETS = {
+    "m2o-files": (
+        "M2O relations to directus_files",
+        "SELECT collection, field FROM relations "
+        "WHERE related_collection = 'directus_files' ORDER BY collection, field",
+    ),
+    "required-no-default": (
+        "Required fields without a default value",
+        "SELECT collection, field, type FROM fields "
+        "WHERE required = 1 AND default_value IS NULL AND is_primary_key = 0 ORDER BY collection, field",
+    ),
+    "m2a": (
+        "M2A relations and their allowed collections",
+        "SELECT collection, field, one_collection_field, one_allowed_collections FROM relations "
+        "WHERE one_allowed_collections IS NOT NULL ORDER BY collection, field",
+    ),
+    "field-types": (
+        "Field count per type",
+        "SELECT type, COUNT(*) AS fields FROM fields GROUP BY type ORDER BY fields DESC",
+    ),
+    "singletons": (
+        "Singleton collections",
+        "SELECT collection, note FROM collections WHERE singleton = 1 ORDER BY collection",
+    ),
+    "no-relations": (
+        "Collections without any relation (either side)",
+        "SELECT c.collection FROM collections c WHERE c.schema IS NOT NULL AND NOT EXISTS ("
+        "SELECT 1 FROM relations r WHERE r.collection = c.collection OR r.related_collection = c.collection) "
+        "ORDER BY c.collection",
+    ),
+}
+
+DDL = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    hash TEXT PRIMARY KEY,
+    source TEXT NOT NULL,
+    directus TEXT,
+    vendor TEXT,
+    loaded_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS snap_collections (
+    snapshot TEXT NOT NULL REFERENCES snapshots(hash) ON DELETE CASCADE,
+    collection TEXT NOT NULL,
+    singleton INTEGER, hidden INTEGER, grp TEXT, note TEXT,
+    meta TEXT, schema TEXT,
+    PRIMARY KEY (snapshot, collection)
+);
+CREATE TABLE IF NOT EXISTS snap_fields (
+    snapshot TEXT NOT NULL REFERENCES snapshots(hash) ON DELETE CASCADE,
+    collection TEXT NOT NULL,
+    field TEXT NOT NULL,
+    type TEXT, required INTEGER, nullable INTEGER, default_value TEXT,
+    is_primary_key INTEGER, is_unique INTEGER, special TEXT, interface TEXT,
+    meta TEXT, schema TEXT,
+    PRIMARY KEY (snapshot, collection, field)
+);
+CREATE TABLE IF NOT EXISTS snap_relations (
+    snapshot TEXT NOT NULL REFERENCES snapshots(hash) ON DELETE CASCADE,
+    collection TEXT NOT NULL,
+    field TEXT NOT NULL,
+    related_collection TEXT, one_field TEXT, junction_field TEXT,
+    one_collection_field TEXT, one_allowed_collections TEXT,
+    meta TEXT, schema TEXT,
+    PRIMARY KEY (snapshot, collection, field)
+);
+CREATE INDEX IF NOT EXISTS idx_fields_type ON snap_fields(snapshot, type);
+CREATE INDEX IF NOT EXISTS idx_relations_related ON snap_relations(snapshot, related_collection);
+"""
+
+
+def default_db_path():
+    if os.environ.get("DIRECTUS_SCHEMA_DB"):
+        return os.environ["DIRECTUS_SCHEMA_DB"]
+    return os.path.join(private_dir(os.path.join(tempfile.gettempdir(), f"directus-schema-{os.getuid()}")),
+                        "schema.sqlite")
+
+
+def source_hash(path):
+    """Content key of a snapshot source without parsing it."""
+    if os.path.isdir(path):
+        return "root:" + load_manifest(path)["root"]
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _json(value):
+    return None if value is None else json.dumps(value, sort_keys=True)
+
+
+def _flag(value):
+    return None if value is None else int(bool(value))
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path)
+    conn.execute("PRAGMA foreign_keys = ON")
+    version = conn.execute("PRAGMA user_version").fetchone()[0]
+    if version not in (0, SCHEMA_VERSION):
+        # Layout changed: it is only a cache, rebuild it
+        conn.close()
+        os.remove(db_path)
+        conn = sqlite3.connect(db_path)
+        conn.execute("PRAGMA foreign_keys = ON")
+    conn.executescript(DDL)
+    conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+    return conn
+
+
+def load_snapshot(conn, path):
+    """Ensure the snapshot at `path` is in the database; returns (hash, cached)."""
+    key = source_hash(path)
+    if conn.execute("SELECT 1 FROM snapshots WHERE hash = ?", (key,)).fetchone():
+        return key, True
+
+    snapshot = load_any(path)
+    source = os.path.abspath(path)
+    with conn:
+        # One version per source: drop what the previous load of this path left behind
+        conn.execute("DELETE FROM snapshots WHERE source = ?", (source,))
+        conn.execute(
+            "INSERT INTO snapshots (hash, source, directus, vendor, loaded_at) VALUES (?, ?, ?, ?, ?)",
+            (key, source, snapshot.get("directus"), snapshot.get("vendor"), time.time()),
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO snap_collections VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            [
+                (key, row["collection"], _flag((row.get("meta") or {}).get("singleton")),
+                 _flag((row.get("meta") or {}).get("hidden")), (row.get("meta") or {}).get("group"),
+                 (row.get("meta") or {}).get("note"), _json(row.get("meta")), _json(row.get("schema")))
+                for row in snapshot.get("collections", [])
+            ],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO snap_fields VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_field_row(key, row) for row in snapshot.get("fields", [])],
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO snap_relations VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            [_relation_row(key, row) for row in snapshot.get("relations", [])],
+        )
+    return key, False
+
+
+def _field_row(key, row):
+    meta = row.get("meta") or {}
+    schema = row.get("schema") or {}
+    default = schema.get("default_value")
+    return (
+        key, row["collection"], row["field"], row.get("type"),
+        _flag(meta.get("required")), _flag(schema.get("is_nullable")) if schema else None,
+        None if default is None else str(default),
+        _flag(schema.get("is_primary_key")) or 0, _flag(schema.get("is_unique")) or 0,
+        _json(meta.get("special")), meta.get("interface"),
+        _json(row.get("meta")), _json(row.get("schema")),
+    )
+
+
+def _relation_row(key, row):
+    meta = row.get("meta") or {}
+    return (
+        key, row["collection"], row["field"], row.get("related_collection"),
+        meta.get("one_field"), meta.get("junction_field"), meta.get("one_collection_field"),
+        _json(meta.get("one_allowed_collections")),
+        _json(row.get("meta")), _json(row.get("schema")),
+    )
+
+
+def select_snapshot(conn, key):
+    """Point the collections/fields/relations views at one snapshot."""
+    for name in ("collections", "fields", "relations"):
+        conn.execute(f"DROP VIEW IF EXISTS temp.{name}")
+        conn.execute(
+            f"CREATE TEMP VIEW {name} AS SELECT * FROM snap_{name} WHERE snapshot = '{key}'"
+        )
+
+
+def run_query(conn, sql):
+    cursor = conn.execute(sql)
+    columns = [d[0] for d in cursor.description or []]
+    return columns, cursor.fetchall()
+
+
+def print_table(columns, rows):
+    if not columns:
+        return
+    # Hide the internal key column that SELECT * brings along
+    keep = [i for i, name in enumerate(columns) if name != "snapshot"]
+    columns = [columns[i] for i in keep]
+    cells = [["" if row[i] is None else str(row[i]) for i in keep] for row in rows]
+    widths = [min(60, max([len(c)] + [len(r[n]) for r in cells])) for n, c in enumerate(columns)]
+    print("  ".join(c.ljust(w) for c, w in zip(columns, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in cells:
+        print("  ".join(v[:w].ljust(w) for v, w in zip(row, widths)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="SQLite index over Directus schema snapshots")
+    parser.add_argument("--db", help="Database file (default: $DIRECTUS_SCHEMA_DB or a private temp directory)")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_query = sub.add_parser("query", help="Run SQL (or a preset) against a snapshot")
+    p_query.add_argument("sql", nargs="?", help="SQL against the collections/fields/relations views")
+    p_query.add_argument("--preset", choices=sorted(PRESETS), help="Run a named query instead of SQL")
+    p_query.add_argument("--snapshot", default=SNAPSHOT_PATH,
+                         help="Snapshot JSON file or sharded directory (default: %(default)s)")
+    p_query.add_argument("--json", action="store_true", help="Print rows as JSON objects")
+
+    sub.add_parser("presets", help="List the named queries")
+    sub.add_parser("info", help="List the snapshots cached in the database")
+
+    args = parser.parse_args()
+
+    if args.command == "presets":
+        for name, (description, sql) in sorted(PRESETS.items()):
+            print(f"{name:<22} {description}")
+        return 0
+
+    conn = connect(args.db or default_db_path())
+
+    if args.command == "info":
+        for key, source, directus, vendor, loaded_at in conn.execute(
+            "SELECT hash, source, directus, vendor, loaded_at FROM snapshots ORDER BY loaded_at"
+        ):
+            counts = [conn.execute(f"SELECT COUNT(*) FROM snap_{t} WHERE snapshot = ?", (key,)).fetchone()[0]
+                      for t in ("collections", "fields", "relations")]
+            print(f"{key[:16]}  {source}  directus {directus} ({vendor})  "
+                  f"{counts[0]} collections, {counts[1]} fields, {counts[2]} relations")
+        return 0
+
+    if not args.sql and not args.preset:
+        parser.error("query needs SQL or --preset")
+    sql = PRESETS[args.preset][1] if args.preset else args.sql
+
+    started = time.perf_counter()
+    key, cached = load_snapshot(conn, args.snapshot)
+    select_snapshot(conn, key)
+    loaded = time.perf_counter()
+    try:
+        columns, rows = run_query(conn, sql)
+    except sqlite3.Error as e:
+        print(f"[ERROR] {e}")
+        return 1
+    finished = time.perf_counter()
+
+    if args.json:
+        print(json.dumps([dict(zip(columns, row)) for row in rows], indent=2))
+    else:
+        print_table(columns, rows)
+        print(f"\n{len(rows)} row(s)  [{'cached' if cached else 'loaded'} {key[:16]} in "
+              f"{(loaded - started) * 1000:.1f} ms, query {(finished - loaded) * 1000:.1f} ms]")
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
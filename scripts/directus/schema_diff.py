@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+schema_diff.py - Field-level diff between the extracted spec and a Directus instance
+
+schema_apply.py used to look at collection NAMES only: an existing collection
+was skipped, so fields added to schema_spec.extracted.json (or changed type,
+required flag, default, unique) never reached the server. This module compares
+every spec field against the live field listing (one bulk GET /fields, via
+CollectionIndex) and emits the minimal set of operations:
+
+- create_fields    - spec fields missing on an existing collection, plus the
+                     alias fields that back o2m / m2m relations
+- alter_fields     - changed type / required / default / unique, batched into
+                     ONE PATCH /fields/{collection} per collection
+- create_relations - m2o / o2m / m2m / m2a relations not wired yet
+- alter_relations  - relations whose o2m alias or m2a allow-list drifted
+- unresolved       - anything that needs a human (FK pointing elsewhere,
+                     missing junction collection, unknown target)
+
+Collections that do not exist yet are created by schema_apply.py's phases
+with their spec fields; only their relation wiring shows up here.
+Primary keys are never altered. The diff is pure dict work (no requests), so
+it stays well under a second even for the 869-field full snapshot.
+
+Usage:
+    # Offline: diff the spec against a stored snapshot and time it
+    python3 scripts/directus/schema_diff.py --snapshot directus/snapshot-full.json
+
+    # Machine-readable operations
+    python3 scripts/directus/schema_diff.py --snapshot directus/snapshot.json --json
+
+    from schema_diff import diff_schema, apply_diff
+    diff = diff_schema(spec, index)            # index built with include_relations=True
+    created, failed = apply_diff(api_url, token, diff, workers=4)
+"""
+
+import sys
+import copy
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from collection_index import CollectionIndex, SNAPSHOT_PATH
+from directus_client import get_client
+from schema_plan import iter_spec_collections
+
+SPEC_PATH = "scripts/directus/schema_spec.extracted.json"
+
+# Live type names that store the spec type without loss (uuid FKs are often char(36) strings)
+TYPE_EQUIVALENTS = {
+    "uuid": {"uuid", "string"},
+    "timestamp": {"timestamp", "dateTime"},
+}
+
+# Alias fields backing a relation carry the relation kind in meta.special
+ALIAS_SPECIAL = {"o2m": ["o2m"], "m2m": ["m2m"]}
+
+
+def spec_fields(details):
+    """
+    {field_name: field_def} for a spec entry. Entries may also carry an
+    API-ready list of field payloads; those are kept verbatim under "payload".
+    """
+    fields = details.get("fields") or {}
+    if isinstance(fields, dict):
+        return fields
+    normalized = {}
+    for entry in fields:
+        schema = entry.get("schema") or {}
+        normalized[entry["field"]] = {
+            "type": entry.get("type"),
+            "required": bool((entry.get("meta") or {}).get("required")),
+            "key": bool(schema.get("is_primary_key")),
+            "payload": entry,
+        }
+    return normalized
+
+
+def build_field_payload(field_name, field_def, special=None):
+    """POST /fields (or POST /collections "fields" entry) payload for one spec field."""
+    if "payload" in field_def:
+        return copy.deepcopy(field_def["payload"])
+    payload = {
+        "field": field_name,
+        "type": field_def.get("type"),
+        "meta": {"required": field_def.get("required", False)},
+        "schema": {},
+    }
+    if field_def.get("type") == "alias":
+        # Alias fields have no column
+        payload["meta"]["special"] = special or ["alias", "no-data"]
+        payload["schema"] = None
+    if field_def.get("key"):
+        payload["schema"]["is_primary_key"] = True
+    if "default" in field_def and payload["schema"] is not None:
+        payload["schema"]["default_value"] = field_def["default"]
+    if field_def.get("unique") and payload["schema"] is not None:
+        payload["schema"]["is_unique"] = True
+    return payload
+
+
+def build_collection_meta(details):
+    """Collection meta for a spec entry (note + singleton flag)."""
+    meta = {"note": details.get("note", "Created by Antigravity Schema Apply")}
+    if details.get("type") in ["singleton", "singleton_collection"]:
+        meta["singleton"] = True
+    return meta
+
+
+def _empty_diff():
+    return {
+        "create_fields": [],
+        "alter_fields": [],
+        "create_relations": [],
+        "alter_relations": [],
+        "unresolved": [],
+    }
+
+
+def _field_changes(field_def, live):
+    """{attribute: (live_value, spec_value)} for the attributes the spec declares."""
+    changes = {}
+    meta = live.get("meta") or {}
+    schema = live.get("schema") or {}
+
+    spec_type = field_def.get("type")
+    live_type = live.get("type")
+    if spec_type and spec_type != "alias" and live_type != "alias":
+        if live_type not in TYPE_EQUIVALENTS.get(spec_type, {spec_type}):
+            changes["type"] = (live_type, spec_type)
+
+    required = bool(field_def.get("required", False))
+    if bool(meta.get("required")) != required:
+        changes["required"] = (bool(meta.get("required")), required)
+
+    if "default" in field_def and schema:
+        live_default = schema.get("default_value")
+        if str(live_default) != str(field_def["default"]):
+            changes["default"] = (live_default, field_def["default"])
+
+    if "unique" in field_def and schema:
+        if bool(schema.get("is_unique")) != bool(field_def["unique"]):
+            changes["unique"] = (bool(schema.get("is_unique")), bool(field_def["unique"]))
+
+    return changes
+
+
+def _alter_payload(field_name, changes):
+    payload = {"field": field_name}
+    if "type" in changes:
+        payload["type"] = changes["type"][1]
+    if "required" in changes:
+        payload["meta"] = {"required": changes["required"][1]}
+    schema = {}
+    if "default" in changes:
+        schema["default_value"] = changes["default"][1]
+    if "unique" in changes:
+        schema["is_unique"] = changes["unique"][1]
+    if schema:
+        payload["schema"] = schema
+    return payload
+
+
+def _spec_relations(spec, has_field):
+    """
+    Expand spec `relations` into Directus relation rows keyed by the many-side field.
+    Returns ({(collection, field): row}, alias_fields, unresolved).
+    """
+    wanted = {}
+    aliases = []  # (collection, field, kind)
+    unresolved = []
+
+    def want(collection, field, related_collection, meta):
+        row = wanted.setdefault((collection, field), {
+            "collection": collection,
+            "field": field,
+            "related_collection": related_collection,
+            "meta": {},
+        })
+        if related_collection and not row["related_collection"]:
+            row["related_collection"] = related_collection
+        row["meta"].update(meta)
+
+    for collection, details in iter_spec_collections(spec):
+        for field, rel in (details.get("relations") or {}).items():
+            kind = rel.get("type")
+            if kind == "m2o":
+                want(collection, field, rel.get("related_collection"), {})
+            elif kind == "o2m":
+                # FK lives on the related collection; this side only holds the alias
+                target = rel.get("related_collection")
+                fk = rel.get("field")
+                if not target or not fk:
+                    unresolved.append(f"{collection}.{field}: o2m without related_collection/field")
+                    continue
+                want(target, fk, collection, {"one_field": field})
+                aliases.append((collection, field, kind))
+            elif kind == "m2a":
+                want(collection, field, None, {
+                    "one_allowed_collections": list(rel.get("related_collections") or []),
+                    "one_collection_field": "collection",
+                })
+            elif kind == "m2m":
+                junction = rel.get("junction_collection")
+                junction_field = rel.get("junction_field")
+                # Directus convention for the junction's back-reference
+                back_field = f"{collection}_id"
+                if not junction or not junction_field:
+                    unresolved.append(f"{collection}.{field}: m2m without junction_collection/junction_field")
+                    continue
+                if not has_field(junction, back_field) or not has_field(junction, junction_field):
+                    unresolved.append(
+                        f"{collection}.{field}: junction {junction}.{back_field}/{junction_field} not found"
+                    )
+                    continue
+                want(junction, back_field, collection,
+                     {"one_field": field, "junction_field": junction_field})
+                want(junction, junction_field, rel.get("related_collection"),
+                     {"junction_field": back_field})
+                aliases.append((collection, field, kind))
+
+    return wanted, aliases, unresolved
+
+
+def diff_schema(spec, index):
+    """
+    Compare the spec against a CollectionIndex (built with relations) and
+    return the operation lists described in the module docstring, plus
+    "missing_collections" (left to schema_apply.py's creation phases).
+    """
+    diff = _empty_diff()
+    spec_entries = {}
+    for collection, details in iter_spec_collections(spec):
+        fields = spec_fields(details)
+        if fields:
+            spec_entries[collection] = dict(details, fields=fields)
+
+    missing = [name for name in spec_entries if name not in index]
+    diff["missing_collections"] = missing
+    will_exist = index.collection_names() | set(missing)
+
+    def has_field(collection, field):
+        if index.has_field(collection, field):
+            return True
+        details = spec_entries.get(collection)
+        return bool(details) and field in details["fields"]
+
+    wanted, aliases, diff["unresolved"] = _spec_relations(spec, has_field)
+    alias_kinds = {(c, f): kind for c, f, kind in aliases}
+
+    # Fields: missing collections get theirs at creation time (except relation aliases)
+    for collection, details in spec_entries.items():
+        exists = collection in index
+        for field_name, field_def in details["fields"].items():
+            live = index.field(collection, field_name)
+            if live is None:
+                if exists:
+                    special = ALIAS_SPECIAL.get(alias_kinds.get((collection, field_name)))
+                    diff["create_fields"].append({
+                        "collection": collection,
+                        "field": field_name,
+                        "payload": build_field_payload(field_name, field_def, special),
+                    })
+                continue
+            if field_def.get("key"):
+                continue
+            changes = _field_changes(field_def, live)
+            if changes:
+                diff["alter_fields"].append({
+                    "collection": collection,
+                    "field": field_name,
+                    "changes": {k: list(v) for k, v in changes.items()},
+                    "payload": _alter_payload(field_name, changes),
+                })
+
+    for collection, field_name, kind in aliases:
+        if collection in spec_entries and field_name in spec_entries[collection]["fields"]:
+            continue  # declared in the spec fields, handled above
+        if index.has_field(collection, field_name) or collection not in will_exist:
+            continue
+        diff["create_fields"].append({
+            "collection": collection,
+            "field": field_name,
+            "payload": build_field_payload(field_name, {"type": "alias"}, ALIAS_SPECIAL[kind]),
+        })
+
+    # Relations
+    for (collection, field_name), row in wanted.items():
+        target = row["related_collection"]
+        targets = [target] if target else row["meta"].get("one_allowed_collections", [])
+        unknown = [t for t in targets if t not in will_exist and not t.startswith("directus_")]
+        if collection not in will_exist or unknown:
+            diff["unresolved"].append(
+                f"{collection}.{field_name}: related collection(s) {', '.join(unknown) or collection} not found"
+            )
+            continue
+
+        live = index.relation(collection, field_name)
+        if live is None:
+            diff["create_relations"].append({"collection": collection, "field": field_name, "payload": row})
+            continue
+
+        if target and live.get("related_collection") != target:
+            diff["unresolved"].append(
+                f"{collection}.{field_name}: live FK points to {live.get('related_collection')}, spec wants {target}"
+            )
+            continue
+
+        live_meta = live.get("meta") or {}
+        meta_changes = {}
+        for key, value in row["meta"].items():
+            live_value = live_meta.get(key)
+            if isinstance(value, list):
+                if set(live_value or []) != set(value):
+                    meta_changes[key] = value
+            elif live_value != value:
+                meta_changes[key] = value
+        if meta_changes:
+            diff["alter_relations"].append({
+                "collection": collection,
+                "field": field_name,
+                "payload": {"meta": meta_changes},
+            })
+
+    return diff
+
+
+def _merge(target, changes):
+    for key, value in changes.items():
+        if isinstance(value, dict) and isinstance(target.get(key), dict):
+            target[key] = dict(target[key], **value)
+        else:
+            target[key] = value
+
+
+def build_target_snapshot(spec, base):
+    """
+    Desired-state snapshot for POST /schema/diff: the live snapshot `base`
+    with the spec overlaid (missing collections with their fields, field
+    creates/alters, relations). Everything not in the spec is kept as is, so
+    the server-side diff never proposes dropping unrelated collections.
+    Returns (snapshot, diff) where diff is the field-level diff it was built from.
+    """
+    target = copy.deepcopy(base)
+    index = CollectionIndex(base.get("collections", []), base.get("fields", []),
+                            source="snapshot", relations=base.get("relations", []))
+    diff = diff_schema(spec, index)
+
+    def field_row(collection, payload):
+        row = copy.deepcopy(payload)
+        row["collection"] = collection
+        row["meta"] = dict(row.get("meta") or {}, collection=collection, field=payload["field"])
+        if row.get("schema") is not None:
+            row["schema"] = dict(row["schema"], name=payload["field"], table=collection)
+        return row
+
+    entries = dict(iter_spec_collections(spec))
+    for name in diff["missing_collections"]:
+        details = entries[name]
+        target["collections"].append({
+            "collection": name,
+            "meta": dict(build_collection_meta(details), collection=name),
+            "schema": {"name": name},
+        })
+        for field_name, field_def in spec_fields(details).items():
+            target["fields"].append(field_row(name, build_field_payload(field_name, field_def)))
+
+    for op in diff["create_fields"]:
+        target["fields"].append(field_row(op["collection"], op["payload"]))
+
+    alters = {(op["collection"], op["field"]): op["payload"] for op in diff["alter_fields"]}
+    relation_updates = {(op["collection"], op["field"]): op["payload"] for op in diff["alter_relations"]}
+    for row in target["fields"]:
+        payload = alters.get((row.get("collection"), row.get("field")))
+        if payload:
+            _merge(row, {k: v for k, v in payload.items() if k != "field"})
+    for row in target["relations"]:
+        payload = relation_updates.get((row.get("collection"), row.get("field")))
+        if payload:
+            _merge(row, payload)
+
+    for op in diff["create_relations"]:
+        row = copy.deepcopy(op["payload"])
+        row["meta"] = dict(row["meta"], many_collection=row["collection"], many_field=row["field"],
+                           one_collection=row["related_collection"])
+        row["schema"] = None
+        target["relations"].append(row)
+
+    return target, diff
+
+
+def count_operations(diff):
+    return sum(len(diff[key]) for key in ("create_fields", "alter_fields", "create_relations", "alter_relations"))
+
+
+def print_diff(diff, prefix="WOULD "):
+    for op in diff["create_fields"]:
+        print(f"[{prefix}ADD FIELD] {op['collection']}.{op['field']} ({op['payload']['type']})")
+    for op in diff["alter_fields"]:
+        changes = ", ".join(f"{k} {old!r} -> {new!r}" for k, (old, new) in op["changes"].items())
+        print(f"[{prefix}ALTER] {op['collection']}.{op['field']}: {changes}")
+    for op in diff["create_relations"]:
+        row = op["payload"]
+        target = row["related_collection"] or "|".join(row["meta"].get("one_allowed_collections", []))
+        print(f"[{prefix}RELATE] {op['collection']}.{op['field']} -> {target}")
+    for op in diff["alter_relations"]:
+        print(f"[{prefix}UPDATE RELATION] {op['collection']}.{op['field']}: {json.dumps(op['payload']['meta'])}")
+    for message in diff["unresolved"]:
+        print(f"[UNRESOLVED] {message}")
+
+
+def apply_diff(api_url, token, diff, client=None, workers=1, skip_collections=(), journal=None):
+    """
+    Apply a diff: fields first (creates concurrently, alters batched per
+    collection), then relations. Each outcome is recorded in `journal`
+    (apply_journal.ApplyJournal). The diff comes from live state, so an
+    operation the journal marks done but that is still in the diff (e.g. after
+    a DB reset) is applied again, not skipped.
+    Returns (applied_count, failed_descriptions).
+    """
+    client = client or get_client()
+    api_url = api_url.rstrip("/")
+    skip = set(skip_collections)
+    failed = []
+
+    def run(jobs):
+        # jobs: [(op_key, label, method, url, payload, op_count)]; each request is independent
+        if journal:
+            stale = [job[1] for job in jobs if journal.is_done(job[0])]
+            if stale:
+                print(f"   [WARN] {len(stale)} operation(s) done in journal but missing live; applying again")
+
+        def one(job):
+            op_key, label, method, url, payload, op_count = job
+            res = client.request(method, url, data=payload, token=token)
+            if "error" in res:
+                print(f"      [ERROR] {label} failed: {res['error']} - {res.get('message')}")
+                failed.append(label)
+                if journal:
+                    journal.record(op_key, "failed", error=res["error"])
+                return 0
+            if journal:
+                journal.record(op_key, "done")
+            return op_count
+
+        if not jobs:
+            return 0
+        with ThreadPoolExecutor(max_workers=max(1, min(workers, len(jobs)))) as pool:
+            return sum(pool.map(one, jobs))
+
+    applied = run([
+        (f"field:{op['collection']}.{op['field']}", f"Add field {op['collection']}.{op['field']}", "POST",
+         f"{api_url}/fields/{op['collection']}", op["payload"], 1)
+        for op in diff["create_fields"] if op["collection"] not in skip
+    ])
+
+    # One PATCH /fields/{collection} with every changed field of that collection
+    batches = {}
+    for op in diff["alter_fields"]:
+        if op["collection"] not in skip:
+            batches.setdefault(op["collection"], []).append(op["payload"])
+    applied += run([
+        (f"alter:{collection}:{','.join(sorted(p['field'] for p in payloads))}",
+         f"Alter fields of {collection}", "PATCH", f"{api_url}/fields/{collection}", payloads, len(payloads))
+        for collection, payloads in batches.items()
+    ])
+
+    # Relations last: every FK / alias field they reference exists by now
+    relation_jobs = [
+        (f"relation:{op['collection']}.{op['field']}", f"Relate {op['collection']}.{op['field']}",
+         "POST", f"{api_url}/relations", op["payload"], 1)
+        for op in diff["create_relations"] if op["collection"] not in skip
+    ]
+    relation_jobs += [
+        (f"relation-update:{op['collection']}.{op['field']}", f"Update relation {op['collection']}.{op['field']}",
+         "PATCH", f"{api_url}/relations/{op['collection']}/{op['field']}", op["payload"], 1)
+        for op in diff["alter_relations"] if op["collection"] not in skip
+    ]
+    applied += run(relation_jobs)
+
+    return applied, failed
+
+
+def load_spec(path=SPEC_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Diff the extracted schema spec against a Directus snapshot")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Snapshot to diff against (default: %(default)s)")
+    parser.add_argument("--spec", default=SPEC_PATH, help="Extracted spec (default: %(default)s)")
+    parser.add_argument("--json", action="store_true", help="Print the operations as JSON")
+    args = parser.parse_args()
+
+    spec = load_spec(args.spec)
+
+    start = time.perf_counter()
+    index = CollectionIndex.from_snapshot(args.snapshot)
+    loaded = time.perf_counter()
+    diff = diff_schema(spec, index)
+    finished = time.perf_counter()
+
+    if args.json:
+        print(json.dumps(diff, indent=2))
+        return 0
+
+    print(f"--- [Schema Diff] {args.spec} vs {args.snapshot} ---")
+    print(f"Snapshot: {len(index)} collections, {index.field_count()} fields, {len(index.relations())} relations")
+    print_diff(diff)
+    print(f"\nMissing collections (created by schema_apply phases): {len(diff['missing_collections'])}")
+    print(f"Operations: {len(diff['create_fields'])} field creates, {len(diff['alter_fields'])} alters, "
+          f"{len(diff['create_relations'])} relation creates, {len(diff['alter_relations'])} relation updates, "
+          f"{len(diff['unresolved'])} unresolved")
+    print(f"Timing: load {(loaded - start) * 1000:.1f} ms, diff {(finished - loaded) * 1000:.1f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,47 +1,22 @@
 import os
 import re
+import sys
 import json
-import urllib.request
-import urllib.error
+import argparse
+
+from collection_index import CollectionIndex, SNAPSHOT_PATH
+from directus_auth import DirectusAuth
 
 # Config
 REPORT_PATH = "reports/CLAUDE__FRONTEND_AUTOPSY_SCHEMA_SPEC_REPORT.md"
 API_URL = os.environ.get("DIRECTUS_URL")
-if not API_URL:
-    print("[ERROR] Missing DIRECTUS_URL environment variable"); sys.exit(1)
 
 def get_access_token_via_login():
-    import ssl
-    import json
-    import urllib.request
-    import subprocess
-    
-    # helper to fetch secret
-    def fetch_secret(name):
-        return subprocess.check_output(
-             ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-             text=True
-         ).strip()
-
-    email = os.environ.get("DIRECTUS_ADMIN_EMAIL") or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-    password = os.environ.get("DIRECTUS_ADMIN_PASSWORD") or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
-    
-    url = f"{API_URL}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    
-    # Bypass SSL
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            resp_data = json.load(response)
-            return resp_data["data"]["access_token"]
-    except Exception as e:
-        print(f"Error logging in: {e}")
-        return None
+    # Cached across scripts; GSM is only queried when no valid/refreshable token exists
+    print("Authenticating...")
+    auth = DirectusAuth(API_URL, email_secrets=("DIRECTUS_ADMIN_EMAIL_test",),
+                        password_secrets=("DIRECTUS_ADMIN_PASSWORD_test",))
+    return auth.token()
 
 def read_spec(path):
     with open(path, "r") as f:
@@ -59,94 +34,211 @@ def read_spec(path):
         print(f"Error parsing JSON spec: {e}")
         return None
 
-import ssl
+# Relation types whose FK lives on the declaring collection (it needs the target first)
+FORWARD_RELATIONS = {"m2o", "m2a"}
+# Relation types whose FK lives on the related collection (the target needs us first)
+REVERSE_RELATIONS = {"o2m"}
 
-def fetch_live_collections(token):
-    url = f"{API_URL}/collections"
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"Bearer {token}")
-    
-    # Bypass SSL verification
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            data = json.load(response)
-            return {c["collection"] for c in data["data"]}
-    except Exception as e:
-        print(f"Error fetching collections: {e}")
-        return set()
+def iter_spec_collections(spec):
+    """Yield (collection_name, details) for every collection entry in the spec."""
+    for cat in ["core", "blocks", "supporting_collections"]:
+        for key, details in spec.get(cat, {}).items():
+            if isinstance(details, dict):
+                yield details.get("collection", key), details
 
-def main():
-    print("--- [Plan Directus Schema Apply] ---")
-    
-    # 1. Get Token
-    token = get_access_token_via_login()
-    if not token:
-        print("CRITICAL: Failed to get Access Token via login.")
-        return
+def build_dependency_graph(spec, collections):
+    """
+    Build {collection: {dependency: [edge, ...]}} restricted to `collections`.
 
-    # 2. Read Spec
-    spec = read_spec(REPORT_PATH)
-    if not spec:
-        return
-    
-    # Save extracted spec
-    with open("scripts/directus/schema_spec.extracted.json", "w") as f:
-        json.dump(spec, f, indent=2)
-    print("Saved extracted spec to scripts/directus/schema_spec.extracted.json")
-
-    # 3. Fetch Live
-    live_collections = fetch_live_collections(token)
-    print(f"Live Collections Found: {len(live_collections)}")
-    
-    # 4. Compare & Plan
-    # Flatten spec collections from categories
-    spec_collections = []
-    categories = ["core", "blocks", "supporting_collections"]
-    
-    for cat in categories:
-        if cat in spec:
-            for collection_name, details in spec[cat].items():
-                # Some keys might be objects with "collection" property, verify
-                target = details.get("collection", collection_name)
-                spec_collections.append(target)
-    
-    missing = []
-    present = []
-    
-    # Categorize
-    for name in spec_collections:
-        if name in live_collections:
-            present.append(name)
+    Edges come from each spec entry's `relations`:
+    - m2o / m2a (`related_collection(s)`): the collection depends on its targets
+    - o2m: the related collection holds the FK, so it depends on this one
+    - m2m: junction collections are created separately -> no creation order
+    Self relations and targets outside `collections` (already live, or
+    directus_* system collections) impose no ordering.
+    """
+    targets = set(collections)
+    graph = {c: {} for c in collections}
+
+    def add_edge(source, dependency, edge):
+        if source in targets and dependency in targets and source != dependency:
+            graph[source].setdefault(dependency, []).append(edge)
+
+    for name, details in iter_spec_collections(spec):
+        if name not in targets:
+            continue
+        for field, rel in (details.get("relations") or {}).items():
+            rel_type = rel.get("type")
+            related = list(rel.get("related_collections") or [])
+            if rel.get("related_collection"):
+                related.append(rel["related_collection"])
+            for other in related:
+                edge = {"collection": name, "field": field, "type": rel_type, "related_collection": other}
+                if rel_type in FORWARD_RELATIONS:
+                    add_edge(name, other, edge)
+                elif rel_type in REVERSE_RELATIONS:
+                    add_edge(other, name, edge)
+
+    return graph
+
+def strongly_connected_components(graph):
+    """Tarjan's algorithm (iterative). Returns a list of sets."""
+    index_of, lowlink, on_stack = {}, {}, set()
+    stack, components, counter = [], [], [0]
+
+    for root in graph:
+        if root in index_of:
+            continue
+        work = [(root, iter(graph[root]))]
+        index_of[root] = lowlink[root] = counter[0]
+        counter[0] += 1
+        stack.append(root)
+        on_stack.add(root)
+        while work:
+            node, children = work[-1]
+            advanced = False
+            for child in children:
+                if child not in index_of:
+                    index_of[child] = lowlink[child] = counter[0]
+                    counter[0] += 1
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(graph[child])))
+                    advanced = True
+                    break
+                if child in on_stack:
+                    lowlink[node] = min(lowlink[node], index_of[child])
+            if advanced:
+                continue
+            work.pop()
+            if work:
+                parent = work[-1][0]
+                lowlink[parent] = min(lowlink[parent], lowlink[node])
+            if lowlink[node] == index_of[node]:
+                component = set()
+                while True:
+                    member = stack.pop()
+                    on_stack.discard(member)
+                    component.add(member)
+                    if member == node:
+                        break
+                components.append(component)
+    return components
+
+def plan_waves(graph):
+    """
+    Topologically sort the graph into waves of mutually independent collections.
+
+    Cycles are broken by moving every edge inside a strongly connected
+    component to the deferred list: those relations are wired in a separate
+    pass once all collections of the cycle exist.
+    Returns (waves, deferred_edges).
+    """
+    graph = {c: dict(deps) for c, deps in graph.items()}
+    deferred = []
+
+    for component in strongly_connected_components(graph):
+        if len(component) < 2:
+            continue
+        for node in component:
+            for dep in list(graph[node]):
+                if dep in component:
+                    deferred.extend(graph[node].pop(dep))
+
+    remaining = {c: set(deps) for c, deps in graph.items()}
+    waves = []
+    while remaining:
+        ready = sorted(c for c, deps in remaining.items() if not deps)
+        if not ready:
+            # Unreachable after SCC pruning; guard against an infinite loop
+            raise ValueError(f"Unresolvable dependency cycle: {sorted(remaining)}")
+        waves.append(ready)
+        for c in ready:
+            del remaining[c]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+
+    return waves, deferred
+
+def build_plan(spec, is_live):
+    """Compare spec against the live/snapshot state and emit dependency-ordered phases."""
+    spec_collections = [name for name, _ in iter_spec_collections(spec)]
+    present = [name for name in spec_collections if is_live(name)]
+    missing = [name for name in spec_collections if not is_live(name)]
+
+    waves, deferred = plan_waves(build_dependency_graph(spec, missing))
+
+    phases = []
+    for number, wave in enumerate(waves, start=1):
+        if number == 1:
+            description = "No unmet dependencies"
+        elif number == 2:
+            description = "Depends on phase 1"
         else:
-            missing.append(name)
-            
-    # 5. Dependency Ordering (Simple Heuristic: blocks_* first, then others)
-    # Ref: M2A usually requires the related collection to exist.
-    # Actually, Directus API allows creating collection without fields first, but M2A fields need related collection.
-    # Plan: Create "blocks_*" first (level 1), then "pages"/"navigation" (level 2), then junction (if separate).
-    
-    plan = {
+            description = f"Depends on phases 1-{number - 1}"
+        phases.append({"phase": number, "description": description, "collections": wave})
+
+    return {
         "missing_count": len(missing),
         "present_count": len(present),
         "missing_collections": missing,
-        "execution_phases": [
-            {
-                "phase": 1, 
-                "description": "Create Block Collections (Dependencies)",
-                "collections": [c for c in missing if c.startswith("block_")]
-            },
-            {
-                "phase": 2, 
-                "description": "Create Core Collections",
-                "collections": [c for c in missing if not c.startswith("block_")]
-            }
-        ]
+        "execution_phases": phases,
+        "deferred_relations": deferred,
     }
-    
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan Directus Schema Apply')
+    parser.add_argument('--offline', action='store_true',
+                        help='Compare against a stored snapshot instead of the live server')
+    parser.add_argument('--snapshot', default=SNAPSHOT_PATH,
+                        help='Snapshot used by --offline (default: %(default)s)')
+    parser.add_argument('--spec', default=REPORT_PATH,
+                        help='Spec report (.md) or an already extracted spec (.json) (default: %(default)s)')
+    args = parser.parse_args()
+
+    print("--- [Plan Directus Schema Apply] ---")
+
+    # 1. Get Token (live mode only)
+    if args.offline:
+        print(f"Offline mode: using {args.snapshot}")
+    else:
+        if not API_URL:
+            print("[ERROR] Missing DIRECTUS_URL environment variable"); sys.exit(1)
+        token = get_access_token_via_login()
+        if not token:
+            print("CRITICAL: Failed to get Access Token via login.")
+            return
+
+    # 2. Read Spec
+    if args.spec.endswith(".json"):
+        with open(args.spec, "r") as f:
+            spec = json.load(f)
+    else:
+        spec = read_spec(args.spec)
+        if not spec:
+            return
+
+        # Save extracted spec
+        with open("scripts/directus/schema_spec.extracted.json", "w") as f:
+            json.dump(spec, f, indent=2)
+        print("Saved extracted spec to scripts/directus/schema_spec.extracted.json")
+
+    # 3. Fetch Live (one /collections + one /fields call, or the stored snapshot)
+    if args.offline:
+        index = CollectionIndex.from_snapshot(args.snapshot)
+    else:
+        try:
+            index = CollectionIndex.from_api(API_URL, token)
+        except Exception as e:
+            print(f"Error fetching collections: {e}")
+            index = CollectionIndex([], [])
+    print(f"Live Collections Found: {len(index)}")
+    
+    # 4. Compare & Plan (dependency graph from spec relations -> topological waves)
+    plan = build_plan(spec, lambda name: name in index)
+    for edge in plan["deferred_relations"]:
+        print(f"[CYCLE] Deferring {edge['collection']}.{edge['field']} -> {edge['related_collection']}")
+
     print(json.dumps(plan, indent=2))
     
     # Write Plan Output
@@ -0,0 +1,186 @@
+"""
+secret_resolver.py - Concurrent, memoized Google Secret Manager lookups
+
+Resolving admin credentials used to spawn up to four SEQUENTIAL
+`gcloud secrets versions access` subprocesses (email, *_test fallback,
+password, *_test fallback), each paying a full gcloud CLI startup. This module:
+
+- Fetches every candidate secret of every fallback chain at once (thread pool),
+  then picks the first non-empty value per chain -> one gcloud startup of wall time
+- Memoizes values per process (a secret is never fetched twice in one run)
+- Optionally keeps values (and misses) in a tmpfs-backed store (/dev/shm) with
+  a TTL so chained ops runs skip gcloud entirely; private dir 0700, files 0600
+- Takes a pluggable backend; the default GcloudBackend honours GCLOUD_BIN so
+  tests can point it at a fake gcloud script
+
+Usage:
+    from secret_resolver import get_resolver
+
+    values = get_resolver().resolve_first({
+        "email": ["DIRECTUS_ADMIN_EMAIL", "DIRECTUS_ADMIN_EMAIL_test"],
+        "password": ["DIRECTUS_ADMIN_PASSWORD", "DIRECTUS_ADMIN_PASSWORD_test"],
+    })
+    values["email"]  # None if no candidate resolved
+
+ENVIRONMENT:
+    GCLOUD_BIN                   - gcloud executable (default: gcloud)
+    DIRECTUS_SECRET_CACHE_TTL    - Seconds to keep secrets in the tmpfs store (default 0 = off)
+    DIRECTUS_SECRET_CACHE_DIR    - Store directory (default: /dev/shm/directus-secrets-<uid>)
+"""
+
+import os
+import json
+import stat
+import time
+import hashlib
+import tempfile
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 8
+FETCH_TIMEOUT = 30  # seconds per gcloud call
+
+# Store lookup result for "not cached" (a cached None means "secret is missing")
+MISS = object()
+
+
+class GcloudBackend:
+    """Reads the latest version of a secret via the gcloud CLI."""
+
+    def __init__(self, binary=None, timeout=FETCH_TIMEOUT):
+        self.binary = binary or os.environ.get("GCLOUD_BIN", "gcloud")
+        self.timeout = timeout
+
+    def fetch(self, name):
+        try:
+            value = subprocess.check_output(
+                [self.binary, "secrets", "versions", "access", "latest", f"--secret={name}"],
+                text=True,
+                stderr=subprocess.DEVNULL,
+                timeout=self.timeout,
+            ).strip()
+            return value or None
+        except Exception:
+            return None
+
+
+class TmpfsStore:
+    """Tiny TTL key/value store in a private directory (tmpfs when available)."""
+
+    def __init__(self, ttl, path=None):
+        self.ttl = ttl
+        if path is None:
+            base = "/dev/shm" if os.path.isdir("/dev/shm") else tempfile.gettempdir()
+            path = os.path.join(base, f"directus-secrets-{os.getuid()}")
+        self.path = path if self._prepare(path) else None
+
+    @staticmethod
+    def _prepare(path):
+        try:
+            os.makedirs(path, mode=0o700, exist_ok=True)
+            info = os.lstat(path)
+        except OSError:
+            return False
+        # Refuse symlinks, foreign owners and group/other access
+        if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid():
+            return False
+        return not info.st_mode & (stat.S_IRWXG | stat.S_IRWXO)
+
+    def _file(self, name):
+        return os.path.join(self.path, hashlib.sha256(name.encode("utf-8")).hexdigest()[:32])
+
+    def get(self, name):
+        """Cached value (None if cached as missing), or MISS."""
+        if not self.path:
+            return MISS
+        try:
+            with open(self._file(name), "r") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return MISS
+        if entry.get("name") != name or entry.get("expires_at", 0) <= time.time():
+            return MISS
+        return entry.get("value")
+
+    def put(self, name, value):
+        if not self.path:
+            return
+        target = self._file(name)
+        tmp_path = f"{target}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, "w") as f:
+                json.dump({"name": name, "value": value, "expires_at": time.time() + self.ttl}, f)
+            os.replace(tmp_path, target)
+        except OSError:
+            pass
+
+
+class SecretResolver:
+    """Resolve many secrets concurrently with per-process memoization."""
+
+    def __init__(self, backend=None, store=None, max_workers=MAX_WORKERS):
+        self.backend = backend or GcloudBackend()
+        self.store = store
+        self.max_workers = max_workers
+        self._memo = {}
+        self._lock = threading.Lock()
+
+    def _fetch_one(self, name):
+        value = self.store.get(name) if self.store else MISS
+        if value is MISS:
+            value = self.backend.fetch(name)
+            # Missing secrets are cached too, so an empty primary doesn't
+            # cost a gcloud call on every run before its *_test fallback
+            if self.store:
+                self.store.put(name, value)
+        return value
+
+    def resolve(self, names):
+        """Return {name: value or None}, fetching uncached names in parallel."""
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            pending = [n for n in names if n not in self._memo]
+
+        if pending:
+            workers = max(1, min(self.max_workers, len(pending)))
+            with ThreadPoolExecutor(max_workers=workers) as pool:
+                values = list(pool.map(self._fetch_one, pending))
+            with self._lock:
+                self._memo.update(zip(pending, values))
+
+        with self._lock:
+            return {n: self._memo.get(n) for n in names}
+
+    def resolve_first(self, chains):
+        """
+        chains: {key: [candidate secret names in priority order]}
+        Returns {key: first non-empty value or None}. All candidates of all
+        chains are fetched in one concurrent wave.
+        """
+        values = self.resolve(name for candidates in chains.values() for name in candidates)
+        result = {}
+        for key, candidates in chains.items():
+            result[key] = next((values[n] for n in candidates if values.get(n)), None)
+        return result
+
+    def get(self, name):
+        return self.resolve([name])[name]
+
+
+_RESOLVER = None
+_RESOLVER_LOCK = threading.Lock()
+
+
+def get_resolver():
+    """Process-wide resolver configured from the environment."""
+    global _RESOLVER
+    with _RESOLVER_LOCK:
+        if _RESOLVER is None:
+            ttl = int(os.environ.get("DIRECTUS_SECRET_CACHE_TTL", "0") or 0)
+            store = None
+            if ttl > 0:
+                store = TmpfsStore(ttl, path=os.environ.get("DIRECTUS_SECRET_CACHE_DIR"))
+            _RESOLVER = SecretResolver(store=store)
+        return _RESOLVER
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+"""
+seed_engine.py - Batched, idempotent item seeding for Directus collections
+
+Seeding used to do one GET (does it exist?) plus one POST per row, so every
+extra legal or default page added two round trips. This module seeds a whole
+collection with a constant number of requests:
+
+1. ONE lookup per collection for every seed key at once:
+       GET /items/pages?filter[permalink][_in]=/,/privacy,/terms&fields=id,permalink&limit=-1
+2. ONE array POST for all rows that are missing:
+       POST /items/pages  [{...}, {...}]
+
+Rows are matched on a key field (id, permalink, ...), so re-running is a
+no-op. With update=True existing rows are kept current instead: the lookup
+also fetches the seeded fields, a content hash of the desired values is
+compared with the stored ones, and only rows that differ get ONE array
+PATCH /items/{collection} carrying just the changed fields (no writes, and
+no revision rows, when nothing changed). Very large seeds are split into
+chunks of IN_CHUNK keys / POST_CHUNK rows to keep URLs and request bodies
+reasonable.
+
+For generated datasets (seed_fixtures.py --synthetic-pages), seed_stream()
+consumes an iterator in batches of batch_size rows, so memory stays flat and
+each batch costs one lookup + one POST.
+
+Key values are joined with commas in the _in filter, so they must not
+contain commas themselves (ids, permalinks and slugs never do).
+
+A compound key (a list of fields, e.g. ["navigation", "page"]) is looked up
+with an _in filter on its first field and matched on all of them; its key
+values are the field values joined with "|".
+
+Usage:
+    from seed_engine import seed_items
+
+    result = seed_items(api_url, token, "pages", "permalink", rows, update=True)
+    page_ids = result["ids"]   # {permalink: id} for existing + created rows
+"""
+
+import json
+import hashlib
+import urllib.parse
+
+from directus_client import get_client
+
+IN_CHUNK = 100
+POST_CHUNK = 100
+PREVIEW_KEYS = 10
+
+
+def _chunks(items, size):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def _preview(keys):
+    shown = ", ".join(str(k) for k in keys[:PREVIEW_KEYS])
+    return shown + (f", ... (+{len(keys) - PREVIEW_KEYS})" if len(keys) > PREVIEW_KEYS else "")
+
+
+def key_fields(key_field):
+    """Fields of a key: a single field name or a list of them (compound key)."""
+    return [key_field] if isinstance(key_field, str) else list(key_field)
+
+
+def row_key(row, key_field):
+    return "|".join(str(row.get(name)) for name in key_fields(key_field))
+
+
+def content_hash(values):
+    return hashlib.sha256(json.dumps(values, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def changed_fields(desired, current):
+    """Subset of `desired` whose values differ from the stored row."""
+    return {
+        name: value for name, value in desired.items()
+        if content_hash(value) != content_hash(current.get(name))
+    }
+
+
+def find_existing(api_url, token, collection, key_field, values, client=None, extra_fields=()):
+    """
+    {key value: row} for rows of `collection` whose key_field is in `values`
+    (for a compound key: whose first field is in `values`).
+    Returns (rows_by_key, requests, error) - error is the failed response or None.
+    """
+    client = client or get_client()
+    names = key_fields(key_field)
+    wanted = [str(v) for v in dict.fromkeys(values)]
+    fields = ",".join(dict.fromkeys(["id", *names, *extra_fields]))
+    found, requests = {}, 0
+
+    for chunk in _chunks(wanted, IN_CHUNK):
+        in_value = ",".join(urllib.parse.quote(v, safe="/") for v in chunk)
+        url = (f"{api_url}/items/{collection}?filter[{names[0]}][_in]={in_value}"
+               f"&fields={fields}&limit=-1")
+        res = client.request("GET", url, token=token)
+        requests += 1
+        if "error" in res:
+            return found, requests, res
+        for row in res.get("data") or []:
+            found.setdefault(row_key(row, key_field), row)
+    return found, requests, None
+
+
+def create_items(api_url, token, collection, rows, client=None):
+    """
+    Array POST of `rows` in chunks of POST_CHUNK (no existence check).
+    Returns (created_rows, failed_rows, requests).
+    """
+    client = client or get_client()
+    created, failed, requests = [], [], 0
+    for chunk in _chunks(rows, POST_CHUNK):
+        res = client.request("POST", f"{api_url}/items/{collection}", data=chunk, token=token)
+        requests += 1
+        if "error" in res:
+            # Directus inserts an array in one transaction: the whole chunk failed
+            print(f"   [ERROR] {collection}: create failed: HTTP {res['error']} - {res.get('message')}")
+            failed.extend(chunk)
+            continue
+        data = res.get("data") or []
+        created.extend([data] if isinstance(data, dict) else data)
+    return created, failed, requests
+
+
+def update_items(api_url, token, collection, rows, client=None):
+    """
+    Array PATCH of partial rows (each with its "id") in chunks of POST_CHUNK.
+    Returns (failed_rows, requests).
+    """
+    client = client or get_client()
+    failed, requests = [], 0
+    for chunk in _chunks(rows, POST_CHUNK):
+        res = client.request("PATCH", f"{api_url}/items/{collection}", data=chunk, token=token)
+        requests += 1
+        if "error" in res:
+            print(f"   [ERROR] {collection}: update failed: HTTP {res['error']} - {res.get('message')}")
+            failed.extend(chunk)
+    return failed, requests
+
+
+def _plan_updates(by_key, existing, key_field):
+    """[(key, patch)] for existing rows whose seeded fields differ from the desired ones."""
+    patches, names = [], {"id", *key_fields(key_field)}
+    for key, row in by_key.items():
+        current = existing.get(key)
+        if current is None:
+            continue
+        desired = {name: value for name, value in row.items() if name not in names}
+        if content_hash(desired) == content_hash({name: current.get(name) for name in desired}):
+            continue
+        patch = changed_fields(desired, current)
+        patch["id"] = current["id"]
+        patches.append((key, patch))
+    return patches
+
+
+def seed_items(api_url, token, collection, key_field, rows, client=None, extra_fields=(), verbose=True,
+               update=False):
+    """
+    Create every row of `rows` whose key_field value does not exist yet; with
+    update=True also PATCH the changed fields of rows that do.
+
+    Returns {"ids": {key: id}, "existing": {key: row}, "created": [keys],
+             "updated": [keys], "skipped": [keys], "failed": [keys], "requests": n}.
+    "skipped" lists existing rows left untouched.
+    """
+    client = client or get_client()
+    result = {"ids": {}, "existing": {}, "created": [], "updated": [], "skipped": [], "failed": [], "requests": 0}
+    if not rows:
+        return result
+
+    names = key_fields(key_field)
+    by_key = {row_key(row, key_field): row for row in rows}
+    if update:
+        # The lookup must return the seeded fields so they can be compared
+        seeded = {name for row in rows for name in row if name != "id"}
+        extra_fields = tuple(extra_fields) + tuple(sorted(seeded))
+    existing, requests, error = find_existing(
+        api_url, token, collection, key_field, [row.get(names[0]) for row in rows],
+        client=client, extra_fields=extra_fields
+    )
+    result["requests"] += requests
+    if error:
+        # Without knowing what exists, creating would risk duplicates
+        print(f"[ERROR] {collection}: lookup failed: HTTP {error['error']} - {error.get('message')}")
+        result["failed"] = list(by_key)
+        return result
+
+    result["existing"] = existing
+    for key, row in existing.items():
+        result["ids"][key] = row.get("id")
+    missing = [key for key in by_key if key not in existing]
+
+    patches = _plan_updates(by_key, existing, key_field) if update else []
+    if patches:
+        if verbose:
+            print(f"[UPDATING] {collection}: {len(patches)} row(s) changed")
+            for key, patch in patches:
+                print(f"   ~ {key}: {', '.join(sorted(name for name in patch if name != 'id'))}")
+        failed, requests = update_items(api_url, token, collection, [patch for _, patch in patches], client=client)
+        result["requests"] += requests
+        failed_ids = {row["id"] for row in failed}
+        for key, patch in patches:
+            (result["failed"] if patch["id"] in failed_ids else result["updated"]).append(key)
+        if result["updated"] and verbose:
+            print(f"   [SUCCESS] {collection}: updated {len(result['updated'])}")
+
+    changed = {key for key, _ in patches}
+    result["skipped"] = [key for key in by_key if key in existing and key not in changed]
+
+    if result["skipped"] and verbose:
+        print(f"[SKIP] {collection}: {len(result['skipped'])} exist ({_preview(result['skipped'])})")
+    if not missing:
+        return result
+
+    if verbose:
+        print(f"[CREATING] {collection}: {len(missing)} row(s) ({_preview(missing)})...")
+    created, failed, requests = create_items(
+        api_url, token, collection, [by_key[key] for key in missing], client=client
+    )
+    result["requests"] += requests
+    failed_keys = {row_key(row, key_field) for row in failed}
+    result["failed"].extend(key for key in missing if key in failed_keys)
+    result["created"] = [key for key in missing if key not in failed_keys]
+    for key, row in zip(result["created"], created):
+        result["ids"][row_key(row, key_field) if all(name in row for name in names) else key] = row.get("id")
+
+    if result["created"] and verbose:
+        print(f"   [SUCCESS] {collection}: created {len(result['created'])}")
+    return result
+
+
+def seed_stream(api_url, token, collection, key_field, rows, batch_size=500, client=None, on_batch=None):
+    """
+    seed_items() over an iterable, batch_size rows at a time.
+
+    on_batch(result, rows) is called after every batch (e.g. to create
+    dependent rows for just the created keys) and returns the number of
+    requests it made. Returns totals:
+    {"created": n, "skipped": n, "failed": n, "requests": n, "batches": n}.
+    """
+    client = client or get_client()
+    totals = {"created": 0, "skipped": 0, "failed": 0, "requests": 0, "batches": 0}
+    batch = []
+
+    def flush():
+        result = seed_items(api_url, token, collection, key_field, batch, client=client, verbose=False)
+        totals["batches"] += 1
+        totals["requests"] += result["requests"]
+        for kind in ("created", "skipped", "failed"):
+            totals[kind] += len(result[kind])
+        if on_batch:
+            totals["requests"] += on_batch(result, batch) or 0
+        done = totals["created"] + totals["skipped"] + totals["failed"]
+        print(f"   [..] {collection}: {done} rows ({totals['created']} created, "
+              f"{totals['skipped']} existing, {totals['failed']} failed)")
+
+    for row in rows:
+        batch.append(row)
+        if len(batch) >= batch_size:
+            flush()
+            batch = []
+    if batch:
+        flush()
+    return totals
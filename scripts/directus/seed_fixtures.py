@@ -0,0 +1,456 @@
+#!/usr/bin/env python3
+"""
+seed_fixtures.py - Declarative fixture seeding + synthetic datasets for load tests
+
+Seeds Directus content from fixture files instead of hardcoded Python, and can
+generate production-scale synthetic content (e.g. 10k pages with N blocks each)
+to performance-test the public API and the frontend.
+
+FIXTURES (scripts/directus/fixtures/, applied in file-name order):
+
+    {
+      "collection": "pages",
+      "key": "permalink",          # idempotency key (one _in lookup per collection);
+                                   # a list of fields is a compound key
+      "aliases": {"permalink": "slug"},   # optional: field to send instead when the
+                                          # collection lacks one (key fields too)
+      "generate_id": "uuid",       # optional: uuid4 "id" for rows that have none
+      "update": true,              # optional: PATCH changed fields of existing rows
+      "rows": [
+        {"permalink": "/", "title": "Home Page", "status": "published"},
+        ...
+      ]
+    }
+
+- .json always works; .yaml/.yml need PyYAML (optional)
+- {"$ref": "pages:/"} in a row is replaced by the id of the "pages" row with
+  key "/" seeded earlier in the same run (dropped with a warning if unknown)
+- "fallback": {"page": {"url": "/"}} sends the given values instead of a field
+  the collection lacks or whose $ref is unknown (a key field is replaced by
+  the fallback fields)
+- Fields the live collection does not have (and no alias or fallback covers)
+  are not sent
+- Without "update" existing rows are never touched (editors own them); with it,
+  rows whose content hash differs get their changed fields PATCHed, batched
+  per collection
+
+SYNTHETIC DATA (--synthetic-pages N):
+- Pages /synthetic/page-000001 ... with deterministic ids, streamed in batches of
+  --batch-size (one _in lookup + one array POST per batch)
+- For every page created in a batch: --blocks-per-page block items spread over
+  --block-types, plus the pages_blocks rows linking them (M2A)
+- Block text is generated from the live schema (string/text fields only;
+  dropdowns get their first choice, relations are left empty)
+- Re-running only fills the gaps: existing pages are skipped, and existing
+  pages without their pages_blocks links (interrupted run) get them, keyed
+  on the deterministic block id in "item"
+
+Usage:
+    python3 scripts/directus/seed_fixtures.py
+    python3 scripts/directus/seed_fixtures.py --synthetic-pages 10000 --blocks-per-page 5 --batch-size 500
+    python3 scripts/directus/seed_fixtures.py --no-fixtures --synthetic-pages 100 --dry-run
+
+    from seed_fixtures import load_fixtures, seed_fixtures
+    ids = seed_fixtures(api_url, token, index, load_fixtures())
+
+ENVIRONMENT:
+    DIRECTUS_URL              - Directus base URL
+    DIRECTUS_ADMIN_EMAIL      - Admin email (or GSM secret)
+    DIRECTUS_ADMIN_PASSWORD   - Admin password (or GSM secret)
+"""
+
+import os
+import sys
+import json
+import time
+import uuid
+import argparse
+
+from collection_index import SNAPSHOT_PATH, CollectionIndex
+from directus_client import get_client
+from seed_engine import create_items, find_existing, key_fields, row_key, seed_items, seed_stream
+
+try:
+    import yaml
+except ImportError:  # PyYAML is optional: only .yaml/.yml fixtures need it
+    yaml = None
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+FIXTURE_SUFFIXES = (".json", ".yaml", ".yml")
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_BLOCKS_PER_PAGE = 3
+DEFAULT_BLOCK_TYPES = ["block_hero", "block_richtext", "block_faqs", "block_quote", "block_cta"]
+SYNTHETIC_PERMALINK = "/synthetic/page-{:06d}"
+
+# Fixed namespace: synthetic ids are the same on every run and every machine
+SYNTHETIC_NAMESPACE = uuid.UUID("6f1c3e0a-52a4-4f5e-9a57-0d6c1b7e2f10")
+
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit. Sed do eiusmod tempor "
+    "incididunt ut labore et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud "
+    "exercitation ullamco laboris nisi ut aliquip ex ea commodo consequat."
+)
+
+# Managed by Directus itself (timestamps, user stamps, ...)
+MANAGED_SPECIALS = {"date-created", "date-updated", "user-created", "user-updated", "uuid", "sort"}
+
+# Interfaces that point at other items/files: never filled with made-up text
+RELATIONAL_INTERFACE_MARKERS = ("file", "m2o", "m2m", "m2a", "o2m")
+
+
+# =============================================================================
+# FIXTURES
+# =============================================================================
+
+def load_fixture(path):
+    with open(path, "r") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise ValueError(f"{path}: PyYAML is not installed (pip install pyyaml) - use .json instead")
+            fixture = yaml.safe_load(f)
+        else:
+            fixture = json.load(f)
+
+    if not isinstance(fixture, dict) or not fixture.get("collection") or not fixture.get("key"):
+        raise ValueError(f"{path}: fixture needs 'collection', 'key' and 'rows'")
+    if not isinstance(fixture.get("rows"), list):
+        raise ValueError(f"{path}: 'rows' must be a list")
+    fixture["path"] = path
+    return fixture
+
+
+def load_fixtures(fixtures_dir=FIXTURES_DIR):
+    """All fixtures of a directory, in file-name order."""
+    names = sorted(name for name in os.listdir(fixtures_dir) if name.endswith(FIXTURE_SUFFIXES))
+    return [load_fixture(os.path.join(fixtures_dir, name)) for name in names]
+
+
+def resolve_refs(row, ids):
+    """Copy of `row` with {"$ref": "collection:key"} replaced; returns (row, unresolved)."""
+    resolved, unresolved = {}, []
+    for name, value in row.items():
+        if isinstance(value, dict) and "$ref" in value:
+            collection, _, key = value["$ref"].partition(":")
+            target = ids.get(collection, {}).get(key)
+            if target is None:
+                unresolved.append(f"{name} -> {value['$ref']}")
+                continue
+            value = target
+        resolved[name] = value
+    return resolved, unresolved
+
+
+def fixture_key(fixture, index):
+    """
+    The key the live collection supports: key fields it lacks are replaced by
+    their alias or their fallback fields. None when a key field has neither.
+    """
+    collection = fixture["collection"]
+    aliases, fallback = fixture.get("aliases") or {}, fixture.get("fallback") or {}
+    names = []
+    for name in key_fields(fixture["key"]):
+        if index.has_field(collection, name):
+            names.append(name)
+        elif index.has_field(collection, aliases.get(name)):
+            names.append(aliases[name])
+        elif any(index.has_field(collection, other) for other in fallback.get(name) or {}):
+            names.extend(other for other in fallback[name] if index.has_field(collection, other))
+        else:
+            return None
+    return names[0] if len(names) == 1 else names
+
+
+def prepare_rows(fixture, index, ids):
+    """Rows ready to send: refs resolved, fallbacks and aliases applied, ids generated, unknown fields dropped."""
+    collection, key = fixture["collection"], fixture["key"]
+    aliases, fallback = fixture.get("aliases") or {}, fixture.get("fallback") or {}
+    fields = index.field_names(collection)
+    rows, dropped = [], set()
+
+    for row in fixture["rows"]:
+        row, unresolved = resolve_refs(row, ids)
+        for ref in unresolved:
+            print(f"   [WARN] {collection} {row_key(row, key)}: unresolved reference {ref}")
+        for name, values in fallback.items():
+            if name not in row or (fields and name not in fields):
+                row.pop(name, None)
+                row.update({other: value for other, value in values.items() if other not in row})
+        if fixture.get("generate_id") == "uuid" and "id" not in row:
+            row["id"] = str(uuid.uuid4())
+        if fields:
+            row = {
+                aliases[name] if name not in fields and aliases.get(name) in fields else name: value
+                for name, value in row.items()
+            }
+            dropped.update(name for name in row if name not in fields)
+            row = {name: value for name, value in row.items() if name in fields}
+        rows.append(row)
+
+    if dropped:
+        print(f"[INFO] {collection}: not in schema, not sent: {', '.join(sorted(dropped))}")
+    return rows
+
+
+def seed_fixtures(api_url, token, index, fixtures, client=None):
+    """
+    Seed every fixture in order. Returns {collection: {key: id}} for all rows
+    that exist afterwards (used to resolve $ref in later fixtures).
+    """
+    client = client or get_client()
+    ids, requests = {}, 0
+
+    for fixture in fixtures:
+        collection = fixture["collection"]
+        if collection not in index:
+            print(f"[WARN] {collection}: collection not found, skipping {fixture['path']}")
+            continue
+        key = fixture_key(fixture, index)
+        if key is None:
+            print(f"[WARN] {collection}: key field(s) {'+'.join(key_fields(fixture['key']))} not found, skipping {fixture['path']}")
+            continue
+
+        result = seed_items(api_url, token, collection, key, prepare_rows(fixture, index, ids),
+                            client=client, update=bool(fixture.get("update")))
+        ids.setdefault(collection, {}).update(result["ids"])
+        requests += result["requests"]
+
+    print(f"[OK] Fixtures seeded in {requests} request(s)")
+    return ids
+
+
+# =============================================================================
+# SYNTHETIC DATA
+# =============================================================================
+
+def synthetic_id(*parts):
+    return str(uuid.uuid5(SYNTHETIC_NAMESPACE, ":".join(str(p) for p in parts)))
+
+
+def synthetic_pages(count, fields, start=1):
+    """Lazily generated page rows (deterministic id + permalink)."""
+    for n in range(start, start + count):
+        row = {
+            "id": synthetic_id("pages", n),
+            "permalink": SYNTHETIC_PERMALINK.format(n),
+            "title": f"Synthetic Page {n}",
+            "summary": f"Synthetic page {n} for load testing. {LOREM[:120]}",
+            "status": "published",
+        }
+        yield {name: value for name, value in row.items() if name in fields}
+
+
+def fake_value(field_row, n):
+    """Generated value for a content field, or None to leave it out."""
+    meta = field_row.get("meta") or {}
+    schema = field_row.get("schema") or {}
+    if schema.get("is_primary_key") or schema.get("foreign_key_table"):
+        return None
+    if set(meta.get("special") or []) & MANAGED_SPECIALS:
+        return None
+    if any(marker in (meta.get("interface") or "") for marker in RELATIONAL_INTERFACE_MARKERS):
+        return None
+
+    choices = (meta.get("options") or {}).get("choices")
+    if choices:
+        first = choices[0]
+        return first.get("value") if isinstance(first, dict) else first
+
+    field_type = field_row.get("type")
+    name = field_row.get("field")
+    if field_type == "string":
+        value = f"{name.replace('_', ' ').capitalize()} {n}"
+        return value[: schema.get("max_length") or 255]
+    if field_type == "text":
+        return f"{LOREM} ({n})"
+    return None
+
+
+def block_templates(index, block_types):
+    """{block collection: [field rows to fill]} for the block types that exist."""
+    templates = {}
+    for collection in block_types:
+        fields = index.fields(collection)
+        if not fields:
+            print(f"[WARN] {collection}: not found, no synthetic blocks of this type")
+            continue
+        templates[collection] = [
+            row for name, row in sorted(fields.items())
+            if index.relation(collection, name) is None
+        ]
+    return templates
+
+
+def block_row(collection, template, page_n, position):
+    row = {"id": synthetic_id(collection, page_n, position)}
+    for field_row in template:
+        value = fake_value(field_row, page_n)
+        if value is not None:
+            row[field_row["field"]] = value
+    return row
+
+
+def make_block_seeder(api_url, token, templates, blocks_per_page, client):
+    """
+    on_batch callback for seed_stream: blocks + pages_blocks for the pages of
+    the batch. Links are keyed on "item" (the deterministic block id), so
+    pages left without blocks by an interrupted run are completed on re-run.
+    """
+    block_types = sorted(templates)
+
+    def seed_blocks(result, rows):
+        if not block_types:
+            return 0
+        created = set(result["created"])
+        blocks, links, requests = {}, [], 0
+
+        for row in rows:
+            page_id = result["ids"].get(row["permalink"])
+            if not page_id:
+                continue
+            page_n = int(row["permalink"].rsplit("-", 1)[1])
+            for position in range(blocks_per_page):
+                collection = block_types[(page_n + position) % len(block_types)]
+                block = block_row(collection, templates[collection], page_n, position)
+                links.append(({"pages_id": page_id, "collection": collection,
+                               "item": block["id"], "sort": position + 1}, block, row["permalink"] in created))
+
+        # Pages created in this batch cannot have links yet: only existing pages are looked up
+        existing_items = {link["item"] for link, _, is_new in links if not is_new}
+        if existing_items:
+            found, lookups, error = find_existing(api_url, token, "pages_blocks", "item", sorted(existing_items),
+                                                  client=client)
+            requests += lookups
+            if error:
+                print(f"   [ERROR] pages_blocks: lookup failed: HTTP {error['error']} - {error.get('message')}")
+                return requests
+            existing_items = set(found)
+        missing = [(link, block) for link, block, _ in links if link["item"] not in existing_items]
+        if not missing:
+            return requests
+
+        for link, block in missing:
+            blocks.setdefault(link["collection"], []).append(block)
+        for collection, block_rows in blocks.items():
+            # Keyed on the deterministic id: blocks of a crashed batch are not duplicated
+            requests += seed_items(api_url, token, collection, "id", block_rows,
+                                   client=client, verbose=False)["requests"]
+        _, failed, link_requests = create_items(api_url, token, "pages_blocks", [link for link, _ in missing],
+                                                client=client)
+        if failed:
+            print(f"   [ERROR] pages_blocks: {len(failed)} link(s) not created")
+        return requests + link_requests
+
+    return seed_blocks
+
+
+def seed_synthetic(api_url, token, index, pages, blocks_per_page=DEFAULT_BLOCKS_PER_PAGE,
+                   block_types=DEFAULT_BLOCK_TYPES, batch_size=DEFAULT_BATCH_SIZE, client=None):
+    print(f"\n--- [Synthetic Data] {pages} pages x {blocks_per_page} blocks (batch {batch_size}) ---")
+    client = client or get_client()
+    if "pages" not in index:
+        print("[ERROR] pages collection not found")
+        return None
+
+    on_batch = None
+    if blocks_per_page > 0:
+        if "pages_blocks" in index:
+            templates = block_templates(index, block_types)
+            on_batch = make_block_seeder(api_url, token, templates, blocks_per_page, client)
+        else:
+            print("[WARN] pages_blocks collection not found, seeding pages without blocks")
+
+    started = time.perf_counter()
+    totals = seed_stream(api_url, token, "pages", "permalink",
+                         synthetic_pages(pages, index.field_names("pages")),
+                         batch_size=batch_size, client=client, on_batch=on_batch)
+    elapsed = time.perf_counter() - started
+    print(f"[OK] Synthetic pages: {totals['created']} created, {totals['skipped']} existing, "
+          f"{totals['failed']} failed - {totals['requests']} requests in {elapsed:.1f}s")
+    return totals
+
+
+def dry_run(index, fixtures, pages, blocks_per_page, block_types, batch_size):
+    """Count what would be sent without touching the server."""
+    print("\n--- [Dry Run] ---")
+    ids = {}
+    for fixture in fixtures:
+        if fixture["collection"] in index:
+            rows = prepare_rows(fixture, index, ids)
+            mode = ", updating changed rows" if fixture.get("update") else ""
+            print(f"WOULD SEED {fixture['collection']}: {len(rows)} row(s) keyed on "
+                  f"{'+'.join(key_fields(fixture_key(fixture, index) or fixture['key']))}{mode}")
+
+    if pages:
+        templates = block_templates(index, block_types)
+        started = time.perf_counter()
+        generated = sum(1 for _ in synthetic_pages(pages, index.field_names("pages")))
+        elapsed = time.perf_counter() - started
+        print(f"WOULD SEED pages: {generated} synthetic row(s) in {-(-pages // batch_size)} batch(es) "
+              f"(generated in {elapsed * 1000:.0f} ms)")
+        if templates:
+            collection = sorted(templates)[0]
+            sample = block_row(collection, templates[collection], 1, 0)
+            print(f"WOULD SEED blocks: {pages * blocks_per_page} over {', '.join(sorted(templates))}")
+            print(f"Sample block: {json.dumps(sample)[:200]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed Directus from fixtures and synthetic datasets")
+    parser.add_argument("--fixtures", default=FIXTURES_DIR, help="Fixture directory (default: %(default)s)")
+    parser.add_argument("--no-fixtures", action="store_true", help="Only seed synthetic data")
+    parser.add_argument("--synthetic-pages", type=int, default=0, metavar="N", help="Generate N synthetic pages")
+    parser.add_argument("--blocks-per-page", type=int, default=DEFAULT_BLOCKS_PER_PAGE, metavar="N",
+                        help="Blocks per synthetic page (default: %(default)s)")
+    parser.add_argument("--block-types", default=",".join(DEFAULT_BLOCK_TYPES),
+                        help="Comma-separated block collections (default: %(default)s)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE,
+                        help="Synthetic pages per batch (default: %(default)s)")
+    parser.add_argument("--dry-run", action="store_true",
+                        help=f"Count rows against a stored snapshot ({SNAPSHOT_PATH}) without writing")
+    parser.add_argument("--snapshot", default=SNAPSHOT_PATH, help="Snapshot used by --dry-run")
+    args = parser.parse_args()
+
+    if args.batch_size < 1:
+        parser.error("--batch-size must be at least 1")
+    block_types = [name.strip() for name in args.block_types.split(",") if name.strip()]
+    fixtures = [] if args.no_fixtures else load_fixtures(args.fixtures)
+
+    print("--- [Fixture Seed] ---")
+    if args.dry_run:
+        index = CollectionIndex.from_snapshot(args.snapshot)
+        dry_run(index, fixtures, args.synthetic_pages, args.blocks_per_page, block_types, args.batch_size)
+        return 0
+
+    # Imported here: --dry-run works without credentials
+    from directus_auth import DirectusAuth
+
+    api_url = os.environ.get("DIRECTUS_URL")
+    if not api_url:
+        print("[ERROR] Missing DIRECTUS_URL environment variable")
+        return 1
+    api_url = api_url.rstrip("/")
+    token = DirectusAuth(api_url).token()
+    if not token:
+        print("[ERROR] Auth failed")
+        return 1
+
+    # Relations are needed so synthetic blocks leave relational fields empty
+    index = CollectionIndex.from_api(api_url, token, include_relations=True)
+
+    if fixtures:
+        seed_fixtures(api_url, token, index, fixtures)
+    if args.synthetic_pages > 0:
+        totals = seed_synthetic(api_url, token, index, args.synthetic_pages, args.blocks_per_page,
+                                block_types, args.batch_size)
+        if totals is None or totals["failed"]:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
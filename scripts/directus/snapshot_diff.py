@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+snapshot_diff.py - Merkle-hash diff between two Directus schema snapshots
+
+Compares snapshots top-down over a hash tree instead of loading and eyeballing
+both blobs:
+
+    root  = hash over (collection, collection hash) pairs
+    collection hash = SHA256 of its canonical shard (snapshot_store.py):
+                      definition + fields + relations
+    leaves = one hash per collection definition, field and relation
+
+Equal roots stop immediately. Otherwise only collections whose hashes differ
+are expanded, and inside them only fields/relations whose leaf hashes differ
+are reported (with the changed keys when --details is given). Sharded exports
+are compared straight from their manifests, so unchanged shards are never
+opened.
+
+Each side can be a snapshot JSON file, a sharded directory (snapshot_store.py
+export) or "live" (GET /schema/snapshot, needs DIRECTUS_URL + admin login).
+
+Usage:
+    python3 scripts/directus/snapshot_diff.py directus/snapshot.json directus/snapshot-full.json
+    python3 scripts/directus/snapshot_diff.py directus/snapshot.json live --details
+    python3 scripts/directus/snapshot_diff.py old_dir new_dir --json
+
+Exit code: 0 identical, 1 different, 2 error.
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+
+from snapshot_store import (
+    build_shards, canonical_bytes, load_manifest, load_shard, load_snapshot_file, root_hash, sha256_hex,
+)
+
+
+def leaf_hash(row):
+    return sha256_hex(canonical_bytes(row))
+
+
+class SnapshotTree:
+    """Collection-level hashes plus lazy access to each collection's shard."""
+
+    def __init__(self, label, hashes, loader):
+        self.label = label
+        self.hashes = hashes  # {collection: sha256}
+        self._loader = loader
+        self.root = root_hash({name: {"sha256": h} for name, h in hashes.items()})
+
+    def shard(self, collection):
+        return self._loader(collection)
+
+    @classmethod
+    def from_snapshot(cls, label, snapshot):
+        shards = build_shards(snapshot)
+        hashes = {name: sha256_hex(canonical_bytes(shard)) for name, shard in shards.items()}
+        return cls(label, hashes, shards.get)
+
+    @classmethod
+    def from_store(cls, store_dir):
+        manifest = load_manifest(store_dir)
+        hashes = {name: entry["sha256"] for name, entry in manifest["shards"].items()}
+        return cls(store_dir, hashes, lambda name: load_shard(store_dir, manifest, name))
+
+
+def fetch_live_snapshot():
+    # Imported lazily: offline comparisons need neither DIRECTUS_URL nor credentials
+    from directus_auth import DirectusAuth
+    from directus_client import get_client
+
+    api_url = os.environ.get("DIRECTUS_URL")
+    if not api_url:
+        raise ValueError("Missing DIRECTUS_URL environment variable (needed for 'live')")
+    token = DirectusAuth(api_url).token()
+    if not token:
+        raise ValueError("Auth failed")
+    res = get_client().request("GET", f"{api_url.rstrip('/')}/schema/snapshot", token=token)
+    if "error" in res:
+        raise ValueError(f"GET /schema/snapshot failed: HTTP {res['error']} - {res.get('message')}")
+    return res.get("data", res)
+
+
+def load_tree(source):
+    if source == "live":
+        return SnapshotTree.from_snapshot("live", fetch_live_snapshot())
+    if os.path.isdir(source):
+        return SnapshotTree.from_store(source)
+    return SnapshotTree.from_snapshot(source, load_snapshot_file(source))
+
+
+def changed_keys(old, new, prefix=""):
+    """Dotted paths whose values differ between two JSON values."""
+    if isinstance(old, dict) and isinstance(new, dict):
+        paths = []
+        for key in sorted(set(old) | set(new)):
+            paths.extend(changed_keys(old.get(key), new.get(key), f"{prefix}{key}."))
+        return paths
+    if old != new:
+        return [(prefix.rstrip("."), old, new)]
+    return []
+
+
+def diff_rows(old_rows, new_rows, details):
+    """Compare two lists of field/relation rows keyed by "field"."""
+    old_by_name = {row.get("field"): row for row in old_rows}
+    new_by_name = {row.get("field"): row for row in new_rows}
+    result = {"added": sorted(set(new_by_name) - set(old_by_name)),
+              "removed": sorted(set(old_by_name) - set(new_by_name)),
+              "changed": []}
+    for name in sorted(set(old_by_name) & set(new_by_name)):
+        if leaf_hash(old_by_name[name]) == leaf_hash(new_by_name[name]):
+            continue
+        entry = {"field": name}
+        if details:
+            entry["keys"] = [
+                {"path": path, "old": old, "new": new}
+                for path, old, new in changed_keys(old_by_name[name], new_by_name[name])
+            ]
+        result["changed"].append(entry)
+    return result
+
+
+def diff_trees(old, new, details=False):
+    """Top-down comparison; returns a JSON-serialisable report."""
+    report = {"old": old.label, "new": new.label, "identical": old.root == new.root,
+              "collections": {"added": [], "removed": [], "changed": {}}}
+    if report["identical"]:
+        return report
+
+    collections = report["collections"]
+    collections["added"] = sorted(set(new.hashes) - set(old.hashes))
+    collections["removed"] = sorted(set(old.hashes) - set(new.hashes))
+
+    for name in sorted(set(old.hashes) & set(new.hashes)):
+        if old.hashes[name] == new.hashes[name]:
+            continue
+        old_shard, new_shard = old.shard(name), new.shard(name)
+        change = {}
+        if leaf_hash(old_shard.get("definition")) != leaf_hash(new_shard.get("definition")):
+            change["definition"] = (
+                [{"path": p, "old": o, "new": n}
+                 for p, o, n in changed_keys(old_shard.get("definition"), new_shard.get("definition"))]
+                if details else True
+            )
+        for section in ("fields", "relations"):
+            section_diff = diff_rows(old_shard.get(section, []), new_shard.get(section, []), details)
+            if any(section_diff.values()):
+                change[section] = section_diff
+        collections["changed"][name] = change
+    return report
+
+
+def summarize(report):
+    totals = {"collections": [0, 0, 0], "fields": [0, 0, 0], "relations": [0, 0, 0]}
+    collections = report["collections"]
+    totals["collections"] = [len(collections["added"]), len(collections["removed"]), len(collections["changed"])]
+    for change in collections["changed"].values():
+        for section in ("fields", "relations"):
+            if section in change:
+                counts = totals[section]
+                counts[0] += len(change[section]["added"])
+                counts[1] += len(change[section]["removed"])
+                counts[2] += len(change[section]["changed"])
+    return totals
+
+
+def print_report(report, details=False):
+    collections = report["collections"]
+    for name in collections["added"]:
+        print(f"+ {name}")
+    for name in collections["removed"]:
+        print(f"- {name}")
+    for name, change in collections["changed"].items():
+        print(f"~ {name}")
+        if "definition" in change:
+            print("    ~ (collection definition)")
+            if details:
+                for key in change["definition"]:
+                    print(f"        {key['path']}: {key['old']!r} -> {key['new']!r}")
+        for section in ("fields", "relations"):
+            if section not in change:
+                continue
+            label = "field" if section == "fields" else "relation"
+            for field in change[section]["added"]:
+                print(f"    + {label} {field}")
+            for field in change[section]["removed"]:
+                print(f"    - {label} {field}")
+            for entry in change[section]["changed"]:
+                print(f"    ~ {label} {entry['field']}")
+                for key in entry.get("keys", []):
+                    print(f"        {key['path']}: {key['old']!r} -> {key['new']!r}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Merkle-hash diff of two Directus schema snapshots")
+    parser.add_argument("old", help="Snapshot JSON file, sharded directory or 'live'")
+    parser.add_argument("new", help="Snapshot JSON file, sharded directory or 'live'")
+    parser.add_argument("--details", action="store_true", help="Show the changed keys of every changed entity")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    old, new = load_tree(args.old), load_tree(args.new)
+    loaded = time.perf_counter()
+    report = diff_trees(old, new, details=args.details)
+    finished = time.perf_counter()
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+        return 0 if report["identical"] else 1
+
+    print(f"--- [Snapshot Diff] {args.old} -> {args.new} ---")
+    if report["identical"]:
+        print(f"[SAME] Root hashes match ({old.root[:16]})")
+    else:
+        print_report(report, details=args.details)
+        totals = summarize(report)
+        print("\n" + ", ".join(
+            f"{section}: +{counts[0]} -{counts[1]} ~{counts[2]}" for section, counts in totals.items()
+        ))
+    print(f"Timing: load+hash {(loaded - started) * 1000:.1f} ms, diff {(finished - loaded) * 1000:.1f} ms")
+    return 0 if report["identical"] else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
@@ -0,0 +1,278 @@
+#!/usr/bin/env python3
+"""
+snapshot_store.py - Canonical, sharded, content-addressed schema snapshots
+
+directus/snapshot.json and snapshot-full.json are single JSON blobs in server
+key order, so git diffs are noisy and every comparison loads everything. This
+module exports a snapshot as a directory:
+
+    <dir>/manifest.json                - header + one entry per collection shard
+    <dir>/collections/<collection>.json - {"collection", "definition", "fields", "relations"}
+
+- Canonical: sorted keys, fields/relations sorted by field name, 2-space indent,
+  trailing newline -> the same schema always produces the same bytes
+- Content-addressed: the manifest records each shard's SHA256 and a root hash
+  over all shards; shards are verified against it when loaded
+- Incremental: re-exporting only rewrites shards whose hash changed and removes
+  shards of dropped collections
+- Cheap comparison: two exports are compared by manifest alone; only changed
+  shards ever need to be opened
+
+Usage:
+    python3 scripts/directus/snapshot_store.py export directus/snapshot-full.json directus/snapshot-full
+    python3 scripts/directus/snapshot_store.py compare directus/snapshot directus/snapshot-full
+    python3 scripts/directus/snapshot_store.py assemble directus/snapshot-full /tmp/snapshot.json
+
+    from snapshot_store import assemble, load_manifest, compare_manifests
+    snapshot = assemble("directus/snapshot-full")   # plain /schema/snapshot dict
+"""
+
+import os
+import re
+import sys
+import json
+import hashlib
+import argparse
+
+FORMAT = "directus-snapshot-shards/1"
+MANIFEST_NAME = "manifest.json"
+SHARD_DIR = "collections"
+HEADER_KEYS = ("version", "directus", "vendor")
+
+
+def canonical_bytes(data):
+    return (json.dumps(data, sort_keys=True, indent=2, ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def sha256_hex(raw):
+    return hashlib.sha256(raw).hexdigest()
+
+
+def shard_filename(collection):
+    # Collection names are identifiers; anything else is escaped so paths stay flat
+    safe = re.sub(r"[^A-Za-z0-9_.-]", lambda m: f"%{ord(m.group(0)):02x}", collection)
+    return f"{SHARD_DIR}/{safe}.json"
+
+
+def load_snapshot_file(path):
+    with open(path, "r") as f:
+        snapshot = json.load(f)
+    # fetch_snapshot.py may store the raw API envelope ({"data": {...}})
+    return snapshot.get("data", snapshot)
+
+
+def build_shards(snapshot):
+    """{collection: shard_dict} for every collection named in the snapshot."""
+    shards = {}
+
+    def shard(name):
+        # definition: the collection row minus its name (None for fields/relations
+        # of collections the snapshot does not define, e.g. directus_* system ones)
+        return shards.setdefault(name, {"collection": name, "definition": None,
+                                        "fields": [], "relations": []})
+
+    for row in snapshot.get("collections", []):
+        shard(row["collection"])["definition"] = {k: v for k, v in row.items() if k != "collection"}
+    for row in snapshot.get("fields", []):
+        shard(row["collection"])["fields"].append(row)
+    for row in snapshot.get("relations", []):
+        shard(row["collection"])["relations"].append(row)
+
+    for entry in shards.values():
+        entry["fields"].sort(key=lambda row: row.get("field") or "")
+        entry["relations"].sort(key=lambda row: row.get("field") or "")
+    return shards
+
+
+def root_hash(entries, header=None):
+    """Hash over the shard hashes, plus the version/directus/vendor header when given."""
+    digest = hashlib.sha256()
+    for key in HEADER_KEYS if header is not None else ():
+        digest.update(f"{key}\0{json.dumps(header.get(key), sort_keys=True)}\n".encode("utf-8"))
+    for name in sorted(entries):
+        digest.update(f"{name}\0{entries[name]['sha256']}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def build_manifest(snapshot, shards_bytes):
+    entries = {}
+    for name, raw in shards_bytes.items():
+        entries[name] = {"path": shard_filename(name), "sha256": sha256_hex(raw)}
+    manifest = {"format": FORMAT}
+    for key in HEADER_KEYS:
+        manifest[key] = snapshot.get(key)
+    manifest["root"] = root_hash(entries, header=manifest)
+    manifest["shards"] = entries
+    return manifest
+
+
+def _write_atomic(path, raw):
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(raw)
+    os.replace(tmp_path, path)
+
+
+def export(snapshot, out_dir):
+    """
+    Write `snapshot` as a sharded export into `out_dir`.
+    Returns {"written": [...], "unchanged": n, "removed": [...], "manifest": manifest}.
+    """
+    shards_bytes = {name: canonical_bytes(shard) for name, shard in build_shards(snapshot).items()}
+    manifest = build_manifest(snapshot, shards_bytes)
+
+    previous = load_manifest(out_dir) if os.path.exists(os.path.join(out_dir, MANIFEST_NAME)) else None
+    old_entries = (previous or {}).get("shards", {})
+
+    os.makedirs(os.path.join(out_dir, SHARD_DIR), exist_ok=True)
+    written = []
+    for name, raw in shards_bytes.items():
+        entry = manifest["shards"][name]
+        path = os.path.join(out_dir, entry["path"])
+        if old_entries.get(name, {}).get("sha256") == entry["sha256"] and os.path.exists(path):
+            continue
+        _write_atomic(path, raw)
+        written.append(name)
+
+    removed = []
+    for name, entry in old_entries.items():
+        if name not in manifest["shards"]:
+            try:
+                os.remove(os.path.join(out_dir, entry["path"]))
+            except OSError:
+                pass
+            removed.append(name)
+
+    _write_atomic(os.path.join(out_dir, MANIFEST_NAME), canonical_bytes(manifest))
+    return {
+        "written": sorted(written),
+        "unchanged": len(shards_bytes) - len(written),
+        "removed": sorted(removed),
+        "manifest": manifest,
+    }
+
+
+def load_manifest(store_dir):
+    with open(os.path.join(store_dir, MANIFEST_NAME), "r") as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{store_dir}: unsupported snapshot store format {manifest.get('format')!r}")
+    return manifest
+
+
+def load_shard(store_dir, manifest, collection, verify=True):
+    """One collection shard, checked against its manifest hash."""
+    entry = manifest["shards"][collection]
+    with open(os.path.join(store_dir, entry["path"]), "rb") as f:
+        raw = f.read()
+    if verify and sha256_hex(raw) != entry["sha256"]:
+        raise ValueError(f"{store_dir}: shard {collection} does not match its manifest hash")
+    return json.loads(raw)
+
+
+def assemble(store_dir, verify=True):
+    """Rebuild a plain /schema/snapshot dict from a sharded export."""
+    manifest = load_manifest(store_dir)
+    snapshot = {key: manifest.get(key) for key in HEADER_KEYS}
+    snapshot.update({"collections": [], "fields": [], "relations": []})
+    for name in sorted(manifest["shards"]):
+        shard = load_shard(store_dir, manifest, name, verify=verify)
+        if shard.get("definition") is not None:
+            snapshot["collections"].append(dict({"collection": name}, **shard["definition"]))
+        snapshot["fields"].extend(shard["fields"])
+        snapshot["relations"].extend(shard["relations"])
+    return snapshot
+
+
+def load_any(path):
+    """Snapshot dict from a sharded export directory or a snapshot JSON file."""
+    if os.path.isdir(path):
+        return assemble(path)
+    return load_snapshot_file(path)
+
+
+def manifest_for(path):
+    """Manifest of a sharded export, or one computed in memory for a JSON file."""
+    if os.path.isdir(path):
+        return load_manifest(path)
+    snapshot = load_snapshot_file(path)
+    shards_bytes = {name: canonical_bytes(shard) for name, shard in build_shards(snapshot).items()}
+    return build_manifest(snapshot, shards_bytes)
+
+
+def compare_manifests(old, new):
+    """
+    {"header": [changed header keys], "added", "removed", "changed": [collection names]}
+    (empty lists when roots match).
+    """
+    if old.get("root") == new.get("root"):
+        return {"header": [], "added": [], "removed": [], "changed": []}
+    old_shards = old.get("shards", {})
+    new_shards = new.get("shards", {})
+    return {
+        "header": [key for key in HEADER_KEYS if old.get(key) != new.get(key)],
+        "added": sorted(set(new_shards) - set(old_shards)),
+        "removed": sorted(set(old_shards) - set(new_shards)),
+        "changed": sorted(
+            name for name in set(old_shards) & set(new_shards)
+            if old_shards[name]["sha256"] != new_shards[name]["sha256"]
+        ),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Canonical sharded Directus snapshot store")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    p_export = sub.add_parser("export", help="Export a snapshot JSON file as a sharded directory")
+    p_export.add_argument("snapshot", help="Snapshot JSON file (raw or {\"data\": ...} envelope)")
+    p_export.add_argument("out_dir", help="Target directory")
+
+    p_compare = sub.add_parser("compare", help="Compare two snapshots (directories or JSON files) by manifest")
+    p_compare.add_argument("old")
+    p_compare.add_argument("new")
+
+    p_assemble = sub.add_parser("assemble", help="Rebuild a snapshot JSON file from a sharded directory")
+    p_assemble.add_argument("store_dir")
+    p_assemble.add_argument("output")
+
+    args = parser.parse_args()
+
+    if args.command == "export":
+        result = export(load_snapshot_file(args.snapshot), args.out_dir)
+        manifest = result["manifest"]
+        print(f"[OK] {args.out_dir}: {len(manifest['shards'])} shards, root {manifest['root'][:16]}")
+        print(f"     written {len(result['written'])}, unchanged {result['unchanged']}, removed {len(result['removed'])}")
+        return 0
+
+    if args.command == "compare":
+        old, new = manifest_for(args.old), manifest_for(args.new)
+        changes = compare_manifests(old, new)
+        if not any(changes.values()):
+            print("[SAME] Snapshots are identical")
+            return 0
+        for key in changes["header"]:
+            print(f"~ {key}: {old.get(key)} -> {new.get(key)}")
+        for kind, prefix in (("added", "+"), ("removed", "-"), ("changed", "~")):
+            for name in changes[kind]:
+                print(f"{prefix} {name}")
+        print(f"\n{len(changes['added'])} added, {len(changes['removed'])} removed, {len(changes['changed'])} changed")
+        return 1
+
+    if args.command == "assemble":
+        snapshot = assemble(args.store_dir)
+        with open(args.output, "w") as f:
+            json.dump(snapshot, f)
+        print(f"[OK] Wrote {args.output}: {len(snapshot['collections'])} collections, "
+              f"{len(snapshot['fields'])} fields, {len(snapshot['relations'])} relations")
+        return 0
+
+    return 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
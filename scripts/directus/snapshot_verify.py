@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+"""
+snapshot_verify.py - Structural verification of a Directus schema snapshot
+
+Replaces the old "is the word in the JSON text" sanity check (where a field
+named pages_count satisfied "pages") with rules checked against a
+collection/field/relation index built in ONE pass over the parsed snapshot:
+
+- required_collections: collections that must be defined
+- required_fields:      {collection: [field, ...]} that must exist
+- relations:            expected relation rows, matched on collection + field:
+                        related_collection, one_collection_field and
+                        one_allowed_collections (every listed collection must
+                        be allowed; extra ones are fine)
+
+Each relation rule may set "severity": "warning" (reported, not fatal) and a
+"description". --strict treats warnings as errors.
+
+Rules live in scripts/directus/snapshot_rules.json by default.
+
+Usage:
+    python3 scripts/directus/snapshot_verify.py directus/snapshot.json
+    python3 scripts/directus/snapshot_verify.py directus/snapshot-full --strict
+
+    from snapshot_verify import load_rules, verify
+    errors, warnings = verify(snapshot, load_rules())
+
+Exit code: 0 pass, 1 failed rules, 2 unreadable input.
+"""
+
+import sys
+import json
+import argparse
+
+from collection_index import CollectionIndex
+from snapshot_store import load_any
+
+RULES_PATH = "scripts/directus/snapshot_rules.json"
+
+# Relation rule keys compared against the relation row (None in the rule = must be empty)
+RELATION_ROW_KEYS = ("related_collection",)
+RELATION_META_KEYS = ("one_collection_field",)
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, "r") as f:
+        return json.load(f)
+
+
+def build_index(snapshot):
+    """One pass over collections, fields and relations."""
+    return CollectionIndex(
+        snapshot.get("collections", []),
+        snapshot.get("fields", []),
+        source="snapshot",
+        relations=snapshot.get("relations", []),
+    )
+
+
+def check_relation(index, rule):
+    """List of problems for one relation rule (empty when it holds)."""
+    collection, field = rule["collection"], rule["field"]
+    relation = index.relation(collection, field)
+    if relation is None:
+        return [f"relation {collection}.{field} is not defined"]
+
+    problems = []
+    meta = relation.get("meta") or {}
+    for key in RELATION_ROW_KEYS:
+        if key in rule and relation.get(key) != rule[key]:
+            problems.append(f"relation {collection}.{field}: {key} is {relation.get(key)!r}, expected {rule[key]!r}")
+    for key in RELATION_META_KEYS:
+        if key in rule and meta.get(key) != rule[key]:
+            problems.append(f"relation {collection}.{field}: meta.{key} is {meta.get(key)!r}, expected {rule[key]!r}")
+    if "one_allowed_collections" in rule:
+        allowed = set(meta.get("one_allowed_collections") or [])
+        missing = [name for name in rule["one_allowed_collections"] if name not in allowed]
+        if missing:
+            problems.append(f"relation {collection}.{field}: not allowed to reference {', '.join(missing)}")
+    return problems
+
+
+def verify(snapshot, rules, strict=False):
+    """Return (errors, warnings) as lists of messages."""
+    index = snapshot if isinstance(snapshot, CollectionIndex) else build_index(snapshot)
+    errors, warnings = [], []
+
+    for collection in rules.get("required_collections", []):
+        if collection not in index:
+            errors.append(f"collection {collection} is missing")
+
+    for collection, fields in rules.get("required_fields", {}).items():
+        if collection not in index:
+            if collection not in rules.get("required_collections", []):
+                errors.append(f"collection {collection} is missing (required fields: {', '.join(fields)})")
+            continue
+        missing = [field for field in fields if not index.has_field(collection, field)]
+        if missing:
+            errors.append(f"collection {collection} is missing fields: {', '.join(missing)}")
+
+    for rule in rules.get("relations", []):
+        problems = check_relation(index, rule)
+        if rule.get("severity") == "warning" and not strict:
+            warnings.extend(problems)
+        else:
+            errors.extend(problems)
+
+    return errors, warnings
+
+
+def report(errors, warnings, rules):
+    """Print the verification result; returns True when there are no errors."""
+    checked = (len(rules.get("required_collections", [])) + len(rules.get("required_fields", {}))
+               + len(rules.get("relations", [])))
+    for message in errors:
+        print(f"[FAIL] {message}")
+    for message in warnings:
+        print(f"[WARN] {message}")
+    if errors:
+        print(f"[FAIL] Structural check failed: {len(errors)} error(s), {len(warnings)} warning(s)")
+        return False
+    print(f"[PASS] Structural check passed ({checked} rules, {len(warnings)} warning(s))")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify a Directus schema snapshot against structural rules")
+    parser.add_argument("snapshot", help="Snapshot JSON file or sharded directory (snapshot_store.py)")
+    parser.add_argument("--rules", default=RULES_PATH, help="Rules file (default: %(default)s)")
+    parser.add_argument("--strict", action="store_true", help="Treat warnings as errors")
+    args = parser.parse_args()
+
+    rules = load_rules(args.rules)
+    errors, warnings = verify(load_any(args.snapshot), rules, strict=args.strict)
+    return 0 if report(errors, warnings, rules) else 1
+
+
+if __name__ == "__main__":
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
@@ -1,88 +1,77 @@
+"""
+triage_landing.py - Directus access triage for the landing page (roles, permissions, data sanity)
+
+Default mode samples the public role, one user role and a few landing
+collections. --matrix builds the FULL role x collection x action access
+matrix from four field-projected requests (/policies, /roles, /access,
+/permissions?limit=-1) joined in memory, instead of one permissions
+request per role.
+
+--save persists the run (settings, full permission matrix, data sanity
+results) as a compact JSON artifact with one SHA256 per section and a root
+hash. When the root hash equals the latest saved run nothing is written;
+otherwise the changes against it are printed. --diff compares two saved
+runs offline and only opens sections whose hashes differ. Runs are kept
+per Directus instance (one subdirectory per DIRECTUS_URL hash) in a private
+directory: created 0700, and refused when it is a symlink, owned by someone
+else or open to group/others.
+
+Usage:
+    python3 scripts/directus/triage_landing.py
+    python3 scripts/directus/triage_landing.py --save
+    python3 scripts/directus/triage_landing.py --diff                  # previous vs latest run
+    python3 scripts/directus/triage_landing.py --diff RUN [RUN]        # file path or run name
+    python3 scripts/directus/triage_landing.py --matrix
+    python3 scripts/directus/triage_landing.py --matrix --collections pages,navigation
+    python3 scripts/directus/triage_landing.py --matrix --format csv --output access.csv
+
+Exit code (--diff): 0 no changes, 1 changes, 2 error.
+
+ENVIRONMENT:
+    DIRECTUS_URL              - Directus base URL
+    DIRECTUS_ADMIN_EMAIL      - Admin email (or GSM secret)
+    DIRECTUS_ADMIN_PASSWORD   - Admin password (or GSM secret)
+    DIRECTUS_TRIAGE_DIR       - Saved runs (default: <tmp>/directus-triage-<uid>/<url hash>/)
+"""
+
 import os
+import csv
+import io
 import json
-import urllib.request
-import urllib.error
-import urllib.parse
-import subprocess
-import ssl
 import sys
+import hashlib
+import argparse
+import tempfile
+from datetime import datetime, timezone
+
+from directus_auth import DirectusAuth, private_dir
+from directus_client import get_client
 
 API_URL = os.environ.get("DIRECTUS_URL")
-if not API_URL:
-    print("[ERROR] Missing DIRECTUS_URL environment variable"); sys.exit(1)
 
-def get_access_token_via_login():
-    def fetch_secret(name):
-        return subprocess.check_output(
-             ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-             text=True
-         ).strip()
+def get_access_token_via_login(log=sys.stdout):
+    # Cached across scripts; GSM is only queried when no valid/refreshable token exists
+    print("Authenticating...", file=log)
+    auth = DirectusAuth(API_URL, email_secrets=("DIRECTUS_ADMIN_EMAIL_test",),
+                        password_secrets=("DIRECTUS_ADMIN_PASSWORD_test",))
+    return auth.token()
 
-    print("Authenticating...")
-    try:
-        email = os.environ.get("DIRECTUS_ADMIN_EMAIL") or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-        password = os.environ.get("DIRECTUS_ADMIN_PASSWORD") or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
-    except Exception as e:
-        print(f"Error fetching secrets: {e}")
-        return None
-    
-    url = f"{API_URL}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            resp_data = json.load(response)
-            return resp_data["data"]["access_token"]
-    except Exception as e:
-        print(f"Error logging in: {e}")
-        return None
-
-def make_request(url, method="GET", data=None, token=None, check_ssl=False):
-    headers = {}
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-    if data:
-        headers["Content-Type"] = "application/json"
-        
-    req = urllib.request.Request(url, method=method, headers=headers)
-    if data:
-        req.data = json.dumps(data).encode("utf-8")
-        
-    ctx = ssl.create_default_context()
-    if not check_ssl:
-        ctx.check_hostname = False
-        ctx.verify_mode = ssl.CERT_NONE
-        
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            if response.status == 204:
-                return {}
-            content_type = response.getheader("Content-Type", "")
-            if "application/json" in content_type:
-                 return json.load(response)
-            return response.read().decode('utf-8')
-            
-    except urllib.error.HTTPError as e:
-        err_body = e.read().decode()
+def make_request(url, method="GET", data=None, token=None):
+    # Shared keep-alive client; error bodies are decoded from JSON when possible
+    res = get_client().request(method, url, data=data, token=token)
+    if "error" in res:
         try:
-             json_err = json.loads(err_body)
-             return {"error": e.code, "message": json_err}
-        except:
-             return {"error": e.code, "message": err_body}
-    except Exception as e:
-        return {"error": 500, "message": str(e)}
+            res["message"] = json.loads(res["message"])
+        except (TypeError, ValueError):
+            pass
+    return res
 
 def get_settings(token):
-    # Try fetching settings to find default role
-    res = make_request(f"{API_URL}/items/directus_settings?limit=1", token=token)
-    if "data" in res:
-        return res["data"]
-    return {}
+    # System singleton: /settings, NOT /items/directus_settings (rejected for system collections)
+    res = make_request(f"{API_URL}/settings", token=token)
+    if "error" in res:
+        print(f"[WARN] GET /settings failed: HTTP {res['error']} - {res.get('message')}")
+    return res.get("data") or {}
 
 def get_roles(token):
     res = make_request(f"{API_URL}/roles", token=token)
@@ -112,15 +101,19 @@ def get_permissions(token, role_id):
     return []
 
 def check_data_sanity(token):
+    """Prints the checks and returns them for saved runs: {"navigation": {id: status}, "public": {collection: {...}}}."""
     print("\n--- [Data Sanity Check] ---")
-    
+    results = {"navigation": {}, "public": {}}
+
     # 1. Check Navigation IDs (Admin)
     for nav_id in ["main", "footer"]:
         res = make_request(f"{API_URL}/items/navigation/{nav_id}", token=token)
         if "data" in res:
             print(f"Navigation '{nav_id}': EXISTS (ID: {res['data'].get('id')})")
+            results["navigation"][nav_id] = "exists"
         else:
             print(f"Navigation '{nav_id}': MISSING or Error ({res})")
+            results["navigation"][nav_id] = f"missing (HTTP {res.get('error')})"
 
     # 2. Check Public Access (No Token)
     print("\n[Public Access Check]")
@@ -129,8 +122,11 @@ def check_data_sanity(token):
         if "data" in res:
             count = len(res["data"])
             print(f"GET /items/{col}: 200 OK (Count: {count})")
+            results["public"][col] = {"status": 200, "count": count}
         else:
              print(f"GET /items/{col}: ERROR {res.get('error')} - {res.get('message')}")
+             results["public"][col] = {"status": res.get("error"), "count": None}
+    return results
 
 def analyze_role(token, role_name, role_id):
     print(f"\nAnalyzing Role: {role_name} (ID: {role_id})")
@@ -153,14 +149,445 @@ def analyze_role(token, role_name, role_id):
         else:
             print(f"  - {col}: [NO PERMISSION]")
 
+
+MATRIX_ACTIONS = ["create", "read", "update", "delete", "share"]
+# Text matrix cells: full access, restricted (row filter or field list), none
+CELL_MARKS = {"full": "Y", "partial": "~", None: "."}
+
+
+def fetch_list(path, token):
+    res = make_request(f"{API_URL}{path}", token=token)
+    if "error" in res:
+        return None, res
+    return res.get("data") or [], None
+
+
+def fetch_access_model(token):
+    """
+    Roles, policies, access rows and permissions in four requests.
+    Directus without /policies (pre-v11) keeps permissions on roles; only a
+    404 from the first request marks the model "legacy", any other failure
+    (403, 5xx, network) is raised instead of guessing the version.
+    """
+    model = {"requests": 1}
+    policies, error = fetch_list("/policies?fields=id,name,admin_access,app_access&limit=-1", token)
+    if error and error.get("error") != 404:
+        raise ValueError(f"GET /policies failed: HTTP {error['error']} - {error.get('message')}")
+    model["legacy"] = policies is None
+    model["policies"] = policies or []
+
+    role_fields = "id,name,admin_access" if model["legacy"] else "id,name,parent"
+    perm_fields = "id,role,collection,action,fields,permissions" if model["legacy"] else \
+        "id,policy,collection,action,fields,permissions"
+    calls = [("roles", f"/roles?fields={role_fields}&limit=-1"),
+             ("permissions", f"/permissions?fields={perm_fields}&limit=-1")]
+    if not model["legacy"]:
+        calls.insert(1, ("access", "/access?fields=id,role,user,policy&limit=-1"))
+    model["access"] = []
+
+    for key, path in calls:
+        rows, error = fetch_list(path, token)
+        model["requests"] += 1
+        if rows is None:
+            raise ValueError(f"GET {path.split('?')[0]} failed: HTTP {error['error']} - {error.get('message')}")
+        model[key] = rows
+    return model
+
+
+def _merge_cell(cell, perm, source):
+    restricted = bool(perm.get("permissions")) or "*" not in (perm.get("fields") or [])
+    access = "partial" if restricted else "full"
+    if cell is None:
+        cell = {"access": access, "fields": [], "filtered": False, "via": []}
+    elif access == "full":
+        cell["access"] = "full"
+    cell["fields"] = sorted(set(cell["fields"]) | set(perm.get("fields") or []))
+    cell["filtered"] = cell["filtered"] or bool(perm.get("permissions"))
+    if source not in cell["via"]:
+        cell["via"].append(source)
+    return cell
+
+
+def build_access_matrix(model, collections=None):
+    """
+    {subject: {"kind", "id", "admin", "policies", "collections": {collection: {action: cell}}}}
+    Subjects: PUBLIC, every role (with the policies of its parent roles) and
+    users with direct policy attachments. cell = {"access": "full"|"partial",
+    "fields", "filtered", "via": [policy or role names]}.
+    """
+    wanted = set(collections) if collections else None
+    policies = {p["id"]: p for p in model["policies"]}
+    roles = {r["id"]: r for r in model["roles"]}
+    perms_by_owner = {}
+    for perm in model["permissions"]:
+        if wanted is not None and perm.get("collection") not in wanted:
+            continue
+        owner = perm.get("role") if model["legacy"] else perm.get("policy")
+        perms_by_owner.setdefault(owner, []).append(perm)
+
+    # Subject -> owners of its permissions (policy ids, or role ids in legacy mode)
+    subjects = {"PUBLIC": {"kind": "public", "id": None, "owners": []}}
+    for role in model["roles"]:
+        subjects[f"ROLE {role.get('name')}"] = {"kind": "role", "id": role["id"], "owners": []}
+    if model["legacy"]:
+        subjects["PUBLIC"]["owners"] = [None]
+        for role in model["roles"]:
+            subjects[f"ROLE {role.get('name')}"]["owners"] = [role["id"]]
+    else:
+        direct = {}
+        for row in model["access"]:
+            key = row.get("role") or (f"user:{row['user']}" if row.get("user") else None)
+            direct.setdefault(key, []).append(row.get("policy"))
+        subjects["PUBLIC"]["owners"] = direct.get(None, [])
+        for role in model["roles"]:
+            owners, current, seen = [], role, set()
+            # Child roles inherit the policies of every parent role
+            while current and current["id"] not in seen:
+                seen.add(current["id"])
+                owners.extend(direct.get(current["id"], []))
+                current = roles.get(current.get("parent"))
+            subjects[f"ROLE {role.get('name')}"]["owners"] = list(dict.fromkeys(owners))
+        for key, owners in direct.items():
+            if key and key.startswith("user:"):
+                subjects[f"USER {key[5:]}"] = {"kind": "user", "id": key[5:], "owners": owners}
+
+    matrix = {}
+    for name, subject in subjects.items():
+        if model["legacy"]:
+            admin = bool(roles.get(subject["id"], {}).get("admin_access"))
+            labels = {}
+        else:
+            admin = any(policies.get(pid, {}).get("admin_access") for pid in subject["owners"])
+            labels = {pid: policies.get(pid, {}).get("name") or pid for pid in subject["owners"]}
+        entry = {
+            "kind": subject["kind"],
+            "id": subject["id"],
+            "admin": admin,
+            "policies": [labels[pid] for pid in subject["owners"]] if labels else [],
+            "collections": {},
+        }
+        for owner in subject["owners"]:
+            source = labels.get(owner, name) if labels else name
+            for perm in perms_by_owner.get(owner, []):
+                actions = entry["collections"].setdefault(perm.get("collection"), {})
+                actions[perm.get("action")] = _merge_cell(actions.get(perm.get("action")), perm, source)
+        entry["collections"] = dict(sorted(entry["collections"].items()))
+        matrix[name] = entry
+    return matrix
+
+
+def print_access_matrix(matrix, collections=None):
+    header = " ".join(action[0].upper() for action in MATRIX_ACTIONS)
+    for name, entry in matrix.items():
+        policies = f" via {', '.join(entry['policies'])}" if entry["policies"] else ""
+        print(f"\n{name}{' [ADMIN]' if entry['admin'] else ''}{policies}")
+        if entry["admin"]:
+            print("  admin_access: every collection and action, permissions are not evaluated")
+            continue
+        shown = collections or list(entry["collections"])
+        if not shown:
+            print("  (no permissions)")
+            continue
+        width = max(len("collection"), *(len(c) for c in shown))
+        print(f"  {'collection':<{width}}  {header}")
+        for col in shown:
+            actions = entry["collections"].get(col, {})
+            cells = " ".join(CELL_MARKS[(actions.get(a) or {}).get("access")] for a in MATRIX_ACTIONS)
+            print(f"  {col:<{width}}  {cells}")
+    print(f"\nLegend: {CELL_MARKS['full']} full, {CELL_MARKS['partial']} row filter or field subset, "
+          f"{CELL_MARKS[None]} none")
+
+
+def matrix_rows(matrix):
+    """Flat rows for CSV export: one per subject x collection x action granted."""
+    rows = []
+    for name, entry in matrix.items():
+        for col, actions in entry["collections"].items():
+            for action in MATRIX_ACTIONS:
+                cell = actions.get(action)
+                if cell:
+                    rows.append({
+                        "subject": name, "admin": entry["admin"], "collection": col, "action": action,
+                        "access": cell["access"], "filtered": cell["filtered"],
+                        "fields": ",".join(cell["fields"]), "via": ";".join(cell["via"]),
+                    })
+    return rows
+
+
+def export_access_matrix(matrix, fmt):
+    if fmt == "json":
+        return json.dumps(matrix, indent=2)
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["subject", "admin", "collection", "action", "access",
+                                                "filtered", "fields", "via"])
+    writer.writeheader()
+    writer.writerows(matrix_rows(matrix))
+    return buffer.getvalue()
+
+
+def run_matrix(token, args):
+    collections = [c.strip() for c in args.collections.split(",") if c.strip()] if args.collections else None
+    model = fetch_access_model(token)
+    matrix = build_access_matrix(model, collections)
+    grants = sum(len(actions) for entry in matrix.values() for actions in entry["collections"].values())
+    mode = "legacy role permissions" if model["legacy"] else "policies"
+    summary = (f"[OK] {len(matrix)} subjects, {len(model['permissions'])} permissions, {grants} grants "
+               f"({mode}, {model['requests']} requests)")
+
+    if args.format == "text":
+        print("--- [Directus Access Matrix] ---")
+        print(summary)
+        print_access_matrix(matrix, collections)
+        if args.output:
+            with open(args.output, "w") as f:
+                f.write(export_access_matrix(matrix, "json"))
+        return
+    output = export_access_matrix(matrix, args.format)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output)
+        print(summary)
+        print(f"[OK] Wrote {args.format.upper()} matrix to {args.output}")
+    else:
+        print(output)
+
+
+TRIAGE_FORMAT = "directus-triage/1"
+TRIAGE_SECTIONS = ("settings", "permissions", "sanity")
+# Settings that decide who can see what; the rest of directus_settings is noise for triage
+TRIAGE_SETTINGS_KEYS = ("project_name", "project_url", "public_registration", "public_registration_role",
+                        "public_registration_verify_email", "storage_asset_transform")
+
+
+def triage_dir():
+    """The private directory for saved runs (same checks as the token cache)."""
+    path = os.environ.get("DIRECTUS_TRIAGE_DIR") or os.path.join(
+        tempfile.gettempdir(), f"directus-triage-{os.getuid()}"
+    )
+    return private_dir(path)
+
+
+def runs_dir(api_url=None):
+    """Saved runs of one Directus instance: a subdirectory of triage_dir() per API URL hash."""
+    api_url = (api_url or API_URL or "").rstrip("/")
+    if not api_url:
+        raise ValueError("Missing DIRECTUS_URL environment variable (saved runs are kept per instance)")
+    return os.path.join(triage_dir(), hashlib.sha256(api_url.encode("utf-8")).hexdigest()[:16])
+
+
+def compact_json(data):
+    return json.dumps(data, sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def section_hash(data):
+    return hashlib.sha256(compact_json(data).encode("utf-8")).hexdigest()
+
+
+def build_run(settings, matrix, sanity):
+    """Saved-run artifact; the root hash covers the section hashes only, not the timestamp."""
+    data = {
+        "settings": {key: settings.get(key) for key in TRIAGE_SETTINGS_KEYS},
+        "permissions": matrix,
+        "sanity": sanity,
+    }
+    hashes = {name: section_hash(data[name]) for name in TRIAGE_SECTIONS}
+    return {
+        "format": TRIAGE_FORMAT,
+        "api_url": (API_URL or "").rstrip("/"),
+        "created_at": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "hash": section_hash(hashes),
+        "hashes": hashes,
+        "data": data,
+    }
+
+
+def list_runs(directory=None):
+    """Saved run files, oldest first (names start with a fixed-width UTC timestamp in microseconds)."""
+    directory = directory or runs_dir()
+    if not os.path.isdir(directory):
+        return []
+    names = sorted(n for n in os.listdir(directory) if n.startswith("triage-") and n.endswith(".json"))
+    return [os.path.join(directory, n) for n in names]
+
+
+def load_run(path):
+    with open(path, "r") as f:
+        run = json.load(f)
+    if run.get("format") != TRIAGE_FORMAT:
+        raise ValueError(f"{path}: not a triage run (format {run.get('format')!r})")
+    return run
+
+
+def resolve_run(ref):
+    """A file path, or the name of a run in the triage directory."""
+    if os.path.isfile(ref):
+        return ref
+    path = os.path.join(runs_dir(), ref if ref.endswith(".json") else f"{ref}.json")
+    if not os.path.isfile(path):
+        raise ValueError(f"No saved triage run '{ref}' (looked in {runs_dir()})")
+    return path
+
+
+def save_run(run):
+    """
+    Write `run` unless the latest saved run has the same root hash.
+    Returns (path written or None, previous run path or None, previous run or None).
+    """
+    directory = runs_dir(run["api_url"])
+    runs = list_runs(directory)
+    previous_path = runs[-1] if runs else None
+    previous = load_run(previous_path) if previous_path else None
+    if previous and previous.get("hash") == run["hash"]:
+        return None, previous_path, previous
+
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    stamp = run["created_at"].replace("-", "").replace(":", "")
+    path = os.path.join(directory, f"triage-{stamp}-{run['hash'][:12]}.json")
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        f.write(compact_json(run) + "\n")
+    os.replace(tmp_path, path)
+    return path, previous_path, previous
+
+
+def _flatten(data, prefix=()):
+    # Matrix cells ({"access": ...}) and lists are compared as a whole
+    if isinstance(data, dict) and data and "access" not in data:
+        flat = {}
+        for key, value in data.items():
+            flat.update(_flatten(value, prefix + (str(key),)))
+        return flat
+    return {prefix: data}
+
+
+def _describe(value):
+    if isinstance(value, dict) and "access" in value:
+        detail = [value["access"]]
+        if value.get("filtered"):
+            detail.append("filtered")
+        if value.get("fields") and value["fields"] != ["*"]:
+            detail.append(f"fields={','.join(value['fields'])}")
+        return " ".join(detail)
+    return compact_json(value)
+
+
+def diff_runs(old, new):
+    """
+    {section: [(kind, path, old, new)]} for sections whose hash differs;
+    kind is "+", "-" or "~". Equal root hashes return {} without comparing.
+    """
+    if old.get("hash") == new.get("hash"):
+        return {}
+    changes = {}
+    for name in TRIAGE_SECTIONS:
+        if old["hashes"].get(name) == new["hashes"].get(name):
+            continue
+        before, after = _flatten(old["data"].get(name)), _flatten(new["data"].get(name))
+        rows = []
+        for path in sorted(set(before) | set(after)):
+            if path not in before:
+                rows.append(("+", path, None, after[path]))
+            elif path not in after:
+                rows.append(("-", path, before[path], None))
+            elif section_hash(before[path]) != section_hash(after[path]):
+                rows.append(("~", path, before[path], after[path]))
+        changes[name] = rows
+    return changes
+
+
+def print_diff(changes, old_label, new_label):
+    print(f"[DIFF] {old_label} -> {new_label}")
+    if not changes:
+        print("  [OK] No changes (hashes match)")
+        return
+    for name in TRIAGE_SECTIONS:
+        rows = changes.get(name)
+        if rows is None:
+            print(f"  {name}: unchanged")
+            continue
+        print(f"  {name}: {len(rows)} change(s)")
+        for kind, path, before, after in rows:
+            where = " / ".join(part for part in path if part != "collections")
+            if kind == "+":
+                print(f"    + {where}: {_describe(after)}")
+            elif kind == "-":
+                print(f"    - {where}: {_describe(before)}")
+            else:
+                print(f"    ~ {where}: {_describe(before)} -> {_describe(after)}")
+
+
+def run_diff(refs):
+    if len(refs) > 2:
+        raise ValueError("--diff takes at most two runs")
+    if len(refs) == 2:
+        old_path, new_path = resolve_run(refs[0]), resolve_run(refs[1])
+    elif len(refs) == 1:
+        runs = list_runs()
+        if not runs:
+            raise ValueError(f"No saved triage runs in {runs_dir()}")
+        old_path, new_path = resolve_run(refs[0]), runs[-1]
+    else:
+        runs = list_runs()
+        if len(runs) < 2:
+            raise ValueError(f"Need two saved triage runs in {runs_dir()} (found {len(runs)})")
+        old_path, new_path = runs[-2], runs[-1]
+    old, new = load_run(old_path), load_run(new_path)
+    if old.get("api_url") != new.get("api_url"):
+        print(f"[WARN] Comparing runs of different instances: {old.get('api_url')} vs {new.get('api_url')}")
+    changes = diff_runs(old, new)
+    print_diff(changes, f"{os.path.basename(old_path)} ({old['created_at']})",
+               f"{os.path.basename(new_path)} ({new['created_at']})")
+    return 1 if changes else 0
+
+
+def save_triage(token, settings, sanity):
+    run = build_run(settings, build_access_matrix(fetch_access_model(token)), sanity)
+    path, previous_path, previous = save_run(run)
+    print("\n--- [Saved Run] ---")
+    if path is None:
+        print(f"[SKIP] Unchanged since {os.path.basename(previous_path)} (hash {run['hash'][:12]})")
+        return
+    print(f"[OK] Saved {path}")
+    if previous:
+        print_diff(diff_runs(previous, run), os.path.basename(previous_path), os.path.basename(path))
+
 def main():
-    print("--- [Directus Triage Audit] ---")
-    
-    token = get_access_token_via_login()
+    parser = argparse.ArgumentParser(description="Directus access triage for the landing page")
+    parser.add_argument("--matrix", action="store_true",
+                        help="Full role x collection x action matrix (four requests) instead of the sample audit")
+    parser.add_argument("--collections", help="Comma-separated collections to include in the matrix (default: all)")
+    parser.add_argument("--format", choices=["text", "json", "csv"], default="text",
+                        help="Matrix output format (default: %(default)s)")
+    parser.add_argument("--output", help="Write the matrix to this file (text format writes JSON)")
+    parser.add_argument("--save", action="store_true",
+                        help="Save this audit as a hashed run and print what changed since the last one")
+    parser.add_argument("--diff", nargs="*", metavar="RUN",
+                        help="Compare two saved runs (default: previous vs latest); no Directus access")
+    args = parser.parse_args()
+
+    if args.diff is not None:
+        return run_diff(args.diff)
+    if args.save and args.matrix:
+        parser.error("--save records the full audit; run it without --matrix")
+    if not API_URL:
+        print("[ERROR] Missing DIRECTUS_URL environment variable")
+        sys.exit(1)
+
+    if not args.matrix:
+        print("--- [Directus Triage Audit] ---")
+
+    # CSV/JSON on stdout must stay machine-readable
+    piped = args.matrix and args.format != "text" and not args.output
+    token = get_access_token_via_login(log=sys.stderr if piped else sys.stdout)
     if not token:
         print("Auth failed.")
         sys.exit(1)
-        
+
+    if args.matrix:
+        run_matrix(token, args)
+        return
+
+
     # 1. Discover Roles
     print("\n[Role Discovery]")
     settings = get_settings(token)
@@ -214,7 +641,14 @@ def main():
             print("  Could not identify a non-admin user role to audit.")
 
     # 3. Data Sanity
-    check_data_sanity(token)
+    sanity = check_data_sanity(token)
+
+    if args.save:
+        save_triage(token, settings, sanity)
 
 if __name__ == "__main__":
-    main()
+    try:
+        sys.exit(main())
+    except (OSError, ValueError) as e:
+        print(f"[ERROR] {e}")
+        sys.exit(2)
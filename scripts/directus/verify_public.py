@@ -1,11 +1,10 @@
 import os
-import json
-import urllib.request
-import urllib.error
-import subprocess
-import ssl
 import sys
 
+from directus_auth import DirectusAuth
+from directus_client import get_client
+from public_probe import collection_targets, print_report, probe
+
 API_URL = os.environ.get("DIRECTUS_URL")
 if not API_URL:
     print("[ERROR] Missing DIRECTUS_URL environment variable"); sys.exit(1)
@@ -20,49 +19,17 @@ REQUIRED_PUBLIC_COLLECTIONS = [
 ]
 
 def get_access_token_via_login():
-    def fetch_secret(name):
-        return subprocess.check_output(
-             ["gcloud", "secrets", "versions", "access", "latest", f"--secret={name}"],
-             text=True
-         ).strip()
-    
+    # Cached across scripts; GSM is only queried when no valid/refreshable token exists
     print("Authenticating Admin...")
-    email = os.environ.get("DIRECTUS_ADMIN_EMAIL") or fetch_secret("DIRECTUS_ADMIN_EMAIL_test")
-    password = os.environ.get("DIRECTUS_ADMIN_PASSWORD") or fetch_secret("DIRECTUS_ADMIN_PASSWORD_test")
-    
-    url = f"{API_URL}/auth/login"
-    data = json.dumps({"email": email, "password": password}).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Content-Type": "application/json"})
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            resp_data = json.load(response)
-            return resp_data["data"]["access_token"]
-    except Exception as e:
-        print(f"Error logging in: {e}")
-        return None
+    auth = DirectusAuth(API_URL, email_secrets=("DIRECTUS_ADMIN_EMAIL_test",),
+                        password_secrets=("DIRECTUS_ADMIN_PASSWORD_test",))
+    return auth.token()
 
-def check_public_read(collection):
-    url = f"{API_URL}/items/{collection}?limit=1"
-    req = urllib.request.Request(url)
-    # NO AUTH HEADER
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            return response.getcode()
-    except urllib.error.HTTPError as e:
-        return e.code
-    except Exception as e:
-        print(f"Error checking {collection}: {e}")
-        return 500
+def check_public_read(collections):
+    # NO AUTH HEADER; all collections probed concurrently under one deadline
+    report = probe(API_URL, collection_targets(collections))
+    print_report(report)
+    return [col for col in collections if not report["endpoints"][col]["ok"]]
 
 def get_public_role_id(token):
     # Public role is usually null, or we can check via /roles?
@@ -72,19 +39,12 @@ def get_public_role_id(token):
     return None
 
 def fetch_permissions(token):
-    url = f"{API_URL}/permissions?limit=-1"
-    req = urllib.request.Request(url)
-    req.add_header("Authorization", f"Bearer {token}")
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    with urllib.request.urlopen(req, context=ctx) as response:
-         data = json.load(response)
-         return data["data"]
+    res = get_client().request("GET", f"{API_URL}/permissions?limit=-1", token=token)
+    if "error" in res:
+        raise RuntimeError(f"HTTP {res['error']} - {res.get('message')}")
+    return res["data"]
 
 def grant_public_read(token, collection):
-    url = f"{API_URL}/permissions"
     payload = {
         "role": None, # Public
         "collection": collection,
@@ -92,33 +52,19 @@ def grant_public_read(token, collection):
         "permissions": {}, # Full access
         "fields": ["*"]
     }
-    
-    data = json.dumps(payload).encode("utf-8")
-    req = urllib.request.Request(url, data=data, headers={"Authorization": f"Bearer {token}", "Content-Type": "application/json"})
-    
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    
-    try:
-        with urllib.request.urlopen(req, context=ctx) as response:
-            return True
-    except urllib.error.HTTPError as e:
-        print(f"   [ERROR] Grant read to {collection} failed: {e.code} - {e.read().decode()}")
+
+    res = get_client().request("POST", f"{API_URL}/permissions", data=payload, token=token)
+    if "error" in res:
+        print(f"   [ERROR] Grant read to {collection} failed: {res['error']} - {res.get('message')}")
         return False
+    return True
 
 def main():
     print("--- [Verify Public Permissions] ---")
     
     # 1. Smoke Test
-    failing_collections = []
-    
-    for col in ["pages", "navigation"]:
-        code = check_public_read(col)
-        print(f"GET /items/{col} -> {code}")
-        if code != 200:
-            failing_collections.append(col)
-            
+    failing_collections = check_public_read(["pages", "navigation"])
+
     # Quick check logic: if pages/nav fail, likely all new ones fail
     if failing_collections:
         print("\n[AUTO-FIX] Detected 403 Forbidden. Applying Public READ permissions...")
@@ -138,9 +84,7 @@ def main():
             grant_public_read(token, col)
             
         print("\n[RE-VERIFY] Checking access again...")
-        for col in ["pages", "navigation"]:
-            code = check_public_read(col)
-            print(f"GET /items/{col} -> {code}")
+        check_public_read(REQUIRED_PUBLIC_COLLECTIONS)
     else:
         print("\n[SUCCESS] Public access verified.")
 
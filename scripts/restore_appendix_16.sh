@@ -16,6 +16,10 @@
 #   DIRECTUS_URL           - Target Directus instance (defaults to live server)
 #   DIRECTUS_ADMIN_EMAIL   - Admin email for authentication
 #   DIRECTUS_ADMIN_PASSWORD - Admin password for authentication
+#   SCHEMA_APPLY_PARALLEL  - Collections created concurrently per phase (default 4)
+#   DIRECTUS_TOKEN_CACHE   - "off" to force a fresh login in every Python step
+#                            (default: steps share one cached token, see
+#                            scripts/directus/directus_auth.py)
 # =============================================================================
 
 set -e  # Exit on any error
@@ -85,7 +89,7 @@ run_step() {
 # STEP 1: APPLY SCHEMA
 # =============================================================================
 run_step "1" "Apply Schema" \
-    "python3 '$SCRIPT_DIR/directus/schema_apply.py' --execute"
+    "python3 '$SCRIPT_DIR/directus/schema_apply.py' --execute --parallel '${SCHEMA_APPLY_PARALLEL:-4}'"
 
 # =============================================================================
 # STEP 2: DEPLOY CACHE WARMER FLOWS (e1-07)